@@ -55,6 +55,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # <--- Added for Production Static Files
+    'core.middleware.APICompressionMiddleware', # brotli/gzip for /api/ responses
+    'core.middleware.RequestProfilerMiddleware', # off unless enabled, see REQUEST PROFILING below
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -98,6 +100,32 @@ DATABASES = {
     )
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Take the write lock when a transaction starts (BEGIN IMMEDIATE). A
+    # transaction that reads before writing then waits for the lock instead
+    # of failing with "database is locked" when another writer got there first.
+    DATABASES['default'].setdefault('OPTIONS', {}).update({'transaction_mode': 'IMMEDIATE', 'timeout': 20})
+
+
+# ==============================================================================
+#  CACHE
+# ==============================================================================
+
+# Per-process memory caches. 'default' holds auth state; compressed API
+# responses get their own store (LocMem shares a store per LOCATION), so a
+# burst of per-user bodies can't evict auth entries.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    'api-compression': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-compression',
+        'OPTIONS': {'MAX_ENTRIES': 200},
+    },
+}
+
 
 # ==============================================================================
 #  PASSWORD VALIDATION
@@ -140,6 +168,28 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 
+# ==============================================================================
+#  API RESPONSE COMPRESSION (core.middleware.APICompressionMiddleware)
+# ==============================================================================
+
+API_COMPRESSION_PATH_PREFIXES = ['/api/']
+API_COMPRESSION_MIN_SIZE = 1024  # bytes; smaller bodies aren't worth it
+API_COMPRESSION_GZIP_LEVEL = 6
+API_COMPRESSION_BROTLI_QUALITY = 5  # 5 is close to gzip -6 speed with smaller output
+API_COMPRESSION_CACHE = 'api-compression'  # None: compress every time, cache nothing
+API_COMPRESSION_CACHE_TTL = 300  # seconds
+
+
+# ==============================================================================
+#  REQUEST PROFILING (core.middleware.RequestProfilerMiddleware)
+# ==============================================================================
+
+# Profile every request (dev/staging). Otherwise admins can profile a single
+# request by sending the header below, e.g. `X-Profile: 1`.
+REQUEST_PROFILER_ENABLED = os.environ.get('REQUEST_PROFILER_ENABLED', '') == '1'
+REQUEST_PROFILER_HEADER = 'X-Profile'
+
+
 # ==============================================================================
 #  DEFAULT PRIMARY KEY FIELD TYPE
 # ==============================================================================
@@ -153,10 +203,25 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.ClaimsJWTAuthentication',
+    ),
+    # orjson-backed JSON (falls back to the stdlib if orjson isn't installed).
+    # Swap back to rest_framework.renderers.JSONRenderer / parsers.JSONParser to opt out.
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
+# How long (seconds) a user's is_active/role is trusted before re-checking the DB.
+# Profile/User saves invalidate it immediately in this process.
+AUTH_STATE_CACHE_TTL = int(os.environ.get('AUTH_STATE_CACHE_TTL', '60'))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
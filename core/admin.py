@@ -1,5 +1,9 @@
+from django import forms
 from django.contrib import admin
-from .models import Profile, Course, Module, Lesson, Quiz, Question
+from django.db import transaction
+
+from . import ordering
+from .models import Profile, Course, Module, Lesson, LessonContent, Quiz, Question, VideoMeta, YouTubeQuotaUsage, LessonDraft, ExplanationAttemptArchive
 
 # Unregister the old, non-existent models if they were there
 # (This is good practice but optional, the main fix is the new registrations)
@@ -17,6 +21,10 @@ class ProfileAdmin(admin.ModelAdmin):
 class LessonInline(admin.TabularInline):
     model = Lesson
     extra = 1 # Show one extra blank form for a new lesson
+    raw_id_fields = ('video',) # A <select> of every stored video would be huge
+
+class LessonContentInline(admin.StackedInline):
+    model = LessonContent # The lesson body lives in its own table
 
 class QuestionInline(admin.TabularInline):
     model = Question
@@ -27,8 +35,34 @@ class QuizAdmin(admin.ModelAdmin):
     list_display = ('title', 'module')
     inlines = [QuestionInline] # Allow editing questions from the quiz page
 
+class ModuleAdminForm(forms.ModelForm):
+    # Orders stay 1..n and unique per course, so `order` isn't written as
+    # typed: `position` is applied as an insert or move through core/ordering.py
+    position = forms.IntegerField(min_value=1, required=False, help_text='Blank: after the last module.')
+
+    class Meta:
+        model = Module
+        exclude = ('order',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['position'].initial = self.instance.order
+
+def _save_module(form):
+    module, position = form.instance, form.cleaned_data.get('position')
+    if module.pk is None:
+        ordering.insert_module(module.course_id, position, module=module)
+        return
+    fields = [f.name for f in Module._meta.concrete_fields if f.editable and f.name not in ('id', 'course', 'order')]
+    with transaction.atomic():
+        module.save(update_fields=fields)
+        if position and 'position' in form.changed_data:
+            ordering.move_module(module.pk, position)
+
 class ModuleInline(admin.TabularInline):
     model = Module
+    form = ModuleAdminForm
     extra = 1 # Show one extra blank form for a new module
 
 @admin.register(Course)
@@ -38,8 +72,19 @@ class CourseAdmin(admin.ModelAdmin):
     search_fields = ('title', 'created_by__username')
     inlines = [ModuleInline] # Allow editing modules from the course page
 
+    def save_formset(self, request, form, formset, change):
+        if formset.model is not Module:
+            return super().save_formset(request, form, formset, change)
+        formset.save(commit=False)
+        for module in formset.deleted_objects:
+            ordering.delete_module(module.pk)
+        for module_form in formset.forms:
+            if module_form.has_changed() and module_form not in formset.deleted_forms:
+                _save_module(module_form)
+
 @admin.register(Module)
 class ModuleAdmin(admin.ModelAdmin):
+    form = ModuleAdminForm
     list_display = ('title', 'course', 'order', 'module_type')
     list_filter = ('module_type', 'course')
     search_fields = ('title',)
@@ -47,14 +92,51 @@ class ModuleAdmin(admin.ModelAdmin):
     # This is advanced; for simplicity, we can just show lessons.
     inlines = [LessonInline] # You could add logic here to show QuizInline instead
 
+    def get_readonly_fields(self, request, obj=None):
+        return ('course',) if obj else () # Modules don't move between courses
+
+    def save_model(self, request, obj, form, change):
+        _save_module(form)
+
+    def delete_model(self, request, obj):
+        ordering.delete_module(obj.pk)
+
+    def delete_queryset(self, request, queryset):
+        for pk in queryset.values_list('pk', flat=True):
+            ordering.delete_module(pk)
+
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
     list_display = ('title', 'module', 'order')
     list_filter = ('module',)
     search_fields = ('title',)
+    raw_id_fields = ('video',)
+    inlines = [LessonContentInline]
+
+@admin.register(VideoMeta)
+class VideoMetaAdmin(admin.ModelAdmin):
+    list_display = ('video_id', 'title', 'channel_title', 'duration_seconds', 'privacy_status', 'embeddable', 'checked_at')
+    list_filter = ('privacy_status', 'embeddable')
+    search_fields = ('video_id', 'title', 'channel_title')
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ('question_text', 'quiz', 'order')
     list_filter = ('quiz',)
-    search_fields = ('question_text',)
\ No newline at end of file
+    search_fields = ('question_text',)
+
+@admin.register(YouTubeQuotaUsage)
+class YouTubeQuotaUsageAdmin(admin.ModelAdmin):
+    list_display = ('day', 'units', 'search_results', 'kept_results')
+
+@admin.register(LessonDraft)
+class LessonDraftAdmin(admin.ModelAdmin):
+    list_display = ('draft_id', 'title', 'module_title', 'status', 'created_by', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('draft_id', 'title')
+
+@admin.register(ExplanationAttemptArchive)
+class ExplanationAttemptArchiveAdmin(admin.ModelAdmin):
+    list_display = ('attempt_id', 'user', 'lesson', 'is_passed', 'created_at', 'archived_at')
+    list_filter = ('is_passed',)
+    raw_id_fields = ('user', 'lesson')
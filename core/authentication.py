@@ -0,0 +1,88 @@
+# core/authentication.py
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework import permissions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+AUTH_STATE_CACHE_KEY = "auth-state:{user_id}"
+AUTH_STATE_TTL = getattr(settings, "AUTH_STATE_CACHE_TTL", 60)  # seconds
+
+
+def get_auth_state(user_id):
+    """
+    Returns {"is_active": bool, "role": str} for the user, or None if the user
+    no longer exists. Cached for AUTH_STATE_TTL seconds so that role changes and
+    deactivations are picked up quickly without a query on every request.
+    """
+    key = AUTH_STATE_CACHE_KEY.format(user_id=user_id)
+    state = cache.get(key)
+    if state is not None:
+        return state or None
+
+    row = User.objects.filter(pk=user_id).values_list("is_active", "profile__role").first()
+    state = {"is_active": row[0], "role": row[1]} if row else {}
+    cache.set(key, state, AUTH_STATE_TTL)
+    return state or None
+
+
+def invalidate_auth_state(user_id):
+    cache.delete(AUTH_STATE_CACHE_KEY.format(user_id=user_id))
+
+
+class ClaimsUser(TokenUser):
+    """
+    Lightweight user built from token claims (id, username, role).
+    Used for read-only requests so we don't have to load auth_user + core_profile.
+    """
+    def __init__(self, token, role):
+        super().__init__(token)
+        self.role = role
+
+    def __str__(self):
+        return self.username
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Drop-in replacement for JWTAuthentication.
+    - Safe methods (GET, HEAD, OPTIONS) get a ClaimsUser, no DB lookup.
+    - Unsafe methods get the real User (views save it on rows), with `role`
+      attached so permission checks don't touch `user.profile`.
+    Both paths go through the cached auth state, so a deactivated user or a
+    changed role is honoured within AUTH_STATE_TTL seconds.
+    """
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        state = get_auth_state(validated_token[api_settings.USER_ID_CLAIM])
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not state["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        if request.method in permissions.SAFE_METHODS:
+            return ClaimsUser(validated_token, state["role"]), validated_token
+
+        user = self.get_user(validated_token)
+        user.role = state["role"]
+        return user, validated_token
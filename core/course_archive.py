@@ -0,0 +1,238 @@
+# core/course_archive.py
+"""
+Course trees as NDJSON, for `manage.py export_courses` / `import_courses`.
+
+The first line is a header ({"format": FORMAT, "version": VERSION}); every
+line after it is one whole course: its modules in order, each with its
+lessons (HTML included) or its quiz, plus the stored YouTube metadata of
+the videos its lessons use (just {"video_id": ...} for a video whose
+metadata was never fetched). read_courses() checks that each line has what
+the importer needs and raises ArchiveError with the line number if not.
+Both sides work BATCH_SIZE courses at a time, so memory stays flat
+however many courses the file holds. Ids aren't kept: the importer
+creates new rows and links them up, and finds the course owner by
+username. A path ending in .gz is read and written gzipped.
+"""
+import gzip
+import json
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from . import ordering
+from .models import Course, Lesson, LessonContent, Module, Question, Quiz, VideoMeta
+
+FORMAT = "courses-ndjson"
+VERSION = 1
+BATCH_SIZE = 50
+
+VIDEO_FIELDS = ("video_id", "title", "channel_title", "description", "duration_seconds",
+                "embeddable", "privacy_status", "checked_at")
+
+
+@contextmanager
+def open_archive(path, mode):
+    """Text stream for `path` ("r" or "w"); "-" is stdin/stdout, *.gz is gzipped."""
+    if path == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+    elif path.endswith(".gz"):
+        with gzip.open(path, mode + "t", encoding="utf-8") as stream:
+            yield stream
+    else:
+        with open(path, mode, encoding="utf-8") as stream:
+            yield stream
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+# ---------------------
+# Export
+# ---------------------
+
+def write_courses(stream, courses, batch_size=BATCH_SIZE):
+    """Writes the header and one line per course in `courses` (a queryset). Returns the count."""
+    stream.write(_dumps({"format": FORMAT, "version": VERSION}) + "\n")
+    ids = courses.order_by("id").values_list("id", flat=True)
+    count = 0
+    batch = []
+    for course_id in ids.iterator(chunk_size=2000):
+        batch.append(course_id)
+        if len(batch) >= batch_size:
+            count += _write_batch(stream, batch)
+            batch = []
+    if batch:
+        count += _write_batch(stream, batch)
+    return count
+
+
+def _write_batch(stream, course_ids):
+    # A few .values() queries for the whole batch, grouped in one pass (like fast_serializers)
+    modules_by_course = defaultdict(list)
+    modules = {}
+    for row in Module.objects.filter(course_id__in=course_ids).order_by("course_id", "order").values(
+        "id", "course_id", "title", "module_type"
+    ):
+        module = {"title": row["title"], "module_type": row["module_type"]}
+        modules_by_course[row["course_id"]].append(module)
+        modules[row["id"]] = module
+
+    videos_by_course = defaultdict(set)
+    for row in Lesson.objects.filter(module__course_id__in=course_ids).order_by("module_id", "order").values(
+        "module_id", "module__course_id", "title", "order", "video_id", "video_candidates", "body__html"
+    ):
+        modules[row["module_id"]].setdefault("lessons", []).append({
+            "title": row["title"], "order": row["order"], "video_id": row["video_id"],
+            "video_candidates": row["video_candidates"], "content": row["body__html"] or "",
+        })
+        if row["video_id"]:
+            videos_by_course[row["module__course_id"]].add(row["video_id"])
+
+    quizzes = {}
+    for row in Quiz.objects.filter(module__course_id__in=course_ids).values("id", "module_id", "title"):
+        quizzes[row["id"]] = modules[row["module_id"]]["quiz"] = {"title": row["title"], "questions": []}
+    for row in Question.objects.filter(quiz_id__in=quizzes).order_by("quiz_id", "order").values(
+        "quiz_id", "question_text", "options", "correct_answer", "order"
+    ):
+        quizzes[row.pop("quiz_id")]["questions"].append(row)
+
+    wanted = set().union(*videos_by_course.values())
+    videos = {row["video_id"]: row for row in VideoMeta.objects.filter(pk__in=wanted).values(*VIDEO_FIELDS)}
+
+    for row in Course.objects.filter(pk__in=course_ids).order_by("id").values(
+        "id", "title", "status", "created_at", "created_by__username"
+    ):
+        stream.write(_dumps({
+            "title": row["title"],
+            "status": row["status"],
+            "created_at": row["created_at"].isoformat(),
+            "created_by": row["created_by__username"],
+            "modules": modules_by_course[row["id"]],
+            "videos": [videos.get(v, {"video_id": v}) for v in sorted(videos_by_course[row["id"]])],
+        }) + "\n")
+    return len(course_ids)
+
+
+# ---------------------
+# Import
+# ---------------------
+
+class ArchiveError(ValueError):
+    pass
+
+
+# Keys create_courses() reads without a default
+REQUIRED_KEYS = {
+    "course": ("title",),
+    "module": ("title", "module_type"),
+    "lesson": ("title",),
+    "quiz": ("title",),
+    "question": ("question_text", "options", "correct_answer"),
+    "video": ("video_id",),
+}
+
+
+def _require(kind, obj):
+    if not isinstance(obj, dict):
+        raise ArchiveError(f"{kind} is not an object")
+    missing = [key for key in REQUIRED_KEYS[kind] if key not in obj]
+    if missing:
+        name = f"{kind} {obj['title']!r}" if "title" in obj else kind
+        raise ArchiveError(f"{name} has no {', '.join(missing)}")
+    return obj
+
+
+def _items(obj, key):
+    items = obj.get(key, [])
+    if not isinstance(items, list):
+        raise ArchiveError(f"{key} is not a list")
+    return items
+
+
+def check_tree(tree):
+    """Raises ArchiveError unless `tree` has everything create_courses() needs."""
+    _require("course", tree)
+    videos = {_require("video", video)["video_id"] for video in _items(tree, "videos")}
+    for module in _items(tree, "modules"):
+        _require("module", module)
+        for lesson in _items(module, "lessons"):
+            _require("lesson", lesson)
+            if lesson.get("video_id") and lesson["video_id"] not in videos:
+                raise ArchiveError(f"lesson {lesson['title']!r} uses video {lesson['video_id']!r}, "
+                                   f"which isn't in videos")
+        if module.get("quiz") is not None:
+            for question in _items(_require("quiz", module["quiz"]), "questions"):
+                _require("question", question)
+
+
+def read_courses(stream):
+    """Checks the header and yields (line number, course dict) for each course line (see check_tree())."""
+    header = json.loads(stream.readline() or "{}")
+    if header.get("format") != FORMAT:
+        raise ArchiveError("Not a course export (missing header line).")
+    if header.get("version") != VERSION:
+        raise ArchiveError(f"Unsupported export version {header.get('version')!r}; expected {VERSION}.")
+    for number, line in enumerate(stream, start=2):
+        if line.strip():
+            try:
+                tree = json.loads(line)
+                check_tree(tree)
+            except (json.JSONDecodeError, ArchiveError) as e:
+                raise ArchiveError(f"Line {number}: {e}") from None
+            yield number, tree
+
+
+def create_courses(trees, owners):
+    """
+    Creates the courses in `trees` with bulk inserts, in one transaction.
+    `owners` maps each tree to its User id (same order). Returns the Courses.
+    """
+    with transaction.atomic():
+        courses = Course.objects.bulk_create([
+            Course(title=tree["title"], status=tree.get("status", Course.Status.DRAFT), created_by_id=owner)
+            for tree, owner in zip(trees, owners)
+        ])
+        # auto_now_add stamped them with now; bulk_update writes the exported time as is
+        dated = []
+        for course, tree in zip(courses, trees):
+            if tree.get("created_at"):
+                course.created_at = parse_datetime(tree["created_at"])
+                dated.append(course)
+        Course.objects.bulk_update(dated, ["created_at"])
+
+        pairs = [
+            (Module(course=course, title=m["title"], order=i, module_type=m["module_type"]), m)
+            for course, tree in zip(courses, trees) for i, m in enumerate(tree.get("modules", []), start=1)
+        ]
+        modules = Module.objects.bulk_create([module for module, _ in pairs])
+        ordering.link(modules)
+
+        lesson_pairs = [
+            (Lesson(module=module, title=l["title"], order=l.get("order", 0), video_id=l.get("video_id"),
+                    video_candidates=l.get("video_candidates", [])), l)
+            for module, m in pairs for l in m.get("lessons", [])
+        ]
+        lessons = Lesson.objects.bulk_create([lesson for lesson, _ in lesson_pairs])
+        LessonContent.objects.bulk_create([
+            LessonContent(lesson=lesson, html=l.get("content", "")) for lesson, (_, l) in zip(lessons, lesson_pairs)
+        ])
+
+        quiz_pairs = [(Quiz(module=module, title=m["quiz"]["title"]), m["quiz"]) for module, m in pairs if m.get("quiz")]
+        quizzes = Quiz.objects.bulk_create([quiz for quiz, _ in quiz_pairs])
+        Question.objects.bulk_create([
+            Question(quiz=quiz, question_text=q["question_text"], options=q["options"],
+                     correct_answer=q["correct_answer"], order=q.get("order", 0))
+            for quiz, (_, data) in zip(quizzes, quiz_pairs) for q in data.get("questions", [])
+        ])
+
+        # Videos already stored here may be fresher; keep those. Bare {"video_id": ...}
+        # entries had no metadata in the source database, so none is created for them.
+        VideoMeta.objects.bulk_create([
+            VideoMeta(**{**video, "checked_at": parse_datetime(video["checked_at"]) if video.get("checked_at") else None})
+            for tree in trees for video in tree.get("videos", []) if video.keys() - {"video_id"}
+        ], ignore_conflicts=True)
+    return courses
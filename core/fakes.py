@@ -0,0 +1,233 @@
+# core/fakes.py
+"""
+Offline stand-ins for Gemini and YouTube, used by `manage.py benchmark_suite`.
+
+Both are deterministic for a given seed: answers depend only on the prompt
+(or query), and failures are drawn from a seeded RNG. Latency, error rate
+and 429 (ResourceExhausted) rate are configurable. fake_backends() patches
+them in at the same seams the real clients use (gemini.get_model and
+views._build_youtube_client), so pooling, routing, retries and metrics all
+run as they do in production.
+"""
+import contextlib
+import hashlib
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
+
+from .synthetic import SAMPLE_WORDS, synthetic_lesson_html, synthetic_question, synthetic_video_id
+
+
+class FailureInjector:
+    """Seeded latency and failure source shared by one fake backend."""
+    def __init__(self, seed, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.calls = 0
+
+    def __call__(self, name, share=1.0):
+        """
+        Waits `share` of the drawn latency, then maybe raises. Returns the
+        rest of the latency (for streams, which spread it over their chunks).
+        """
+        with self.lock:
+            self.calls += 1
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            roll = self.rng.random()
+        if delay * share:
+            time.sleep(delay * share)
+        if roll < self.rate_limit_rate:
+            raise ResourceExhausted(f"{name}: quota exceeded (fake)")
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise ServiceUnavailable(f"{name}: backend unavailable (fake)")
+        return delay * (1 - share)
+
+
+def _rng_for(text):
+    return random.Random(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest())
+
+
+# ---------------------
+# Gemini
+# ---------------------
+
+class FakeGeminiModel:
+    """
+    Answers the prompts in views.py with well-formed JSON/HTML of realistic
+    size. With stream=True the answer comes in chunks, the first after
+    FIRST_CHUNK_SHARE of the latency and the rest spread over the remainder.
+    """
+    FIRST_CHUNK_SHARE = 0.1
+    CHUNK_CHARS = 400
+
+    def __init__(self, model_name, injector, lesson_words=650):
+        self.model_name = model_name
+        self.injector = injector
+        self.lesson_words = lesson_words
+
+    def generate_content(self, prompt, request_options=None, stream=False):
+        rest = self.injector(self.model_name, self.FIRST_CHUNK_SHARE if stream else 1.0)
+        rng = _rng_for(prompt)
+        text = self._answer(prompt, rng)
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+        if stream:
+            chunks = [text[i:i + self.CHUNK_CHARS] for i in range(0, len(text), self.CHUNK_CHARS)]
+            return _FakeStream(chunks, rest, usage)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    def _answer(self, prompt, rng):
+        if "course curriculum designer" in prompt:
+            count = _int_after(prompt, "exactly ", 3)
+            return json.dumps({
+                "course_title": "Benchmark Course",
+                "modules": [{"title": f"Module {i + 1}: {_phrase(rng)}"} for i in range(count)],
+            })
+        if "specific lesson titles" in prompt:
+            count = _int_after(prompt, "exactly ", 3)
+            return json.dumps({"lessons": [{"title": f"Lesson {i + 1}: {_phrase(rng)}"} for i in range(count)]})
+        if "expert technical writer" in prompt:
+            ids = [line.split("ID:", 1)[1].strip() for line in prompt.splitlines() if line.strip().startswith("ID:")]
+            if "VIDEO_ID:" in prompt:
+                return f"VIDEO_ID: {rng.choice(ids) if ids else 'NONE'}\n{synthetic_lesson_html(rng, self.lesson_words)}"
+            return json.dumps({
+                "text_content": synthetic_lesson_html(rng, self.lesson_words),
+                "video_id": rng.choice(ids) if ids else None,
+            })
+        if "RETURN ONLY THE HTML STRING" in prompt:
+            return synthetic_lesson_html(rng, self.lesson_words * 2 // 3)
+        if "multiple-choice questions" in prompt:
+            count = _int_after(prompt, "exactly ", 5)
+            questions = [synthetic_question(rng, i + 1) for i in range(count)]
+            return json.dumps({"quiz_title": "Assessment", "questions": questions})
+        if "STUDENT EXPLANATION" in prompt:
+            return json.dumps({"feedback": "Clear explanation of the core idea.", "is_passed": rng.random() < 0.7})
+        return synthetic_lesson_html(rng, 80)
+
+
+class _FakeStream:
+    """Iterable of response chunks, like a streamed GenerateContentResponse."""
+    def __init__(self, chunks, latency, usage):
+        self.chunks = chunks
+        self.latency = latency
+        self.usage_metadata = usage
+
+    def __iter__(self):
+        pause = self.latency / max(1, len(self.chunks) - 1)
+        for i, text in enumerate(self.chunks):
+            if i and pause:
+                time.sleep(pause)
+            yield SimpleNamespace(text=text)
+
+
+def _int_after(prompt, marker, default):
+    _, found, rest = prompt.partition(marker)
+    digits = rest.split(" ", 1)[0] if found else ""
+    return int(digits) if digits.isdigit() else default
+
+
+def _phrase(rng, words=3):
+    return " ".join(rng.choice(SAMPLE_WORDS) for _ in range(words)).capitalize()
+
+
+# ---------------------
+# YouTube
+# ---------------------
+
+class _FakeRequest:
+    def __init__(self, injector, result):
+        self.injector = injector
+        self.result = result
+
+    def execute(self):
+        self.injector("youtube")
+        return self.result()
+
+
+class FakeYouTube:
+    """
+    Mimics the parts of the YouTube Data API v3 client views.py uses:
+    search().list(...) and videos().list(...). Most videos pass the
+    embeddable/public/duration filters; a few are rejected, like real results.
+    Titles reuse words of the query that found the video, so related
+    lessons find each other's videos in the local video index.
+    """
+    def __init__(self, injector, results_per_search=50):
+        self.injector = injector
+        self.results_per_search = results_per_search
+        self.queries = {}   # video_id -> query words that returned it
+
+    def search(self):
+        return SimpleNamespace(list=self._search_list)
+
+    def videos(self):
+        return SimpleNamespace(list=self._videos_list)
+
+    def _search_list(self, q, maxResults=50, **kwargs):
+        rng = _rng_for(q)
+        count = min(maxResults, self.results_per_search)
+        ids = [synthetic_video_id(rng) for _ in range(count)]
+        words = [w for w in q.split() if w.lower() not in ("tutorial", "course")]
+        self.queries.update((video_id, words) for video_id in ids)
+        return _FakeRequest(self.injector, lambda: {"items": [{"id": {"videoId": video_id}} for video_id in ids]})
+
+    def _videos_list(self, id, part="", **kwargs):
+        return _FakeRequest(self.injector, lambda: {
+            "items": [self._video(video_id) for video_id in id.split(",") if video_id]
+        })
+
+    def _video(self, video_id):
+        rng = _rng_for(video_id)
+        return {
+            "id": video_id,
+            "status": {"embeddable": rng.random() > 0.05, "privacyStatus": "public" if rng.random() > 0.05 else "unlisted"},
+            "contentDetails": {"duration": f"PT{rng.randint(3, 55)}M{rng.randint(0, 59)}S"},
+            "snippet": {
+                "title": self._title(rng, video_id),
+                "description": " ".join(rng.choice(SAMPLE_WORDS) for _ in range(40)),
+                "channelTitle": _phrase(rng, 2),
+                "liveBroadcastContent": "none",
+            },
+        }
+
+
+    def _title(self, rng, video_id):
+        words = self.queries.get(video_id)
+        if not words:
+            return _phrase(rng, 5)
+        return " ".join(rng.sample(words, min(4, len(words))) + [_phrase(rng, 2)])
+
+
+@contextlib.contextmanager
+def fake_backends(gemini_injector, youtube_injector, lesson_words=650, throttle=False):
+    """
+    Routes every Gemini and YouTube call to the fakes for the duration of the
+    block. The Explain-or-Fail throttle (MIN_GEMINI_DELAY) is disabled unless
+    `throttle` is set, so benchmarks measure our code rather than the sleep.
+    """
+    from . import gemini, views
+
+    models = {}
+
+    def get_model(model_name, generation_config=None):
+        if model_name not in models:
+            models[model_name] = FakeGeminiModel(model_name, gemini_injector, lesson_words)
+        return models[model_name]
+
+    youtube = FakeYouTube(youtube_injector)
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.object(gemini, "get_model", get_model))
+        stack.enter_context(mock.patch.object(views, "_build_youtube_client", lambda: youtube))
+        stack.enter_context(mock.patch.object(views, "GEMINI_API_KEY", views.GEMINI_API_KEY or "fake"))
+        stack.enter_context(mock.patch.object(views, "YOUTUBE_API_KEY", views.YOUTUBE_API_KEY or "fake"))
+        if not throttle:
+            stack.enter_context(mock.patch.object(views, "MIN_GEMINI_DELAY", 0.0))
+        yield
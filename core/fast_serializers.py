@@ -0,0 +1,115 @@
+# core/fast_serializers.py
+"""
+Read-only fast path for the course structure.
+
+Builds exactly what CourseDetailSerializer / CourseListSerializer return, but
+from a handful of `.values()` queries grouped in one pass, instead of DRF
+field machinery per object. Only used for GET; writes go through the regular
+serializers. Keep the key order and value types in sync with serializers.py.
+"""
+from collections import defaultdict
+
+from django.db.models import Avg
+
+from .models import Lesson, Module, Question, Quiz, Review, UserProgress
+from .permissions import is_admin
+from .profiling import span
+from .serializers import VideoMetaSerializer
+
+COURSE_FIELDS = ("id", "title", "status", "created_by__username")
+VIDEO_FIELDS = tuple(f"video__{field}" for field in VideoMetaSerializer.Meta.fields)
+
+
+@span("serialize")
+def serialize_course_trees(course_rows, user, include_content=True):
+    """
+    `course_rows` are dicts from Course.objects.values(*COURSE_FIELDS), in the
+    order they should be returned. Returns a list of course dicts.
+    """
+    course_ids = [row["id"] for row in course_rows]
+    if not course_ids:
+        return []
+
+    ratings = {
+        row["course_id"]: row["avg"]
+        for row in Review.objects.filter(course_id__in=course_ids)
+        .values("course_id").annotate(avg=Avg("rating")).order_by()
+    }
+
+    modules_by_course = defaultdict(list)
+    for row in Module.objects.filter(course_id__in=course_ids).values(
+        "id", "course_id", "title", "order", "module_type", "prev_module_id"
+    ):
+        modules_by_course[row["course_id"]].append(row)
+
+    lesson_fields = ["id", "module_id", "title", "video_id", "order", *VIDEO_FIELDS]
+    if include_content:
+        lesson_fields.append("body__html")
+    lessons_by_module = defaultdict(list)
+    for row in Lesson.objects.filter(module__course_id__in=course_ids).values(*lesson_fields):
+        lesson = {"id": row["id"], "title": row["title"]}
+        if include_content:
+            lesson["content"] = row["body__html"] or ""
+        lesson["video_id"] = row["video_id"]
+        # title is NOT NULL, so None means there's no VideoMeta row
+        lesson["video"] = None if row["video__title"] is None else {
+            field: row[f"video__{field}"] for field in VideoMetaSerializer.Meta.fields
+        }
+        lesson["order"] = row["order"]
+        lessons_by_module[row["module_id"]].append(lesson)
+
+    quiz_by_module = {}
+    quiz_by_id = {}
+    for row in Quiz.objects.filter(module__course_id__in=course_ids).values("id", "module_id", "title"):
+        quiz = {"id": row["id"], "title": row["title"], "questions": []}
+        quiz_by_module[row["module_id"]] = quiz
+        quiz_by_id[row["id"]] = quiz
+    if quiz_by_id:
+        for row in Question.objects.filter(quiz_id__in=quiz_by_id).values(
+            "id", "quiz_id", "question_text", "options", "correct_answer", "order"
+        ):
+            quiz_by_id[row.pop("quiz_id")]["questions"].append(row)
+
+    authenticated = bool(user and user.is_authenticated)
+    admin = is_admin(user)
+    completed = set()
+    if authenticated:
+        completed = set(
+            UserProgress.objects.filter(
+                user_id=user.id, module__course_id__in=course_ids, is_completed=True
+            ).values_list("module_id", flat=True)
+        )
+
+    results = []
+    for row in course_rows:
+        avg = ratings.get(row["id"])
+        modules = []
+        for module in modules_by_course[row["id"]]:
+            modules.append({
+                "id": module["id"],
+                "title": module["title"],
+                "order": module["order"],
+                "module_type": module["module_type"],
+                "lessons": lessons_by_module.get(module["id"], []),
+                "quiz": quiz_by_module.get(module["id"]),
+                "is_locked": _is_locked(module, authenticated, admin, completed),
+                "is_completed": module["id"] in completed,
+            })
+        results.append({
+            "id": row["id"],
+            "title": row["title"],
+            "status": row["status"],
+            "creator_username": row["created_by__username"],
+            "average_rating": round(avg, 1) if avg else 0,
+            "modules": modules,
+        })
+    return results
+
+
+def _is_locked(module, authenticated, admin, completed):
+    """Mirrors ModuleSerializer.get_is_locked."""
+    if not authenticated:
+        return True
+    if admin or module["prev_module_id"] is None:
+        return False
+    return module["prev_module_id"] not in completed
@@ -0,0 +1,120 @@
+# core/fields.py
+import zlib
+
+from django.db import models
+
+# Every stored value starts with one header byte saying how it was encoded,
+# so rows written with an older dictionary stay readable after a new one ships.
+RAW = 0
+ZLIB = 1
+ZLIB_HTML_V1 = 2
+
+# Values shorter than this are stored raw; zlib's own overhead eats the gain.
+MIN_COMPRESS_LENGTH = 64
+COMPRESSION_LEVEL = 6
+
+# Preset dictionary for generated lesson HTML. zlib matches against it as if it
+# were text that came just before the value, which is what makes short lessons
+# compress well. Built from the tags and phrases the lesson prompts ask Gemini
+# for; the most frequent fragments go last (zlib prefers nearby matches).
+# Never edit in place: add ZLIB_HTML_V2 instead, old rows reference V1.
+HTML_ZDICT_V1 = (
+    "In this lesson, we will explore the fundamental concepts of "
+    "By the end of this lesson, you will be able to understand how "
+    "Let's take a closer look at a practical example. "
+    "This is important because it allows developers to "
+    "For example, consider the following code: "
+    "Key Takeaways Best Practices Common Mistakes to Avoid Summary Conclusion "
+    "Real-World Applications Deep Dive Introduction Examples Overview "
+    "performance, security, scalability, data, function, variable, model, "
+    "algorithm, system, process, value, method, class, object, list, "
+    "<pre><code class=\"language-python\">def </code></pre>\n"
+    "<pre><code>import </code></pre>\n"
+    "<table><thead><tr><th></th></tr></thead><tbody><tr><td></td></tr></tbody></table>\n"
+    "<ol>\n<li></li>\n</ol>\n"
+    "<h3></h3>\n"
+    "<em></em> <code></code> "
+    "<h2>Introduction</h2>\n<p>"
+    "<h2>Deep Dive</h2>\n<p>"
+    "<h2>Examples</h2>\n<p>"
+    "<h2>Conclusion</h2>\n<p>"
+    "<h2>Summary</h2>\n<p>"
+    "<ul>\n<li><strong></strong>: </li>\n</ul>\n"
+    " of the and to in is that for it with as on are this can be by you "
+    "</p>\n<h2></h2>\n<p></p>\n<ul>\n<li></li>\n<li><strong></strong> </li>\n</ul>\n<p>"
+).encode("utf-8")
+
+DICTIONARIES = {
+    ZLIB_HTML_V1: HTML_ZDICT_V1,
+}
+
+
+def compress_text(text, zdict_version=None):
+    """Encodes `text` into the header + payload format used by CompressedTextField."""
+    data = text.encode("utf-8")
+    if len(data) < MIN_COMPRESS_LENGTH:
+        return bytes([RAW]) + data
+
+    if zdict_version is None:
+        header, compressor = ZLIB, zlib.compressobj(COMPRESSION_LEVEL)
+    else:
+        header = zdict_version
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=DICTIONARIES[zdict_version])
+    payload = compressor.compress(data) + compressor.flush()
+
+    if len(payload) >= len(data):
+        return bytes([RAW]) + data
+    return bytes([header]) + payload
+
+
+def decompress_text(blob):
+    """Inverse of compress_text(). Accepts bytes or memoryview (psycopg2)."""
+    blob = bytes(blob)
+    if not blob:
+        return ""
+    header, payload = blob[0], blob[1:]
+    if header == RAW:
+        data = payload
+    elif header == ZLIB:
+        data = zlib.decompress(payload)
+    elif header in DICTIONARIES:
+        decompressor = zlib.decompressobj(zdict=DICTIONARIES[header])
+        data = decompressor.decompress(payload) + decompressor.flush()
+    else:
+        raise ValueError(f"Unknown compressed text header: {header}")
+    return data.decode("utf-8")
+
+
+class CompressedTextField(models.TextField):
+    """
+    A TextField stored as a zlib-compressed blob.
+
+    Behaves like a TextField in Python, forms and DRF serializers; the column
+    is binary (bytea / BLOB). Pass html_dictionary=True for columns holding
+    generated lesson HTML to compress against HTML_ZDICT_V1.
+    Not usable in lookups other than isnull.
+    """
+    def __init__(self, *args, html_dictionary=False, **kwargs):
+        self.html_dictionary = html_dictionary
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.html_dictionary:
+            kwargs["html_dictionary"] = True
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return "BinaryField"
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return decompress_text(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is None:
+            return value
+        blob = compress_text(value, ZLIB_HTML_V1 if self.html_dictionary else None)
+        return connection.Database.Binary(blob)
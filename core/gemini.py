@@ -0,0 +1,384 @@
+# core/gemini.py
+"""
+Gemini transport helpers: pooled model clients, per-call deadlines,
+request hedging and a per-pipeline time budget.
+
+genai.GenerativeModel objects are cheap to keep and safe to share between
+threads; the underlying GenerativeServiceClient (one gRPC channel, i.e. one
+long-lived HTTP/2 connection) is shared by all of them. Building a model per
+call throws that reuse away, so every AI helper goes through get_model().
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import google.generativeai as genai
+from django.core.exceptions import ImproperlyConfigured
+from google.api_core.exceptions import DeadlineExceeded, ResourceExhausted
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Per-call deadline (seconds). Also capped by whatever is left of the time budget.
+GEMINI_CALL_TIMEOUT = float(os.getenv("GEMINI_CALL_TIMEOUT", "60"))
+# Hedging: if a call is still running after the model's p95 latency, fire a
+# duplicate and take whichever answers first. Costs extra tokens on slow calls.
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "0") == "1"
+GEMINI_HEDGE_MIN_SAMPLES = 20      # below this we don't trust the p95
+LATENCY_WINDOW = 200               # recent successful calls kept per model
+
+# Model tiers. Small, structured calls (titles, grading) go to the fast model;
+# long-form lessons and quizzes go to the strong one. Each tier is the other's
+# fallback when its quota pool returns ResourceExhausted.
+GEMINI_STRONG_MODEL = os.getenv("GEMINI_STRONG_MODEL", os.getenv("GEMINI_MODEL", "gemini-2.5-flash"))
+GEMINI_FAST_MODEL = os.getenv("GEMINI_FAST_MODEL", "gemini-2.5-flash-lite")
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def _config_key(generation_config):
+    if not generation_config:
+        return None
+    return json.dumps(dict(generation_config), sort_keys=True, default=str)
+
+
+def get_model(model_name, generation_config=None):
+    """Returns the pooled GenerativeModel for (model_name, generation_config)."""
+    key = (model_name, _config_key(generation_config))
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(model_name, generation_config=generation_config)
+                _models[key] = model
+    return model
+
+
+def warmup(model_names, timeout=5.0):
+    """
+    Builds the pooled models and sends one count_tokens call (free, no
+    generation) on the shared generative client, so its gRPC channel is
+    connected before the first real request. Call it in each worker after
+    the fork (gunicorn.conf.py), never in a process that forks afterwards:
+    gRPC channels can't be shared across a fork. Never raises.
+    """
+    try:
+        models = [get_model(name) for name in model_names]
+        if models:
+            models[0].count_tokens("warmup", request_options={"timeout": timeout})
+        logger.info("Gemini clients warmed up: %s", ", ".join(model_names))
+    except Exception:
+        logger.exception("Gemini warmup failed; clients will be created on first use")
+
+
+def reset():
+    """Drops pooled models (e.g. after genai.configure() with a new key)."""
+    with _models_lock:
+        _models.clear()
+
+
+# ---------------------
+# Task routing
+# ---------------------
+
+class Route:
+    """Models to try, in order, for one kind of task, plus a concurrency cap."""
+    def __init__(self, task, models, max_concurrency):
+        override = os.getenv(f"GEMINI_ROUTE_{task.upper()}", "")
+        # A blank override (e.g. " , ") keeps the default models
+        models = [m.strip() for m in override.split(",") if m.strip()] or models
+        if not models:
+            raise ImproperlyConfigured(f"No Gemini models routed for '{task}'.")
+        self.task = task
+        # dict.fromkeys drops duplicates (e.g. both tiers set to the same model)
+        self.models = list(dict.fromkeys(models))
+        self.max_concurrency = int(os.getenv(f"GEMINI_ROUTE_{task.upper()}_CONCURRENCY", max_concurrency))
+        self.slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    def __repr__(self):
+        return f"Route({self.task!r}, {self.models}, max_concurrency={self.max_concurrency})"
+
+
+ROUTES = {route.task: route for route in (
+    Route("outline", [GEMINI_STRONG_MODEL, GEMINI_FAST_MODEL], 4),
+    Route("lesson_plan", [GEMINI_FAST_MODEL, GEMINI_STRONG_MODEL], 8),
+    Route("lesson", [GEMINI_STRONG_MODEL, GEMINI_FAST_MODEL], 4),
+    Route("lesson_fallback", [GEMINI_FAST_MODEL, GEMINI_STRONG_MODEL], 4),
+    Route("quiz", [GEMINI_STRONG_MODEL, GEMINI_FAST_MODEL], 4),
+    Route("grading", [GEMINI_FAST_MODEL, GEMINI_STRONG_MODEL], 8),
+)}
+
+
+def route_models():
+    """Every model some route can use (for warmup)."""
+    return list(dict.fromkeys(m for route in ROUTES.values() for m in route.models))
+
+
+def generate_for_task(task, prompt, timeout=None, hedge=None, caller="generate_for_task"):
+    """
+    Runs `prompt` on the models routed for `task`. Waits for a concurrency slot
+    (no longer than the call deadline), then moves on to the next model when
+    one answers ResourceExhausted. Re-raises the last ResourceExhausted if
+    every model is out of quota.
+    """
+    route = _acquire_slot(task, timeout)
+    try:
+        exhausted = None
+        for model_name in route.models:
+            try:
+                return generate(model_name, prompt, timeout=timeout, hedge=hedge, function=f"{caller}[{task}]")
+            except ResourceExhausted as e:
+                logger.warning("Gemini %s out of quota for '%s', trying next model: %s", model_name, task, e)
+                exhausted = e
+        raise exhausted
+    finally:
+        route.slots.release()
+
+
+def stream_for_task(task, prompt, timeout=None, caller="stream_for_task"):
+    """
+    Streaming generate_for_task(): yields text chunks as they arrive. Moves on
+    to the next model on ResourceExhausted only while nothing has been
+    yielded yet; the slot is held until the stream ends.
+    """
+    route = _acquire_slot(task, timeout)
+    try:
+        exhausted = None
+        for model_name in route.models:
+            started = False
+            try:
+                for text in generate_stream(model_name, prompt, timeout=timeout, function=f"{caller}[{task}]"):
+                    started = True
+                    yield text
+                return
+            except ResourceExhausted as e:
+                if started:
+                    raise
+                logger.warning("Gemini %s out of quota for '%s', trying next model: %s", model_name, task, e)
+                exhausted = e
+        raise exhausted
+    finally:
+        route.slots.release()
+
+
+def _acquire_slot(task, timeout):
+    """Takes a concurrency slot of the task's route, waiting no longer than the call deadline."""
+    route = ROUTES[task]
+    wait_for = timeout or GEMINI_CALL_TIMEOUT
+    remaining = remaining_budget()
+    if remaining is not None:
+        if remaining <= 0:
+            raise BudgetExhausted("Gemini time budget exhausted")
+        wait_for = min(wait_for, remaining)
+
+    if not route.slots.acquire(timeout=wait_for):
+        raise DeadlineExceeded(f"No free Gemini slot for '{task}' within {wait_for:.1f}s")
+    return route
+
+
+# ---------------------
+# Time budget
+# ---------------------
+
+class BudgetExhausted(Exception):
+    """Raised instead of calling Gemini once the pipeline's time budget is spent."""
+
+
+_budget_deadline = contextvars.ContextVar("gemini_budget_deadline", default=None)
+
+
+@contextlib.contextmanager
+def time_budget(seconds):
+    """
+    Bounds the total time Gemini calls may take inside the block (e.g. one
+    course generation). Nested budgets can only shrink the outer one.
+    """
+    deadline = time.monotonic() + seconds
+    outer = _budget_deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _budget_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _budget_deadline.reset(token)
+
+
+def remaining_budget():
+    """Seconds left in the current time budget, or None if there is none."""
+    deadline = _budget_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+# ---------------------
+# Latency tracking
+# ---------------------
+
+_latencies = {}
+_latencies_lock = threading.Lock()
+
+
+def record_latency(model_name, seconds):
+    with _latencies_lock:
+        _latencies.setdefault(model_name, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+
+def latency_p95(model_name):
+    """p95 of recent successful calls, or None if we have too few samples."""
+    with _latencies_lock:
+        samples = sorted(_latencies.get(model_name, ()))
+    if len(samples) < GEMINI_HEDGE_MIN_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+# ---------------------
+# Calls
+# ---------------------
+
+# A routed call holds a route slot and runs at most two calls here (primary
+# and hedge), hence two threads per slot. A loser still running keeps its
+# thread until its own deadline.
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=2 * sum(route.max_concurrency for route in ROUTES.values()), thread_name_prefix="gemini-hedge"
+)
+
+
+def generate(model_name, prompt, timeout=None, hedge=None, function="generate"):
+    """
+    model.generate_content(prompt) with a deadline, optionally hedged.
+    Raises BudgetExhausted if the time budget is already spent.
+    `function` is the label latency/failure metrics are recorded under.
+    """
+    timeout = _call_timeout(timeout)
+    model = get_model(model_name)
+
+    def _call():
+        start = time.monotonic()
+        try:
+            response = model.generate_content(prompt, request_options={"timeout": timeout})
+        except Exception as e:
+            metrics.record_call(function, model_name, time.monotonic() - start, e)
+            raise
+        elapsed = time.monotonic() - start
+        record_latency(model_name, elapsed)
+        metrics.record_call(function, model_name, elapsed)
+        metrics.record_usage(model_name, response)
+        return response
+
+    hedge_after = latency_p95(model_name) if (GEMINI_HEDGE if hedge is None else hedge) else None
+    if hedge_after is None or hedge_after >= timeout:
+        return _call()
+    return _hedged(_call, hedge_after, timeout, model_name)
+
+
+def generate_stream(model_name, prompt, timeout=None, function="generate_stream"):
+    """
+    Like generate(), but yields the response text chunk by chunk as Gemini
+    streams it. Never hedged: a second stream couldn't be spliced into the
+    text already handed out.
+    """
+    timeout = _call_timeout(timeout)
+    model = get_model(model_name)
+    start = time.monotonic()
+    first_chunk = True
+    try:
+        response = model.generate_content(prompt, stream=True, request_options={"timeout": timeout})
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:  # a chunk without parts, e.g. the final one
+                continue
+            if not text:
+                continue
+            if first_chunk:
+                first_chunk = False
+                metrics.observe("gemini_time_to_first_token_seconds", time.monotonic() - start,
+                                function=function, model=model_name)
+            yield text
+    except Exception as e:
+        metrics.record_call(function, model_name, time.monotonic() - start, e)
+        raise
+    elapsed = time.monotonic() - start
+    record_latency(model_name, elapsed)
+    metrics.record_call(function, model_name, elapsed)
+    metrics.record_usage(model_name, response)
+
+
+def _call_timeout(timeout):
+    """The per-call deadline, capped by the time budget. Raises BudgetExhausted if it is spent."""
+    timeout = timeout or GEMINI_CALL_TIMEOUT
+    remaining = remaining_budget()
+    if remaining is not None:
+        if remaining <= 0:
+            raise BudgetExhausted("Gemini time budget exhausted")
+        timeout = min(timeout, remaining)
+    return timeout
+
+
+def _hedged(call, hedge_after, timeout, model_name):
+    """
+    Runs `call` on the hedge pool and, if it hasn't answered after
+    `hedge_after` seconds, a duplicate next to it. Returns the first
+    successful answer within `timeout`; the other call finishes in the
+    background (a gRPC call can't be abandoned half way).
+    """
+    started = time.monotonic()
+    # Copy the context so calls on pool threads still count towards this
+    # request's metrics scope
+    futures = [_hedge_executor.submit(contextvars.copy_context().run, call)]
+    try:
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            logger.info("Gemini %s slower than p95 (%.1fs), sending hedge request", model_name, hedge_after)
+            metrics.inc("gemini_hedged_requests_total", model=model_name)
+            futures.append(_hedge_executor.submit(contextvars.copy_context().run, call))
+
+        pending = set(futures)
+        error = None
+        while pending:
+            left = timeout - (time.monotonic() - started)
+            if left <= 0:
+                break
+            done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        if error is not None:
+            raise error
+        raise DeadlineExceeded(f"Gemini call exceeded {timeout:.1f}s")
+    finally:
+        # Drops a call still queued for a thread; running ones can't be stopped
+        for future in futures:
+            future.cancel()
+
+
+_RETRY_IN_RE = re.compile(r"retry in ([0-9.]+)\s*s", re.IGNORECASE)
+
+
+def retry_delay_hint(exc):
+    """
+    Seconds the server asked us to wait (RetryInfo on a ResourceExhausted),
+    or None if it didn't say.
+    """
+    for detail in getattr(exc, "details", None) or ():
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and (delay.seconds or delay.nanos):
+            return delay.seconds + delay.nanos / 1e9
+    match = _RETRY_IN_RE.search(str(exc))
+    if match:
+        return float(match.group(1))
+    return None
@@ -0,0 +1,71 @@
+# core/lesson_drafts.py
+"""
+Live drafts of lessons being generated.
+
+A generation request that carries a `draft_id` streams each lesson from
+Gemini and writes the HTML received so far into a LessonDraft row, at most
+every FLUSH_INTERVAL seconds. Admins poll GET /api/generation-drafts/<id>/
+and see a lesson within the time to first token instead of after the whole
+course. The rows are throwaway: the course itself is still saved by the
+generation view at the end, and drafts older than RETENTION are purged
+when the next draft starts.
+"""
+import re
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import LessonDraft
+
+DRAFT_ID_RE = re.compile(r"^[\w-]{1,64}$")
+FLUSH_INTERVAL = 0.5        # seconds between writes of a streaming lesson
+RETENTION = timedelta(days=1)
+
+
+def valid_draft_id(value):
+    return isinstance(value, str) and bool(DRAFT_ID_RE.match(value))
+
+
+class DraftLesson:
+    """One lesson's row; update() is throttled, finish() always writes."""
+    def __init__(self, row):
+        self.row = row
+        self.flushed_at = None
+
+    def update(self, html, video_id=None):
+        if not html:
+            return
+        # The first text is written at once: that is the time to first token
+        now = time.monotonic()
+        if self.flushed_at is not None and now - self.flushed_at < FLUSH_INTERVAL:
+            return
+        self.flushed_at = now
+        self._write(html=html, video_id=video_id)
+
+    def finish(self, html, video_id):
+        self._write(html=html, video_id=video_id, status=LessonDraft.Status.DONE)
+
+    def _write(self, **fields):
+        # update() rather than save(): one narrow UPDATE per flush
+        LessonDraft.objects.filter(pk=self.row.pk).update(updated_at=timezone.now(), **fields)
+
+
+class Drafts:
+    """The drafts of one generation request."""
+    def __init__(self, draft_id, user):
+        self.draft_id = draft_id
+        self.user = user
+        LessonDraft.objects.filter(updated_at__lt=timezone.now() - RETENTION).delete()
+
+    def fail(self):
+        """Marks lessons still streaming as failed (the generation gave up)."""
+        LessonDraft.objects.filter(
+            draft_id=self.draft_id, created_by=self.user, status=LessonDraft.Status.STREAMING
+        ).update(status=LessonDraft.Status.FAILED, updated_at=timezone.now())
+
+    def lesson(self, module_title, title):
+        return DraftLesson(LessonDraft.objects.create(
+            draft_id=self.draft_id, created_by=self.user,
+            module_title=(module_title or "")[:200], title=(title or "")[:255],
+        ))
@@ -0,0 +1,199 @@
+# core/loadtest.py
+"""
+Read-heavy student traffic for `manage.py loadtest`.
+
+seed_loadtest_data() creates deterministic courses, students and progress in
+the configured database. run_load() then drives a running server over HTTP
+with asyncio virtual users: each logs in through /api/token/ and replays a
+weighted mix of course list, course detail, module detail and quiz
+submissions, like students browsing and taking tests.
+"""
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+
+import httpx
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import Module, Profile, UserProgress
+from .synthetic import create_synthetic_course
+
+USERNAME_PREFIX = "loadtest-"
+DEFAULT_MIX = {"course_list": 30, "course_detail": 35, "module_detail": 25, "quiz_submit": 10}
+
+
+# ---------------------
+# Fixture generator
+# ---------------------
+
+@transaction.atomic
+def seed_loadtest_data(num_students, num_courses, password, modules=6, lessons=5, questions=15, seed=0):
+    """
+    Replaces any previous load-test data. Every student gets progress on each
+    course up to a random module, so module detail returns a realistic mix of
+    unlocked (200) and locked (403) responses.
+    """
+    User.objects.filter(username__startswith=USERNAME_PREFIX).delete()  # cascades to their courses/progress
+    rng = random.Random(seed)
+    hashed = make_password(password)  # hashed once; bulk users share it
+
+    admin = User.objects.create(username=f"{USERNAME_PREFIX}admin", password=hashed)
+    Profile.objects.create(user=admin, role=Profile.Role.ADMIN)
+    students = User.objects.bulk_create([
+        User(username=f"{USERNAME_PREFIX}student-{i}", password=hashed) for i in range(num_students)
+    ])
+    Profile.objects.bulk_create([Profile(user=s, role=Profile.Role.STUDENT) for s in students])
+
+    courses = [
+        create_synthetic_course(admin, modules, lessons, questions, seed=seed + i) for i in range(num_courses)
+    ]
+    modules_by_course = defaultdict(list)
+    for module in Module.objects.filter(course__in=courses).order_by("order"):
+        modules_by_course[module.course_id].append(module)
+
+    progress = []
+    for student in students:
+        for course in courses:
+            for module in modules_by_course[course.id][:rng.randint(0, modules)]:
+                progress.append(UserProgress(user=student, course=course, module=module, is_completed=True))
+    UserProgress.objects.bulk_create(progress, batch_size=2000)
+    return [s.username for s in students], len(progress)
+
+
+# ---------------------
+# Driver
+# ---------------------
+
+class LoadStats:
+    def __init__(self):
+        self.timings = defaultdict(list)        # endpoint -> [seconds]
+        self.statuses = defaultdict(Counter)    # endpoint -> {status: count}
+        self.failures = Counter()               # endpoint -> transport errors
+
+    def record(self, endpoint, seconds, status):
+        self.timings[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+
+    def summary(self, wall):
+        endpoints = {}
+        for endpoint, values in sorted(self.timings.items()):
+            ordered = sorted(values)
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "statuses": {str(k): v for k, v in sorted(self.statuses[endpoint].items())},
+                "transport_errors": self.failures[endpoint],
+                "p50_ms": round(_percentile(ordered, 50) * 1000, 2),
+                "p95_ms": round(_percentile(ordered, 95) * 1000, 2),
+                "p99_ms": round(_percentile(ordered, 99) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+        total = sum(len(v) for v in self.timings.values())
+        return {"wall_s": round(wall, 2), "requests": total,
+                "throughput_rps": round(total / wall, 2) if wall else None, "endpoints": endpoints}
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+class VirtualUser:
+    def __init__(self, client, username, password, stats, rng, mix):
+        self.client = client
+        self.username = username
+        self.password = password
+        self.stats = stats
+        self.rng = rng
+        self.actions, self.weights = zip(*mix.items())
+        self.headers = {}
+        self.course_ids = []
+        self.courses = {}        # course id -> detail JSON
+
+    async def request(self, endpoint, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.stats.failures[endpoint] += 1
+            return None
+        self.stats.record(endpoint, time.perf_counter() - start, response.status_code)
+        return response
+
+    async def login(self):
+        response = await self.request("token", "POST", "/api/token/",
+                                      json={"username": self.username, "password": self.password})
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access']}"}
+        return True
+
+    async def course_list(self):
+        response = await self.request("course_list", "GET", "/api/courses/")
+        if response is not None and response.status_code == 200:
+            self.course_ids = [c["id"] for c in response.json()]
+
+    async def course_detail(self, course_id=None):
+        if not self.course_ids:
+            return await self.course_list()
+        course_id = course_id or self.rng.choice(self.course_ids)
+        response = await self.request("course_detail", "GET", f"/api/courses/{course_id}/")
+        if response is not None and response.status_code == 200:
+            self.courses[course_id] = response.json()
+
+    async def module_detail(self):
+        if not self.courses:
+            return await self.course_detail()
+        course = self.courses[self.rng.choice(list(self.courses))]
+        module = self.rng.choice(course["modules"])
+        await self.request("module_detail", "GET", f"/api/modules/{module['id']}/")
+
+    async def quiz_submit(self):
+        if not self.courses:
+            return await self.course_detail()
+        course = self.courses[self.rng.choice(list(self.courses))]
+        quizzes = [m for m in course["modules"] if m.get("quiz")]
+        if not quizzes:
+            return await self.course_detail()
+        module = self.rng.choice(quizzes)
+        # Roughly 75% of answers correct, so both pass and fail paths run
+        answers = {
+            str(q["id"]): q["correct_answer"] if self.rng.random() < 0.75 else self.rng.choice(q["options"])
+            for q in module["quiz"]["questions"]
+        }
+        await self.request("quiz_submit", "POST", f"/api/modules/{module['id']}/submit-quiz/", json={"answers": answers})
+
+    async def run(self, deadline):
+        if not await self.login():
+            return
+        await self.course_list()
+        while time.monotonic() < deadline:
+            action = self.rng.choices(self.actions, self.weights)[0]
+            await getattr(self, action)()
+
+
+async def _run(base_url, usernames, password, concurrency, duration, mix, seed, timeout):
+    stats = LoadStats()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        users = [
+            VirtualUser(client, usernames[i % len(usernames)], password, stats, random.Random(seed + i), mix)
+            for i in range(concurrency)
+        ]
+        started = time.perf_counter()
+        deadline = time.monotonic() + duration
+        await asyncio.gather(*(user.run(deadline) for user in users))
+        return stats.summary(time.perf_counter() - started)
+
+
+def run_load(base_url, usernames, password, concurrency=20, duration=30.0, mix=None, seed=0, timeout=30.0):
+    """Runs the scenario for `duration` seconds and returns per-endpoint latency stats."""
+    return asyncio.run(_run(base_url, usernames, password, concurrency, duration, mix or DEFAULT_MIX, seed, timeout))
+
+
+def loadtest_usernames():
+    return list(User.objects.filter(username__startswith=f"{USERNAME_PREFIX}student-")
+                .order_by("id").values_list("username", flat=True))
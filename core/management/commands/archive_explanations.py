@@ -0,0 +1,80 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from core.models import ExplanationAttempt, ExplanationAttemptArchive
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ("Moves old Explain-or-Fail attempts from ExplanationAttempt into ExplanationAttemptArchive "
+            "(text compressed together), one batch per transaction, oldest id first. Stays hot: attempts "
+            "newer than --older-than-days, passing attempts, and each user's latest attempt per lesson. "
+            "Archived attempts still answer a resubmitted transcript (the idempotency check falls back "
+            "to the archive). Safe to stop at any point: every batch is complete on its own.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=float, default=30,
+                            help="Only archive attempts created longer ago than this.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=0, help="Stop after this many batches (0: no limit).")
+        parser.add_argument("--continuous", action="store_true", help="Keep running passes.")
+        parser.add_argument("--interval", type=float, default=3600, help="Seconds between passes with --continuous.")
+        parser.add_argument("--dry-run", action="store_true", help="Count what would be archived, change nothing.")
+
+    def handle(self, *args, **options):
+        while True:
+            self._pass(options)
+            if not options["continuous"]:
+                break
+            time.sleep(options["interval"])
+
+    def _candidates(self, options):
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        newer = ExplanationAttempt.objects.filter(
+            user_id=OuterRef("user_id"), lesson_id=OuterRef("lesson_id"), created_at__gt=OuterRef("created_at")
+        )
+        return ExplanationAttempt.objects.filter(created_at__lt=cutoff, is_passed=False).filter(Exists(newer))
+
+    def _pass(self, options):
+        candidates = self._candidates(options)
+        if options["dry_run"]:
+            self.stdout.write(f"{candidates.count()} attempts would be archived")
+            return
+        started = time.perf_counter()
+        batch_size = max(1, options["batch_size"])
+        archived = batches = last_pk = 0
+        while not options["max_batches"] or batches < options["max_batches"]:
+            # Keyset pagination: each batch starts where the last one ended
+            ids = list(candidates.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            archived += self._archive(ids)
+            batches += 1
+            last_pk = ids[-1]
+        self.stdout.write(f"{archived} attempts archived in {batches} batches, {time.perf_counter() - started:.1f}s")
+
+    def _archive(self, ids):
+        with transaction.atomic():
+            attempts = list(ExplanationAttempt.objects.filter(pk__in=ids))
+            # ignore_conflicts: two runs at once may pick the same rows
+            ExplanationAttemptArchive.objects.bulk_create([
+                ExplanationAttemptArchive(
+                    attempt_id=attempt.pk, lesson_id=attempt.lesson_id, user_id=attempt.user_id,
+                    transcript_hash=attempt.transcript_hash, is_passed=attempt.is_passed,
+                    created_at=attempt.created_at,
+                    payload=json.dumps({
+                        "transcript": attempt.transcript,
+                        "feedback": attempt.feedback, "audio_file": attempt.audio_file.name or None,
+                    }, ensure_ascii=False),
+                )
+                for attempt in attempts
+            ], ignore_conflicts=True)
+            ExplanationAttempt.objects.filter(pk__in=[attempt.pk for attempt in attempts]).delete()
+        return len(attempts)
@@ -0,0 +1,61 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.fields import ZLIB_HTML_V1, compress_text, decompress_text
+from core.models import ExplanationAttempt, LessonContent
+from core.synthetic import synthetic_lesson_html
+
+
+class Command(BaseCommand):
+    help = "Measures CompressedTextField size savings and (de)compression throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--synthetic", type=int, default=0,
+                            help="Benchmark N synthetic lessons instead of the rows in the database.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["synthetic"]:
+            rng = random.Random(options["seed"])
+            samples = {"lesson html": [synthetic_lesson_html(rng) for _ in range(options["synthetic"])]}
+        else:
+            samples = {
+                "lesson html": list(LessonContent.objects.values_list("html", flat=True)),
+                "transcripts": list(ExplanationAttempt.objects.values_list("transcript", flat=True)),
+                "feedback": list(ExplanationAttempt.objects.values_list("feedback", flat=True)),
+            }
+
+        for label, texts in samples.items():
+            if not texts:
+                self.stdout.write(f"{label}: no rows")
+                continue
+            raw_bytes = sum(len(t.encode("utf-8")) for t in texts)
+            self.stdout.write(f"{label}: {len(texts)} rows, {raw_bytes / 1024:.1f} KiB raw")
+            for name, version in (("zlib", None), ("zlib+html dict", ZLIB_HTML_V1)):
+                start = time.perf_counter()
+                blobs = [compress_text(t, version) for t in texts]
+                compress_s = time.perf_counter() - start
+                start = time.perf_counter()
+                for b in blobs:
+                    decompress_text(b)
+                decompress_s = time.perf_counter() - start
+                stored = sum(len(b) for b in blobs)
+                self.stdout.write(
+                    f"  {name:<15} {stored / 1024:8.1f} KiB ({stored / raw_bytes:6.1%})  "
+                    f"compress {raw_bytes / compress_s / 1e6:7.1f} MB/s  "
+                    f"decompress {raw_bytes / decompress_s / 1e6:7.1f} MB/s"
+                )
+
+        if not options["synthetic"]:
+            start = time.perf_counter()
+            count = sum(1 for _ in LessonContent.objects.values_list("html", flat=True).iterator())
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"ORM read+decompress of {count} lesson bodies: {elapsed * 1000:.1f} ms")
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    for table in ("core_lessoncontent", "core_explanationattempt"):
+                        cursor.execute("SELECT pg_size_pretty(pg_total_relation_size(%s))", [table])
+                        self.stdout.write(f"{table}: {cursor.fetchone()[0]} on disk")
@@ -0,0 +1,68 @@
+import io
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Profile
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+from core.serializers import CourseDetailSerializer
+from core.synthetic import create_synthetic_course
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class Command(BaseCommand):
+    help = ("Compares DRF's JSONRenderer/JSONParser with the orjson-backed ones on a large "
+            "generated course. Runs inside a rolled-back transaction.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modules", type=int, default=6)
+        parser.add_argument("--lessons", type=int, default=5, help="Lessons per module.")
+        parser.add_argument("--questions", type=int, default=15)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; FastJSONRenderer will use the stdlib."))
+
+        with transaction.atomic():
+            user = User.objects.create_user("benchmark-json-admin")
+            Profile.objects.create(user=user, role=Profile.Role.ADMIN)
+            course = create_synthetic_course(
+                user, options["modules"], options["lessons"], options["questions"]
+            )
+            request = SimpleNamespace(user=user)
+            data = CourseDetailSerializer(course, context={"request": request}).data
+            transaction.set_rollback(True)
+
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        stock_bytes, fast_bytes = stock.render(data), fast.render(data)
+        if stock_bytes != fast_bytes:
+            self.stdout.write(self.style.ERROR("Renderers disagree: output is not byte-identical."))
+
+        repeat = options["repeat"]
+        render_stock = _best_of(lambda: stock.render(data), repeat)
+        render_fast = _best_of(lambda: fast.render(data), repeat)
+        parse_stock = _best_of(lambda: JSONParser().parse(io.BytesIO(stock_bytes)), repeat)
+        parse_fast = _best_of(lambda: FastJSONParser().parse(io.BytesIO(stock_bytes)), repeat)
+
+        self.stdout.write(f"payload: {len(stock_bytes) / 1024:.1f} KiB "
+                          f"({options['modules']} modules x {options['lessons']} lessons, {options['questions']} questions)")
+        self.stdout.write(f"render  stdlib {render_stock * 1000:7.3f} ms   orjson {render_fast * 1000:7.3f} ms   "
+                          f"x{render_stock / render_fast:.1f}")
+        self.stdout.write(f"parse   stdlib {parse_stock * 1000:7.3f} ms   orjson {parse_fast * 1000:7.3f} ms   "
+                          f"x{parse_stock / parse_fast:.1f}")
+
@@ -0,0 +1,71 @@
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.fast_serializers import COURSE_FIELDS, serialize_course_trees
+from core.models import Course, Profile, UserProgress
+from core.renderers import FastJSONRenderer
+from core.serializers import CourseDetailSerializer
+from core.synthetic import create_synthetic_course
+
+
+class Command(BaseCommand):
+    help = ("Compares CourseDetailSerializer (with prefetching) against the .values() fast path "
+            "on a generated course. Runs inside a rolled-back transaction.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modules", type=int, default=6)
+        parser.add_argument("--lessons", type=int, default=5, help="Lessons per module.")
+        parser.add_argument("--questions", type=int, default=15)
+        parser.add_argument("--repeat", type=int, default=30)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            admin = User.objects.create_user("benchmark-serializers-admin")
+            Profile.objects.create(user=admin, role=Profile.Role.ADMIN)
+            student = User.objects.create_user("benchmark-serializers-student")
+            Profile.objects.create(user=student, role=Profile.Role.STUDENT)
+            course = create_synthetic_course(admin, options["modules"], options["lessons"], options["questions"])
+            first = course.modules.get(order=1)
+            UserProgress.objects.create(user=student, course=course, module=first, is_completed=True)
+
+            for label, user in (("admin", admin), ("student", student)):
+                self._compare(label, course.pk, user, options["repeat"])
+
+            transaction.set_rollback(True)
+
+    def _compare(self, label, course_pk, user, repeat):
+        request = SimpleNamespace(user=user)
+        renderer = FastJSONRenderer()
+
+        def model_serializer():
+            course = Course.objects.prefetch_related(
+                "modules__lessons__body", "modules__lessons__video", "modules__quiz__questions"
+            ).get(pk=course_pk)
+            return CourseDetailSerializer(course, context={"request": request}).data
+
+        def fast_path():
+            row = Course.objects.values(*COURSE_FIELDS).get(pk=course_pk)
+            return serialize_course_trees([row], user)[0]
+
+        results = {}
+        for name, fn in (("ModelSerializer", model_serializer), ("values() fast path", fast_path)):
+            with CaptureQueriesContext(connection) as queries:
+                data = fn()
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - start)
+            results[name] = (best, len(queries), renderer.render(data))
+
+        (slow, slow_q, slow_json), (fast, fast_q, fast_json) = results.values()
+        same = "identical JSON" if slow_json == fast_json else "JSON DIFFERS"
+        self.stdout.write(
+            f"{label:<8} ModelSerializer {slow * 1000:7.2f} ms ({slow_q} queries)   "
+            f"fast path {fast * 1000:7.2f} ms ({fast_q} queries)   x{slow / fast:.1f}   {same}"
+        )
@@ -0,0 +1,227 @@
+import json
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core import metrics, video_index
+from core.fakes import FailureInjector, fake_backends
+from core.models import Lesson, Module, Profile, UserProgress
+from core.synthetic import create_synthetic_course
+
+SCENARIOS = ("course_list", "course_detail", "quiz_submit", "explain", "generate_module", "generate_course")
+# Each scenario needs at least one request, and the fixture a course with a module and a lesson
+POSITIVE_OPTIONS = ("iterations", "generations", "courses", "modules", "lessons")
+
+
+class Command(BaseCommand):
+    help = ("Drives the API end to end against fake Gemini/YouTube backends (fully offline) and "
+            "writes wall time, query counts and throughput per scenario as JSON. "
+            "Runs inside a rolled-back transaction.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                            help=f"Comma-separated subset of: {', '.join(SCENARIOS)}.")
+        parser.add_argument("--iterations", type=int, default=20, help="Requests per read/quiz/explain scenario.")
+        parser.add_argument("--generations", type=int, default=2, help="Requests per generation scenario.")
+        parser.add_argument("--courses", type=int, default=20, help="Seeded courses (list size).")
+        parser.add_argument("--modules", type=int, default=6)
+        parser.add_argument("--lessons", type=int, default=5, help="Lessons per module.")
+        parser.add_argument("--questions", type=int, default=15)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--gemini-latency", type=float, default=0.0, help="Seconds per fake Gemini call.")
+        parser.add_argument("--gemini-jitter", type=float, default=0.0, help="Extra uniform random latency, seconds.")
+        parser.add_argument("--gemini-error-rate", type=float, default=0.0, help="Share of calls failing with 503.")
+        parser.add_argument("--gemini-429-rate", type=float, default=0.0, help="Share of calls failing with 429.")
+        parser.add_argument("--youtube-latency", type=float, default=0.0)
+        parser.add_argument("--youtube-error-rate", type=float, default=0.0)
+        parser.add_argument("--drafts", action="store_true",
+                            help="Send a draft_id with generation requests, so lessons are streamed into drafts.")
+        parser.add_argument("--throttle", action="store_true",
+                            help="Keep the Explain-or-Fail MIN_GEMINI_DELAY sleep (off by default).")
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+
+    def handle(self, *args, **options):
+        scenarios = [s.strip() for s in options["scenarios"].split(",") if s.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        for name in POSITIVE_OPTIONS:
+            if options[name] < 1:
+                raise CommandError(f"--{name} must be at least 1.")
+
+        gemini_faults = FailureInjector(
+            options["seed"], options["gemini_latency"], options["gemini_jitter"],
+            options["gemini_error_rate"], options["gemini_429_rate"],
+        )
+        youtube_faults = FailureInjector(
+            options["seed"] + 1, options["youtube_latency"], 0.0, options["youtube_error_rate"],
+        )
+        # The test client's default host must be accepted
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        report = {
+            "commit": _git_commit(),
+            "timestamp": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "options": {k: v for k, v in options.items() if k not in ("verbosity", "settings", "pythonpath",
+                                                                      "traceback", "no_color", "force_color",
+                                                                      "skip_checks", "output", "stdout",
+                                                                      "stderr")},
+            "scenarios": {},
+        }
+        video_index.reset()  # it would otherwise keep videos from the rolled-back run
+        with fake_backends(gemini_faults, youtube_faults, throttle=options["throttle"]), transaction.atomic():
+            fixture = self._seed(options)
+            for name in scenarios:
+                metrics.reset()
+                calls_before = (gemini_faults.calls, youtube_faults.calls)
+                result = getattr(self, f"_run_{name}")(fixture, options)
+                result["gemini_calls"] = gemini_faults.calls - calls_before[0]
+                result["youtube_calls"] = youtube_faults.calls - calls_before[1]
+                report["scenarios"][name] = result
+                self.stderr.write(
+                    f"{name:<16} {result['requests']:4d} req  p50 {result['p50_ms']:9.2f} ms  "
+                    f"p95 {result['p95_ms']:9.2f} ms  {result['throughput_rps']:8.2f} req/s  "
+                    f"{result['queries_per_request']:7.1f} queries/req  errors {result['errors']}"
+                )
+            transaction.set_rollback(True)
+        video_index.reset()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    # ---------------------
+    # Fixture
+    # ---------------------
+
+    def _seed(self, options):
+        admin = User.objects.create_user("benchmark-suite-admin")
+        Profile.objects.create(user=admin, role=Profile.Role.ADMIN)
+        students = []
+        for i in range(options["iterations"]):
+            student = User.objects.create_user(f"benchmark-suite-student-{i}")
+            Profile.objects.create(user=student, role=Profile.Role.STUDENT)
+            students.append(student)
+
+        courses = [
+            create_synthetic_course(admin, options["modules"], options["lessons"], options["questions"],
+                                    seed=options["seed"] + i)
+            for i in range(options["courses"])
+        ]
+        course = courses[0]
+        first = course.modules.get(order=1)
+        for student in students:
+            UserProgress.objects.create(user=student, course=course, module=first, is_completed=True)
+        return {
+            "admin": admin,
+            "students": students,
+            "course": course,
+            "quiz_module": Module.objects.filter(course=course, quiz__isnull=False).first(),
+            "lesson": Lesson.objects.filter(module=first).first(),
+        }
+
+    # ---------------------
+    # Scenarios
+    # ---------------------
+
+    def _run_course_list(self, fixture, options):
+        return self._measure([
+            (_client(student), "get", "/api/courses/", None) for student in fixture["students"]
+        ])
+
+    def _run_course_detail(self, fixture, options):
+        url = f"/api/courses/{fixture['course'].pk}/"
+        return self._measure([(_client(student), "get", url, None) for student in fixture["students"]])
+
+    def _run_quiz_submit(self, fixture, options):
+        module = fixture["quiz_module"]
+        answers = {str(q.id): q.correct_answer for q in module.quiz.questions.all()}
+        url = f"/api/modules/{module.pk}/submit-quiz/"
+        return self._measure([
+            (_client(student), "post", url, {"answers": answers}) for student in fixture["students"]
+        ])
+
+    def _run_explain(self, fixture, options):
+        # One request per student: the endpoint has a per-user/lesson cooldown
+        url = f"/api/lessons/{fixture['lesson'].pk}/explain/"
+        return self._measure([
+            (_client(student), "post", url, {"transcript": f"Explanation number {i} of the lesson."})
+            for i, student in enumerate(fixture["students"])
+        ])
+
+    def _run_generate_module(self, fixture, options):
+        client = _client(fixture["admin"])
+        url = f"/api/courses/{fixture['course'].pk}/generate-module/"
+        body = {"prompt": "Benchmark module", "module_type": "CONTENT", "num_lessons": options["lessons"]}
+        if options["drafts"]:
+            body["draft_id"] = "benchmark-module"
+        return self._measure([(client, "post", url, body)] * options["generations"])
+
+    def _run_generate_course(self, fixture, options):
+        client = _client(fixture["admin"])
+        body = {
+            "prompt": "Benchmark course",
+            "num_content_modules": options["modules"],
+            "num_lessons_per_module": options["lessons"],
+            "num_test_modules": 1,
+        }
+        if options["drafts"]:
+            body["draft_id"] = "benchmark-course"
+        return self._measure([(client, "post", "/api/courses/generate/", body)] * options["generations"])
+
+    def _measure(self, requests):
+        timings, queries, errors = [], 0, 0
+        started = time.perf_counter()
+        for client, method, url, body in requests:
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = getattr(client, method)(url, body, format="json") if body is not None else getattr(client, method)(url)
+                timings.append(time.perf_counter() - start)
+            queries += len(captured)
+            if response.status_code >= 400:
+                errors += 1
+        wall = time.perf_counter() - started
+        return {
+            "requests": len(timings),
+            "errors": errors,
+            "wall_s": round(wall, 4),
+            "throughput_rps": round(len(timings) / wall, 2) if wall else None,
+            "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+            "p50_ms": round(_percentile(timings, 50) * 1000, 3),
+            "p95_ms": round(_percentile(timings, 95) * 1000, 3),
+            "max_ms": round(max(timings) * 1000, 3),
+            "queries_per_request": round(queries / len(timings), 2),
+        }
+
+
+def _client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    return client
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
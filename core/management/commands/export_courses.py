@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import course_archive
+from core.models import Course
+
+
+class Command(BaseCommand):
+    help = ("Writes courses (modules, lessons with their HTML, quizzes and video metadata) to an NDJSON "
+            "file, one course per line, a batch of courses at a time. Load it with import_courses.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Output file; *.gz is gzipped, - writes to stdout.")
+        parser.add_argument("--status", choices=Course.Status.values, help="Only courses with this status.")
+        parser.add_argument("--owner", help="Only courses created by this username.")
+        parser.add_argument("--course", type=int, action="append", dest="course_ids", metavar="ID",
+                            help="Only this course (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=course_archive.BATCH_SIZE,
+                            help="Courses read per round of queries.")
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options["status"]:
+            courses = courses.filter(status=options["status"])
+        if options["owner"]:
+            courses = courses.filter(created_by__username=options["owner"])
+        if options["course_ids"]:
+            courses = courses.filter(pk__in=options["course_ids"])
+
+        started = time.perf_counter()
+        with course_archive.open_archive(options["path"], "w") as stream:
+            count = course_archive.write_courses(stream, courses, max(1, options["batch_size"]))
+        if options["path"] != "-":
+            self.stdout.write(f"{count} courses written to {options['path']} in {time.perf_counter() - started:.1f}s")
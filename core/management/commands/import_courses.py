@@ -0,0 +1,63 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core import course_archive
+
+
+class Command(BaseCommand):
+    help = ("Loads courses written by export_courses, a batch of courses per transaction, with bulk "
+            "inserts. Courses are always created anew; owners are matched by username.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file; *.gz is gunzipped, - reads from stdin.")
+        parser.add_argument("--owner", help="Username that owns courses whose creator doesn't exist here "
+                                            "(they are skipped otherwise).")
+        parser.add_argument("--reassign", action="store_true", help="Give every course to --owner.")
+        parser.add_argument("--batch-size", type=int, default=course_archive.BATCH_SIZE,
+                            help="Courses per transaction.")
+
+    def handle(self, *args, **options):
+        fallback = None
+        if options["owner"]:
+            fallback = User.objects.filter(username=options["owner"]).values_list("id", flat=True).first()
+            if fallback is None:
+                raise CommandError(f"No user named {options['owner']!r}.")
+        elif options["reassign"]:
+            raise CommandError("--reassign needs --owner.")
+        self.owner_ids = {}
+        self.started = time.perf_counter()
+        imported = skipped = 0
+
+        batch, owners = [], []
+        try:
+            with course_archive.open_archive(options["path"], "r") as stream:
+                for number, tree in course_archive.read_courses(stream):
+                    owner = fallback if options["reassign"] else self._owner_id(tree.get("created_by")) or fallback
+                    if owner is None:
+                        self.stderr.write(f"Line {number}: skipped {tree.get('title')!r}, "
+                                          f"no user {tree.get('created_by')!r} (use --owner)")
+                        skipped += 1
+                        continue
+                    batch.append(tree)
+                    owners.append(owner)
+                    if len(batch) >= max(1, options["batch_size"]):
+                        imported += self._flush(batch, owners, imported)
+                        batch, owners = [], []
+                if batch:
+                    imported += self._flush(batch, owners, imported)
+        except course_archive.ArchiveError as e:
+            raise CommandError(f"{e} ({imported} courses were imported before it)") from None
+        self.stdout.write(f"{imported} courses imported, {skipped} skipped "
+                          f"in {time.perf_counter() - self.started:.1f}s")
+
+    def _owner_id(self, username):
+        if username not in self.owner_ids:
+            self.owner_ids[username] = User.objects.filter(username=username).values_list("id", flat=True).first()
+        return self.owner_ids[username]
+
+    def _flush(self, batch, owners, done):
+        course_archive.create_courses(batch, owners)
+        self.stdout.write(f"[{time.perf_counter() - self.started:7.2f}s] {done + len(batch)} courses")
+        return len(batch)
@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import DEFAULT_MIX, loadtest_usernames, run_load, seed_loadtest_data
+
+
+class Command(BaseCommand):
+    help = ("Replays read-heavy student traffic (course list/detail, module detail, quiz submission) "
+            "against a running server and reports p50/p95/p99 per endpoint. Use --seed-data first to "
+            "create load-test users and courses in the database the server uses.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--seed-data", action="store_true", help="(Re)create load-test data before running.")
+        parser.add_argument("--seed-only", action="store_true", help="Create load-test data and exit.")
+        parser.add_argument("--users", type=int, default=50, help="Students to seed.")
+        parser.add_argument("--courses", type=int, default=10, help="Courses to seed.")
+        parser.add_argument("--modules", type=int, default=6)
+        parser.add_argument("--lessons", type=int, default=5, help="Lessons per module.")
+        parser.add_argument("--questions", type=int, default=15)
+        parser.add_argument("--password", default="loadtest-password")
+        parser.add_argument("--concurrency", type=int, default=20, help="Virtual users.")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds.")
+        parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                            help="Relative weights, e.g. course_list=30,course_detail=35,module_detail=25,quiz_submit=10.")
+        parser.add_argument("--random-seed", type=int, default=0)
+        parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout, seconds.")
+        parser.add_argument("--output", help="Also write the JSON report here.")
+
+    def handle(self, *args, **options):
+        mix = self._parse_mix(options["mix"])
+
+        if options["seed_data"] or options["seed_only"]:
+            usernames, progress = seed_loadtest_data(
+                options["users"], options["courses"], options["password"],
+                options["modules"], options["lessons"], options["questions"], options["random_seed"],
+            )
+            self.stderr.write(f"Seeded {len(usernames)} students, {options['courses']} courses, {progress} progress rows.")
+            if options["seed_only"]:
+                return
+        usernames = loadtest_usernames()
+        if not usernames:
+            raise CommandError("No load-test users found; run with --seed-data first.")
+
+        report = run_load(
+            options["base_url"], usernames, options["password"], options["concurrency"],
+            options["duration"], mix, options["random_seed"], options["timeout"],
+        )
+        for endpoint, stats in report["endpoints"].items():
+            self.stderr.write(
+                f"{endpoint:<14} {stats['requests']:6d} req  p50 {stats['p50_ms']:8.2f} ms  "
+                f"p95 {stats['p95_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  statuses {stats['statuses']}"
+            )
+        self.stderr.write(f"total {report['requests']} requests in {report['wall_s']}s ({report['throughput_rps']} req/s)")
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
+
+    def _parse_mix(self, value):
+        mix = {}
+        for part in value.split(","):
+            name, _, weight = part.partition("=")
+            name = name.strip()
+            if name not in DEFAULT_MIX:
+                raise CommandError(f"Unknown endpoint in --mix: {name!r}")
+            try:
+                mix[name] = float(weight)
+            except ValueError:
+                raise CommandError(f"Bad weight in --mix: {part!r}")
+        if not any(mix.values()):
+            raise CommandError("--mix needs at least one positive weight")
+        return mix
@@ -0,0 +1,171 @@
+import logging
+import time
+from datetime import timedelta
+
+import httplib2
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+from googleapiclient.errors import HttpError
+
+from core import metrics, views, youtube_quota
+from core.models import Lesson, VideoMeta
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50            # videos.list accepts up to 50 ids per call
+UNITS_PER_CALL = youtube_quota.VIDEOS_LIST_COST
+# Failures of one videos.list call (API errors, timeouts, dropped connections)
+# that shouldn't end a pass: the batch is skipped and retried next pass
+FETCH_ERRORS = (HttpError, httplib2.HttpLib2Error, OSError)
+
+
+class Command(BaseCommand):
+    help = ("Re-checks lesson videos on YouTube in 50-id batches, least recently checked first, and "
+            "replaces dead ones with the lesson's next playable stored candidate (no new searches). "
+            "Draws on the shared daily quota ledger and yields to generation: a pass stops once today's "
+            "spending is ahead of pace. A batch YouTube fails to answer is skipped until the next pass. "
+            "Safe to stop at any point: progress lives in VideoMeta.checked_at.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quota", type=int, default=500, help="YouTube quota units to spend per pass.")
+        parser.add_argument("--max-age-hours", type=float, default=24 * 7,
+                            help="Only re-check videos last checked longer ago than this.")
+        parser.add_argument("--continuous", action="store_true", help="Keep running passes.")
+        parser.add_argument("--interval", type=float, default=600, help="Seconds between passes with --continuous.")
+        parser.add_argument("--dry-run", action="store_true", help="Check videos but don't change lessons.")
+
+    def handle(self, *args, **options):
+        self.youtube = views._build_youtube_client()
+        while True:
+            self._pass(options)
+            if not options["continuous"]:
+                break
+            time.sleep(options["interval"])
+
+    def _pass(self, options):
+        if youtube_quota.low_budget():
+            self.stdout.write("Skipped: today's YouTube quota is ahead of pace, leaving it to generation")
+            return
+        created = self._add_missing_meta()
+        self.failed = set()  # ids of batches YouTube failed to answer this pass
+        budget = options["quota"]
+        cutoff = timezone.now() - timedelta(hours=options["max_age_hours"])
+        checked = dead = swapped = 0
+
+        # Lessons still on a video found dead earlier (e.g. the last pass ran
+        # out of quota before checking their candidates)
+        known_dead = list(
+            VideoMeta.objects.filter(checked_at__isnull=False).exclude(privacy_status="public", embeddable=True)
+            .filter(Exists(Lesson.objects.filter(video_id=OuterRef("pk"))))
+            .values_list("pk", flat=True)
+        )
+        if known_dead:
+            spent, swapped = self._replace(known_dead, budget, cutoff, options["dry_run"])
+            budget -= spent
+
+        while budget >= UNITS_PER_CALL:
+            batch = list(
+                VideoMeta.objects.filter(Q(checked_at__isnull=True) | Q(checked_at__lt=cutoff))
+                .filter(Exists(Lesson.objects.filter(video_id=OuterRef("pk"))))
+                .exclude(pk__in=self.failed)
+                .order_by(F("checked_at").asc(nulls_first=True), "pk")
+                .values_list("pk", flat=True)[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            spent = self._check(batch)
+            if not spent:
+                break
+            budget -= spent
+            if batch[0] in self.failed:
+                continue
+            checked += len(batch)
+
+            dead_ids = list(VideoMeta.objects.filter(pk__in=batch).exclude(
+                privacy_status="public", embeddable=True).values_list("pk", flat=True))
+            dead += len(dead_ids)
+            if dead_ids:
+                spent, count = self._replace(dead_ids, budget, cutoff, options["dry_run"])
+                budget -= spent
+                swapped += count
+
+        self.stdout.write(
+            f"{created} new videos queued, {checked} checked, {dead} dead, {swapped} lessons switched "
+            f"to a stored candidate, {len(self.failed)} skipped after errors, "
+            f"{options['quota'] - budget} quota units used"
+        )
+
+    def _add_missing_meta(self):
+        """Lessons whose video has no VideoMeta yet get an unchecked row, so the scan picks them up."""
+        ids = set(
+            Lesson.objects.exclude(video_id__isnull=True).exclude(video_id="")
+            .filter(~Exists(VideoMeta.objects.filter(pk=OuterRef("video_id"))))
+            .values_list("video_id", flat=True)
+        )
+        VideoMeta.objects.bulk_create([VideoMeta(video_id=i) for i in ids], ignore_conflicts=True)
+        return len(ids)
+
+    @metrics.timed("revalidate_videos", "youtube")
+    def _fetch(self, ids):
+        return self.youtube.videos().list(part="snippet,contentDetails,status", id=",".join(ids)).execute()
+
+    def _check(self, ids):
+        """
+        One videos.list call for up to 50 ids; ids YouTube doesn't return are
+        marked missing. Returns units spent: 0, with no call made, when the
+        daily quota can't take it or spending is ahead of pace. If the call
+        fails, the ids go to self.failed and the units still count.
+        """
+        if youtube_quota.low_budget() or not youtube_quota.try_charge(UNITS_PER_CALL):
+            return 0
+        try:
+            response = self._fetch(ids)
+        except FETCH_ERRORS as e:
+            logger.warning("videos.list failed for the batch starting at %s, skipping it: %s", ids[0], e)
+            self.failed.update(ids)
+            return UNITS_PER_CALL
+        items = response.get("items", [])
+        views.store_video_meta(items)
+        missing = set(ids) - {item["id"] for item in items}
+        if missing:
+            VideoMeta.objects.filter(pk__in=missing).update(
+                privacy_status=VideoMeta.MISSING, embeddable=False, checked_at=timezone.now()
+            )
+        return UNITS_PER_CALL
+
+    def _replace(self, dead_ids, budget, cutoff, dry_run):
+        """
+        Points lessons using a dead video at their first playable stored
+        candidate. Stale candidates are re-checked first (still 50 per call).
+        Returns (units spent, lessons changed).
+        """
+        lessons = list(Lesson.objects.filter(video_id__in=dead_ids).only("id", "video_id", "video_candidates"))
+        wanted = {c for lesson in lessons for c in lesson.video_candidates if c not in dead_ids}
+        VideoMeta.objects.bulk_create([VideoMeta(video_id=i) for i in wanted], ignore_conflicts=True)
+
+        spent = 0
+        stale = list(VideoMeta.objects.filter(pk__in=wanted).filter(
+            Q(checked_at__isnull=True) | Q(checked_at__lt=cutoff)).values_list("pk", flat=True))
+        for i in range(0, len(stale), BATCH_SIZE):
+            if budget - spent < UNITS_PER_CALL:
+                break
+            units = self._check(stale[i:i + BATCH_SIZE])
+            if not units:
+                break
+            spent += units
+
+        playable = set(VideoMeta.objects.filter(
+            pk__in=wanted, privacy_status="public", embeddable=True, checked_at__gte=cutoff
+        ).values_list("pk", flat=True))
+        changed = []
+        for lesson in lessons:
+            replacement = next((c for c in lesson.video_candidates if c in playable), None)
+            if replacement:
+                lesson.video_id = replacement
+                changed.append(lesson)
+        if changed and not dry_run:
+            with transaction.atomic():
+                Lesson.objects.bulk_update(changed, ["video"])
+        return spent, len(changed)
@@ -0,0 +1,214 @@
+import hashlib
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import ordering
+from core.fields import ZLIB_HTML_V1, compress_text
+from core.models import (
+    Course, ExplanationAttempt, Lesson, LessonContent, Module, Profile, Question, Quiz, Review, UserProgress,
+)
+from core.synthetic import SAMPLE_WORDS, synthetic_lesson_html, synthetic_question, synthetic_video_id
+
+BATCH_SIZE = 1000
+COUNT_OPTIONS = ("users", "courses", "modules", "lessons", "questions", "reviews", "enrollments", "attempts")
+
+
+class Command(BaseCommand):
+    help = ("Bulk-creates a large deterministic dataset (users, courses, modules, lessons with realistic "
+            "HTML, quizzes, reviews, progress and explanation attempts) for scaling tests.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--courses", type=int, default=1000)
+        parser.add_argument("--modules", type=int, default=6, help="Content modules per course (plus one assessment).")
+        parser.add_argument("--lessons", type=int, default=5, help="Lessons per content module.")
+        parser.add_argument("--questions", type=int, default=10, help="Questions per course quiz.")
+        parser.add_argument("--reviews", type=int, default=5, help="Reviews per course.")
+        parser.add_argument("--enrollments", type=int, default=3, help="Courses each student has progress in.")
+        parser.add_argument("--attempts", type=int, default=20000, help="Explain-or-Fail attempts in total.")
+        parser.add_argument("--lesson-words", type=int, default=650)
+        parser.add_argument("--html-variants", type=int, default=200,
+                            help="Distinct lesson bodies generated and reused (keeps seeding fast).")
+        parser.add_argument("--days", type=int, default=180, help="Spread created_at over this many past days.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="scale-", help="Username prefix of seeded users.")
+        parser.add_argument("--password", default="scale-password")
+        parser.add_argument("--reset", action="store_true",
+                            help="Delete users with --prefix (and everything they own) first.")
+
+    def handle(self, *args, **options):
+        for name in COUNT_OPTIONS:
+            if options[name] < 0:
+                raise CommandError(f"--{name} can't be negative.")
+        if options["users"] < 1:
+            raise CommandError("--users must be at least 1 (courses need an admin to own them).")
+        self.rng = random.Random(options["seed"])
+        self.started = time.perf_counter()
+        with transaction.atomic():
+            if options["reset"]:
+                deleted, _ = User.objects.filter(username__startswith=options["prefix"]).delete()
+                self._step(f"deleted {deleted} rows from a previous run")
+            admins, students = self._users(options)
+            courses = self._courses(options, admins)
+            content_modules, assessments = self._modules(options, courses)
+            lessons_by_course = self._lessons(options, content_modules)
+            self._quizzes(options, assessments)
+            self._reviews(options, courses, students)
+            self._progress(options, courses, content_modules, students)
+            self._attempts(options, courses, lessons_by_course, students)
+        self._step("done")
+
+    def _step(self, message):
+        self.stdout.write(f"[{time.perf_counter() - self.started:7.2f}s] {message}")
+
+    def _users(self, options):
+        prefix, n = options["prefix"], options["users"]
+        hashed = make_password(options["password"])  # hashed once; every seeded user shares it
+        users = User.objects.bulk_create(
+            [User(username=f"{prefix}user-{i}", password=hashed) for i in range(n)], batch_size=BATCH_SIZE
+        )
+        num_admins = max(1, n // 50)
+        Profile.objects.bulk_create([
+            Profile(user=u, role=Profile.Role.ADMIN if i < num_admins else Profile.Role.STUDENT)
+            for i, u in enumerate(users)
+        ], batch_size=BATCH_SIZE)
+        self._step(f"{n} users ({num_admins} admins)")
+        return users[:num_admins], users[num_admins:] or users
+
+    def _courses(self, options, admins):
+        rng = self.rng
+        courses = Course.objects.bulk_create([
+            Course(
+                title=" ".join(rng.choice(SAMPLE_WORDS) for _ in range(4)).title() + f" {i}",
+                created_by=rng.choice(admins),
+                status=Course.Status.PUBLISHED if rng.random() < 0.8 else Course.Status.DRAFT,
+            )
+            for i in range(options["courses"])
+        ], batch_size=BATCH_SIZE)
+        self._spread_created_at(Course, [c.pk for c in courses], options["days"])
+        self._step(f"{len(courses)} courses")
+        return courses
+
+    def _modules(self, options, courses):
+        per_course = options["modules"]
+        modules = Module.objects.bulk_create([
+            Module(
+                course=course,
+                title=f"Module {i + 1}" if i < per_course else "Final Test",
+                order=i + 1,
+                module_type=Module.ModuleType.CONTENT if i < per_course else Module.ModuleType.ASSESSMENT,
+            )
+            for course in courses for i in range(per_course + 1)
+        ], batch_size=BATCH_SIZE)
+        ordering.link(modules, batch_size=BATCH_SIZE)
+        content = [m for m in modules if m.module_type == Module.ModuleType.CONTENT]
+        assessments = [m for m in modules if m.module_type == Module.ModuleType.ASSESSMENT]
+        self._step(f"{len(modules)} modules")
+        return content, assessments
+
+    def _lessons(self, options, content_modules):
+        rng = self.rng
+        variants = [
+            synthetic_lesson_html(random.Random(options["seed"] * 100003 + v), options["lesson_words"])
+            for v in range(max(1, options["html_variants"]))
+        ]
+        lessons = Lesson.objects.bulk_create([
+            Lesson(module=module, title=f"{module.title} - Lesson {j + 1}", order=j + 1,
+                   video_id=synthetic_video_id(rng))
+            for module in content_modules for j in range(options["lessons"])
+        ], batch_size=BATCH_SIZE)
+        # Bodies are compressed once per variant and inserted directly, instead of
+        # CompressedTextField compressing the same HTML again for every row
+        field = LessonContent._meta.get_field("html")
+        blobs = [connection.Database.Binary(compress_text(html, ZLIB_HTML_V1)) for html in variants]
+        qn = connection.ops.quote_name
+        sql = (f"INSERT INTO {qn(LessonContent._meta.db_table)} "
+               f"({qn(LessonContent._meta.pk.column)}, {qn(field.column)}) VALUES (%s, %s)")
+        with connection.cursor() as cursor:
+            rows = [(lesson.pk, rng.choice(blobs)) for lesson in lessons]
+            for i in range(0, len(rows), BATCH_SIZE):
+                cursor.executemany(sql, rows[i:i + BATCH_SIZE])
+        lessons_by_course = defaultdict(list)
+        course_of_module = {m.pk: m.course_id for m in content_modules}
+        for lesson in lessons:
+            lessons_by_course[course_of_module[lesson.module_id]].append(lesson)
+        self._step(f"{len(lessons)} lessons")
+        return lessons_by_course
+
+    def _quizzes(self, options, assessments):
+        quizzes = Quiz.objects.bulk_create(
+            [Quiz(module=module, title=module.title) for module in assessments], batch_size=BATCH_SIZE
+        )
+        questions = Question.objects.bulk_create([
+            Question(quiz=quiz, **synthetic_question(self.rng, k + 1))
+            for quiz in quizzes for k in range(options["questions"])
+        ], batch_size=BATCH_SIZE)
+        self._step(f"{len(quizzes)} quizzes, {len(questions)} questions")
+
+    def _reviews(self, options, courses, students):
+        rng = self.rng
+        per_course = min(options["reviews"], len(students))
+        reviews = Review.objects.bulk_create([
+            Review(course=course, user=user, rating=rng.choices((1, 2, 3, 4, 5), (1, 1, 3, 6, 5))[0],
+                   comment=" ".join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(5, 40))))
+            for course in courses for user in rng.sample(students, per_course)
+        ], batch_size=BATCH_SIZE)
+        self._spread_created_at(Review, [r.pk for r in reviews], options["days"])
+        self._step(f"{len(reviews)} reviews")
+
+    def _progress(self, options, courses, content_modules, students):
+        rng = self.rng
+        modules_by_course = defaultdict(list)
+        for module in content_modules:
+            modules_by_course[module.course_id].append(module)
+        now = timezone.now()
+        rows = []
+        for user in students:
+            for course in rng.sample(courses, min(options["enrollments"], len(courses))):
+                modules = modules_by_course[course.pk]
+                for module in modules[:rng.randint(1, len(modules))] if modules else ():
+                    rows.append(UserProgress(user=user, course=course, module=module, is_completed=True,
+                                             completed_at=now - timedelta(days=rng.randint(0, options["days"]))))
+        UserProgress.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        self._step(f"{len(rows)} progress rows")
+
+    def _attempts(self, options, courses, lessons_by_course, students):
+        rng = self.rng
+        # --courses/--modules/--lessons 0 leave nothing to explain
+        courses = [course for course in courses if lessons_by_course[course.pk]]
+        if not courses:
+            self._step("no lessons, skipped explanation attempts")
+            return
+        rows = []
+        for _ in range(options["attempts"]):
+            lesson = rng.choice(lessons_by_course[rng.choice(courses).pk])
+            transcript = " ".join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(30, 150)))
+            rows.append(ExplanationAttempt(
+                user=rng.choice(students), lesson=lesson, transcript=transcript,
+                transcript_hash=hashlib.sha256(transcript.encode()).hexdigest(),
+                feedback="Clear explanation of the core idea." if rng.random() < 0.6 else "Too vague; define the key terms.",
+                is_passed=rng.random() < 0.6,
+            ))
+        attempts = ExplanationAttempt.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        self._spread_created_at(ExplanationAttempt, [a.pk for a in attempts], options["days"])
+        self._step(f"{len(attempts)} explanation attempts")
+
+    def _spread_created_at(self, model, pks, days):
+        """auto_now_add stamps every bulk row with now; move them back over `days`, one UPDATE per day."""
+        if days <= 0:
+            return
+        by_day = defaultdict(list)
+        for pk in pks:
+            by_day[self.rng.randint(0, days)].append(pk)
+        now = timezone.now()
+        for day, day_pks in sorted(by_day.items()):
+            for i in range(0, len(day_pks), BATCH_SIZE):
+                model.objects.filter(pk__in=day_pks[i:i + BATCH_SIZE]).update(created_at=now - timedelta(days=day))
@@ -0,0 +1,203 @@
+# core/metrics.py
+"""
+In-process metrics for upstream calls (Gemini, YouTube), exposed in the
+Prometheus text format by MetricsAPIView (/api/metrics/).
+
+Counters live in this process only; with several gunicorn workers each one
+reports its own numbers (scrape them per worker or sum them).
+"""
+import contextlib
+import contextvars
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, float("inf"))
+
+_lock = threading.Lock()
+_counters = defaultdict(float)      # (name, labels) -> value
+_histograms = {}                    # (name, labels) -> [bucket counts..., sum, count]
+
+HELP = {
+    "upstream_call_duration_seconds": ("histogram", "Latency of upstream calls by function and model."),
+    "upstream_call_failures_total": ("counter", "Upstream calls that raised, by function, model and error."),
+    "upstream_retries_total": ("counter", "Retries issued by _retry_with_backoff, by function."),
+    "upstream_cache_hits_total": ("counter", "Upstream calls avoided by a cache, by function."),
+    "gemini_tokens_total": ("counter", "Gemini tokens from usage metadata, by model and kind."),
+    "gemini_hedged_requests_total": ("counter", "Duplicate requests sent because a call passed its p95."),
+    "gemini_time_to_first_token_seconds": ("histogram", "Time until a streamed Gemini call yields text."),
+    "course_generation_duration_seconds": ("histogram", "Wall time of whole generation requests, by kind."),
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    with _lock:
+        _counters[_key(name, labels)] += value
+    scope = _generation_scope.get()
+    if scope is not None:
+        scope.count(name, value, labels)
+
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+        hist[-2] += seconds
+        hist[-1] += 1
+    scope = _generation_scope.get()
+    if scope is not None and name == "upstream_call_duration_seconds":
+        scope.call(labels, seconds)
+
+
+def record_call(function, model, seconds, error=None):
+    observe("upstream_call_duration_seconds", seconds, function=function, model=model)
+    if error is not None:
+        inc("upstream_call_failures_total", function=function, model=model, error=type(error).__name__)
+
+
+def record_usage(model, response):
+    """Adds token counts from a Gemini response's usage_metadata, if present."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for kind, attr in (("prompt", "prompt_token_count"), ("output", "candidates_token_count")):
+        count = getattr(usage, attr, 0) or 0
+        if count:
+            inc("gemini_tokens_total", count, model=model, kind=kind)
+
+
+def timed(function, model):
+    """Decorator: records the wrapped function's latency (and exceptions it lets through)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                record_call(function, model, time.monotonic() - start, e)
+                raise
+            record_call(function, model, time.monotonic() - start)
+            return result
+        return wrapper
+    return decorator
+
+
+# ---------------------
+# Per-generation aggregation
+# ---------------------
+
+class _GenerationScope:
+    def __init__(self, kind):
+        self.kind = kind
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.calls = defaultdict(lambda: [0, 0.0])   # function/model -> [count, seconds]
+        self.counters = defaultdict(float)           # name/labels -> value
+
+    def call(self, labels, seconds):
+        with self.lock:
+            entry = self.calls[f"{labels['function']}/{labels['model']}"]
+            entry[0] += 1
+            entry[1] += seconds
+
+    def count(self, name, value, labels):
+        label_str = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+        with self.lock:
+            self.counters[f"{name}{{{label_str}}}"] += value
+
+    def summary(self):
+        return {
+            "kind": self.kind,
+            "seconds": round(time.monotonic() - self.started, 3),
+            "calls": {k: {"count": c, "seconds": round(s, 3)} for k, (c, s) in sorted(self.calls.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+
+_generation_scope = contextvars.ContextVar("metrics_generation_scope", default=None)
+
+
+@contextlib.contextmanager
+def generation_scope(kind):
+    """
+    Aggregates every upstream call made inside the block (one course or module
+    generation) and logs a one-line summary at the end. Usable as a decorator.
+    """
+    scope = _GenerationScope(kind)
+    token = _generation_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _generation_scope.reset(token)
+        summary = scope.summary()
+        observe("course_generation_duration_seconds", summary["seconds"], kind=kind)
+        logger.info("Generation metrics: %s", summary)
+
+
+# ---------------------
+# Exposition
+# ---------------------
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_prometheus():
+    """Current metrics in the Prometheus text exposition format (0.0.4)."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+
+    by_name = defaultdict(list)
+    for (name, labels), value in counters.items():
+        by_name[name].append((labels, value))
+    for (name, labels), hist in histograms.items():
+        by_name[name].append((labels, hist))
+
+    lines = []
+    for name in sorted(by_name):
+        kind, help_text = HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(by_name[name]):
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            for bound, count in zip(LATENCY_BUCKETS, value):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
@@ -0,0 +1,193 @@
+# core/middleware.py
+import gzip
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+from .permissions import is_admin
+from .profiling import current_profile, profile_request
+
+logger = logging.getLogger(__name__)
+
+# Reported by RequestProfilerMiddleware for every profiled request
+PROFILED_PHASES = ("view", "serialize", "render")
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, we fall back to gzip
+    brotli = None
+
+
+def _accepted_encodings(header):
+    """Parses Accept-Encoding into {coding: q}, dropping anything with q=0."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = _accepted_encodings(header or "")
+    candidates = ["br", "gzip"] if brotli else ["gzip"]
+    best = None
+    for coding in candidates:  # ties go to the first (smaller output) candidate
+        q = accepted.get(coding, accepted.get("*", 0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (coding, q)
+    return best[0] if best else None
+
+
+def compress_body(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.API_COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 keeps output deterministic, so cached variants are stable
+    return gzip.compress(body, compresslevel=settings.API_COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class APICompressionMiddleware:
+    """
+    Compresses API responses with brotli or gzip, depending on Accept-Encoding.
+
+    - Only paths under API_COMPRESSION_PATH_PREFIXES (WhiteNoise already
+      handles static files).
+    - Bodies smaller than API_COMPRESSION_MIN_SIZE are left alone.
+    - Compressed variants are cached by body digest + encoding in the
+      API_COMPRESSION_CACHE alias (its own size-capped store, apart from auth
+      state), so an unchanged payload served to many users is compressed
+      once. Most bodies are per-user, so the cache is kept small.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        alias = settings.API_COMPRESSION_CACHE
+        self.cache = caches[alias] if alias else None
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if not request.path.startswith(tuple(settings.API_COMPRESSION_PATH_PREFIXES)):
+            return response
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+
+        # Varies on Accept-Encoding even when we decide not to compress this one
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if len(response.content) < settings.API_COMPRESSION_MIN_SIZE:
+            return response
+
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING"))
+        if encoding is None:
+            return response
+
+        body = response.content
+        compressed = self._compress(body, encoding)
+
+        if len(compressed) >= len(body):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        if response.has_header("ETag"):
+            # Strong ETags must differ between encodings (RFC 9110 8.8.3)
+            response["ETag"] = response["ETag"].rstrip('"') + f'-{encoding}"'
+        return response
+
+    def _compress(self, body, encoding):
+        if self.cache is None:
+            return compress_body(body, encoding)
+        key = f"api-compressed:{encoding}:{hashlib.blake2b(body, digest_size=20).hexdigest()}"
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = compress_body(body, encoding)
+            self.cache.set(key, compressed, settings.API_COMPRESSION_CACHE_TTL)
+        return compressed
+
+
+class RequestProfilerMiddleware:
+    """
+    Records DB query count/time, repeated query shapes (N+1 candidates),
+    the time in the view (serialize and db included), in serializers and in
+    the renderer, plus any other profiling spans and the total, and reports
+    them as a `Server-Timing` header plus one "Request profile" log line.
+
+    Runs for every request when REQUEST_PROFILER_ENABLED is set, or for a
+    single request sent with the REQUEST_PROFILER_HEADER header; in that case
+    the results are only attached for admins. When neither applies the
+    request passes straight through.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.REQUEST_PROFILER_ENABLED
+        self.header = "HTTP_" + settings.REQUEST_PROFILER_HEADER.upper().replace("-", "_")
+
+    def __call__(self, request):
+        if not self.enabled and self.header not in request.META:
+            return self.get_response(request)
+
+        with profile_request() as profile:
+            response = self.get_response(request)
+            profile.end("view")  # not a template response: the view ended with get_response
+            total = time.perf_counter() - profile.started
+
+        # request.user is set by DRF during authentication, so this runs after the view
+        if not self.enabled and not is_admin(getattr(request, "user", None)):
+            return response
+
+        repeated = profile.repeated_queries()
+        # The phases are always listed (0 if they didn't run), other spans after them
+        names = [*PROFILED_PHASES, *sorted(set(profile.spans) - set(PROFILED_PHASES))]
+        spans = {name: profile.spans[name] for name in names}
+        timings = [
+            ("db", profile.db_time, f"{len(profile.queries)} queries"),
+            *((name, seconds, f"{calls}x, {queries} queries") for name, (seconds, calls, queries) in spans.items()),
+            ("total", total, None),
+        ]
+        response["Server-Timing"] = ", ".join(
+            f'{name};dur={seconds * 1000:.2f}' + (f';desc="{desc}"' if desc else "")
+            for name, seconds, desc in timings
+        )
+        if repeated:
+            response["X-Repeated-Queries"] = ", ".join(f"{r['fingerprint']}x{r['count']}" for r in repeated)
+
+        logger.info("Request profile: %s", json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "queries": len(profile.queries),
+            "db_ms": round(profile.db_time * 1000, 2),
+            "spans": {name: {"ms": round(seconds * 1000, 2), "calls": calls, "queries": queries}
+                      for name, (seconds, calls, queries) in spans.items()},
+            "repeated_queries": repeated,
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = current_profile()
+        if profile is not None:
+            profile.begin("view")
+
+    def process_template_response(self, request, response):
+        # DRF responses come through here right after the view, before rendering
+        profile = current_profile()
+        if profile is not None:
+            profile.end("view")
+        return response
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_content_out(apps, schema_editor):
+    Lesson = apps.get_model('core', 'Lesson')
+    LessonContent = apps.get_model('core', 'LessonContent')
+    batch = []
+    for lesson_id, content in Lesson.objects.values_list('id', 'content').iterator(chunk_size=500):
+        batch.append(LessonContent(lesson_id=lesson_id, html=content))
+        if len(batch) >= 500:
+            LessonContent.objects.bulk_create(batch)
+            batch = []
+    LessonContent.objects.bulk_create(batch)
+
+
+def copy_content_back(apps, schema_editor):
+    Lesson = apps.get_model('core', 'Lesson')
+    LessonContent = apps.get_model('core', 'LessonContent')
+    for body in LessonContent.objects.iterator(chunk_size=500):
+        Lesson.objects.filter(pk=body.lesson_id).update(content=body.html)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_explanationattempt_transcript_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonContent',
+            fields=[
+                ('lesson', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='body', serialize=False, to='core.lesson')),
+                ('html', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(copy_content_out, copy_content_back),
+        migrations.AlterField(
+            model_name='lesson',
+            name='content',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='lesson',
+            name='content',
+        ),
+    ]
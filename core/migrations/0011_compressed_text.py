@@ -0,0 +1,115 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:34
+
+import core.fields
+from django.db import migrations, models
+
+# (model, text field) pairs moving to CompressedTextField. Each gets a
+# temporary "<field>_z" column, filled in batches, then swapped in.
+COMPRESSED_FIELDS = [
+    ('lessoncontent', 'html'),
+    ('explanationattempt', 'transcript'),
+    ('explanationattempt', 'feedback'),
+]
+BATCH_SIZE = 500
+
+
+def _copy(apps, src_suffix, dst_suffix):
+    for model_name in {model_name for model_name, _ in COMPRESSED_FIELDS}:
+        Model = apps.get_model('core', model_name)
+        fields = [f for m, f in COMPRESSED_FIELDS if m == model_name]
+        batch = []
+        for obj in Model.objects.only('pk', *[f + src_suffix for f in fields]).iterator(chunk_size=BATCH_SIZE):
+            for f in fields:
+                setattr(obj, f + dst_suffix, getattr(obj, f + src_suffix))
+            batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                Model.objects.bulk_update(batch, [f + dst_suffix for f in fields])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, [f + dst_suffix for f in fields])
+
+
+def compress_rows(apps, schema_editor):
+    _copy(apps, '', '_z')
+
+
+def decompress_rows(apps, schema_editor):
+    _copy(apps, '_z', '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_lessoncontent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessoncontent',
+            name='html_z',
+            field=core.fields.CompressedTextField(html_dictionary=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='explanationattempt',
+            name='transcript_z',
+            field=core.fields.CompressedTextField(null=True),
+        ),
+        migrations.AddField(
+            model_name='explanationattempt',
+            name='feedback_z',
+            field=core.fields.CompressedTextField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='lessoncontent',
+            name='html',
+            field=models.TextField(default=''),
+        ),
+        migrations.AlterField(
+            model_name='explanationattempt',
+            name='transcript',
+            field=models.TextField(default='', help_text='User provided explanation transcript'),
+        ),
+        migrations.RunPython(compress_rows, decompress_rows),
+        migrations.RemoveField(
+            model_name='lessoncontent',
+            name='html',
+        ),
+        migrations.RemoveField(
+            model_name='explanationattempt',
+            name='transcript',
+        ),
+        migrations.RemoveField(
+            model_name='explanationattempt',
+            name='feedback',
+        ),
+        migrations.RenameField(
+            model_name='lessoncontent',
+            old_name='html_z',
+            new_name='html',
+        ),
+        migrations.RenameField(
+            model_name='explanationattempt',
+            old_name='transcript_z',
+            new_name='transcript',
+        ),
+        migrations.RenameField(
+            model_name='explanationattempt',
+            old_name='feedback_z',
+            new_name='feedback',
+        ),
+        migrations.AlterField(
+            model_name='lessoncontent',
+            name='html',
+            field=core.fields.CompressedTextField(html_dictionary=True),
+        ),
+        migrations.AlterField(
+            model_name='explanationattempt',
+            name='transcript',
+            field=core.fields.CompressedTextField(help_text='User provided explanation transcript'),
+        ),
+        migrations.AlterField(
+            model_name='explanationattempt',
+            name='feedback',
+            field=core.fields.CompressedTextField(blank=True, help_text='AI feedback on the explanation'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_compressed_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoMeta',
+            fields=[
+                ('video_id', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('channel_title', models.CharField(blank=True, max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('duration_seconds', models.PositiveIntegerField(blank=True, null=True)),
+                ('embeddable', models.BooleanField(default=True)),
+                ('privacy_status', models.CharField(blank=True, max_length=20)),
+                ('checked_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        # Lesson.video_id becomes the column behind the new `video` foreign key.
+        # Same column and type, so the database only gains an index and existing
+        # ids are kept.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AlterField(
+                    model_name='lesson',
+                    name='video_id',
+                    field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+                ),
+            ],
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='lesson',
+                    name='video_id',
+                ),
+                migrations.AddField(
+                    model_name='lesson',
+                    name='video',
+                    field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='lessons', to='core.videometa'),
+                ),
+            ],
+        ),
+    ]
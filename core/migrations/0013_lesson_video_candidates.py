@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_videometa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='video_candidates',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='videometa',
+            name='checked_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_lesson_video_candidates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YouTubeQuotaUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('search_results', models.PositiveIntegerField(default=0)),
+                ('kept_results', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
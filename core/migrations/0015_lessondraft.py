@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_youtubequotausage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonDraft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('draft_id', models.CharField(db_index=True, max_length=64)),
+                ('module_title', models.CharField(max_length=200)),
+                ('title', models.CharField(max_length=255)),
+                ('html', models.TextField(blank=True)),
+                ('video_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('status', models.CharField(choices=[('STREAMING', 'Streaming'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='STREAMING', max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
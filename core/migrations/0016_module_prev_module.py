@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def renumber_modules(apps, schema_editor):
+    # Close gaps and break ties (by id) so the unique constraint can be added
+    Module = apps.get_model('core', 'Module')
+    changed = []
+    course_id = prev = None
+    for module in Module.objects.order_by('course_id', 'order', 'id').only('id', 'course_id', 'order').iterator(chunk_size=2000):
+        if module.course_id != course_id:
+            course_id, prev, position = module.course_id, None, 0
+        position += 1
+        module.order, module.prev_module_id = position, prev
+        changed.append(module)
+        prev = module.pk
+        if len(changed) >= 500:
+            Module.objects.bulk_update(changed, ['order', 'prev_module'])
+            changed = []
+    Module.objects.bulk_update(changed, ['order', 'prev_module'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_lessondraft'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='module',
+            name='prev_module',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.module'),
+        ),
+        migrations.RunPython(renumber_modules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Separate from 0016: Postgres won't ALTER a table with deferred FK checks
+    # pending from the renumbering in the same transaction
+
+    dependencies = [
+        ('core', '0016_module_prev_module'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='module',
+            constraint=models.UniqueConstraint(fields=('course', 'order'), name='unique_module_order'),
+        ),
+    ]
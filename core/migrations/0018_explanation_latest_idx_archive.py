@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:19
+
+import core.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_module_unique_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExplanationAttemptArchive',
+            fields=[
+                ('attempt_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('transcript_hash', models.CharField(max_length=64)),
+                ('is_passed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('payload', core.fields.CompressedTextField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='explanationattempt',
+            index=models.Index(fields=['user', 'lesson', '-created_at'], name='explanation_latest_idx'),
+        ),
+        migrations.AddField(
+            model_name='explanationattemptarchive',
+            name='lesson',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.lesson'),
+        ),
+        migrations.AddField(
+            model_name='explanationattemptarchive',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='explanationattemptarchive',
+            index=models.Index(fields=['user', 'lesson', 'transcript_hash'], name='explanation_archive_hash_idx'),
+        ),
+    ]
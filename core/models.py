@@ -3,6 +3,8 @@ from django.contrib.auth.models import User
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .fields import CompressedTextField
+
 # core/models.py
 
 class Profile(models.Model):
@@ -44,19 +46,62 @@ class Module(models.Model):
         choices=ModuleType.choices, 
         default=ModuleType.CONTENT
     )
+    # The module right before this one in its course, kept by core/ordering.py
+    # so the lock check is one lookup. Orders are 1..n with no gaps.
+    prev_module = models.ForeignKey(
+        'self', null=True, blank=True, editable=False, on_delete=models.SET_NULL, related_name='+'
+    )
 
     class Meta:
         ordering = ['order']
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'order'], name='unique_module_order'),
+        ]
 
     def __str__(self):
         return f"[{self.course.title}] - {self.title} ({self.get_module_type_display()})"
 
+class VideoMeta(models.Model):
+    """
+    YouTube metadata for one video, saved when search_youtube / validate_video_id
+    fetch it and shared by every lesson using the video, so showing or
+    re-checking a lesson video doesn't need another YouTube call.
+    """
+    MISSING = "missing"  # privacy_status for videos YouTube no longer returns
+
+    video_id = models.CharField(max_length=100, primary_key=True)
+    title = models.CharField(max_length=255, blank=True)
+    channel_title = models.CharField(max_length=255, blank=True)
+    description = models.TextField(blank=True)
+    duration_seconds = models.PositiveIntegerField(null=True, blank=True)
+    embeddable = models.BooleanField(default=True)
+    privacy_status = models.CharField(max_length=20, blank=True) # public / unlisted / private / missing
+    checked_at = models.DateTimeField(null=True, blank=True, db_index=True) # Last time YouTube reported this status
+
+    def __str__(self):
+        return f"{self.video_id} - {self.title}"
+
+    @property
+    def is_playable(self):
+        return self.privacy_status == "public" and self.embeddable
+
 class Lesson(models.Model):
     module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name='lessons')
     title = models.CharField(max_length=255)
-    content = models.TextField() # The main text content
     order = models.PositiveIntegerField(default=0)
-    video_id = models.CharField(max_length=100, blank=True, null=True) # Optional YouTube video ID
+    # Optional YouTube video. Stored in the `video_id` column as before; no DB
+    # constraint because a lesson may use a video whose metadata was never fetched.
+    video = models.ForeignKey(
+        VideoMeta, on_delete=models.DO_NOTHING, db_constraint=False,
+        related_name='lessons', blank=True, null=True,
+    )
+    # Other search results for this lesson, best first. revalidate_videos swaps
+    # in the first playable one when `video` goes dead, without a new search.
+    video_candidates = models.JSONField(default=list, blank=True)
+
+    # The lesson body lives in LessonContent so that scans over lessons
+    # (course listings, lock checks, ordering) don't drag the HTML along.
+    _pending_content = None
 
     class Meta:
         ordering = ['order']
@@ -64,6 +109,67 @@ class Lesson(models.Model):
     def __str__(self):
         return self.title
 
+    @property
+    def content(self):
+        """The main text content (HTML). Loaded on first access."""
+        if self._pending_content is not None:
+            return self._pending_content
+        try:
+            return self.body.html
+        except LessonContent.DoesNotExist:
+            return ""
+
+    @content.setter
+    def content(self, value):
+        # Written to LessonContent on the next save(), so
+        # Lesson.objects.create(content=...) keeps working.
+        self._pending_content = value
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if self._pending_content is not None:
+            body, _ = LessonContent.objects.update_or_create(
+                lesson=self, defaults={'html': self._pending_content}
+            )
+            self.body = body
+            self._pending_content = None
+
+class LessonDraft(models.Model):
+    """
+    A generated lesson while Gemini is still writing it. The generation views
+    stream the HTML in here as it arrives, so admins can watch a course take
+    shape before it is saved. Grouped by a client-chosen draft_id.
+    """
+    class Status(models.TextChoices):
+        STREAMING = 'STREAMING', 'Streaming'
+        DONE = 'DONE', 'Done'
+        FAILED = 'FAILED', 'Failed'
+
+    draft_id = models.CharField(max_length=64, db_index=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    module_title = models.CharField(max_length=200)
+    title = models.CharField(max_length=255)
+    html = models.TextField(blank=True) # Partial until status is DONE
+    video_id = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.STREAMING)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.draft_id} - {self.title} ({self.get_status_display()})"
+
+class LessonContent(models.Model):
+    """
+    The HTML body of a lesson, stored out-of-line (one row per lesson).
+    """
+    lesson = models.OneToOneField(Lesson, on_delete=models.CASCADE, primary_key=True, related_name='body')
+    html = CompressedTextField(html_dictionary=True)
+
+    def __str__(self):
+        return f"Content of {self.lesson_id}"
+
 class Quiz(models.Model):
     """
     A quiz, which is linked to a single 'ASSESSMENT' type Module.
@@ -125,7 +231,7 @@ class ExplanationAttempt(models.Model):
         blank=True
     )
 
-    transcript = models.TextField(
+    transcript = CompressedTextField(
         help_text="User provided explanation transcript"
     )
 
@@ -136,7 +242,7 @@ class ExplanationAttempt(models.Model):
         help_text="SHA256 hash of normalized transcript"
     )
 
-    feedback = models.TextField(
+    feedback = CompressedTextField(
         blank=True,
         help_text="AI feedback on the explanation"
     )
@@ -147,11 +253,38 @@ class ExplanationAttempt(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["user", "lesson", "transcript_hash"]),
+            # The cooldown check: this user's latest attempt at this lesson
+            models.Index(fields=["user", "lesson", "-created_at"], name="explanation_latest_idx"),
         ]
 
     def __str__(self):
         return f"{self.user.username} - {self.lesson.title} - {'PASS' if self.is_passed else 'FAIL'}"
 
+class ExplanationAttemptArchive(models.Model):
+    """
+    An ExplanationAttempt moved out of the hot table by `manage.py
+    archive_explanations`. The columns kept are the ones reports and the
+    idempotency check filter on; transcript, feedback and audio path go into
+    one compressed JSON blob.
+    """
+    attempt_id = models.BigIntegerField(primary_key=True) # Its id in ExplanationAttempt
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='+')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    transcript_hash = models.CharField(max_length=64)
+    is_passed = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    payload = CompressedTextField()
+
+    class Meta:
+        indexes = [
+            # The idempotency check falls back to this table (ExplainOrFailAPIView)
+            models.Index(fields=["user", "lesson", "transcript_hash"], name="explanation_archive_hash_idx"),
+        ]
+
+    def __str__(self):
+        return f"Archived attempt {self.attempt_id} ({'PASS' if self.is_passed else 'FAIL'})"
+
 class UserProgress(models.Model):
     """
     Tracks which modules a user has completed.
@@ -167,4 +300,18 @@ class UserProgress(models.Model):
         unique_together = ('user', 'module') # A user has one progress record per module
 
     def __str__(self):
-        return f"{self.user.username} - {self.module.title} - {'Done' if self.is_completed else 'Pending'}"
\ No newline at end of file
+        return f"{self.user.username} - {self.module.title} - {'Done' if self.is_completed else 'Pending'}"
+
+class YouTubeQuotaUsage(models.Model):
+    """
+    YouTube Data API units spent per quota day (midnight to midnight Pacific),
+    shared by all workers. Also counts search results and how many survived
+    search_youtube's filters, which sizes future searches.
+    """
+    day = models.DateField(unique=True)
+    units = models.PositiveIntegerField(default=0)
+    search_results = models.PositiveIntegerField(default=0)
+    kept_results = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.units} units"
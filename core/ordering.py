@@ -0,0 +1,125 @@
+# core/ordering.py
+"""
+Order of the modules in a course.
+
+Orders are 1..n with no gaps or ties (unique_module_order enforces the
+latter), and each module points at the one before it through
+Module.prev_module, so a lock check is a single lookup rather than an
+order__lt scan. Every change of order goes through this module: each
+function runs in a transaction holding a row lock on the course, so
+concurrent admin edits of one course are applied one after the other.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from .models import Course, Module
+
+# While renumbering, changed rows are first moved above this, so no
+# intermediate state clashes with unique_module_order
+ORDER_SHIFT = 1_000_000
+
+
+def _lock_course(course_id):
+    # Call inside transaction.atomic(); None if the course is gone
+    return Course.objects.select_for_update().filter(pk=course_id).first()
+
+
+def _module_ids(course_id):
+    return list(Module.objects.filter(course_id=course_id).order_by("order", "id").values_list("id", flat=True))
+
+
+def _apply(course_id, module_ids):
+    """Gives `module_ids` (all of the course's modules) orders 1..n and matching prev_module."""
+    modules = Module.objects.filter(course_id=course_id).only("id", "order", "prev_module").in_bulk()
+    changed = []
+    prev = None
+    for position, pk in enumerate(module_ids, start=1):
+        module = modules[pk]
+        if module.order != position or module.prev_module_id != prev:
+            module.order, module.prev_module_id = position, prev
+            changed.append(module)
+        prev = pk
+    if changed:
+        Module.objects.filter(pk__in=[m.pk for m in changed]).update(order=F("order") + ORDER_SHIFT)
+        Module.objects.bulk_update(changed, ["order", "prev_module"])
+
+
+def _clamp(position, count):
+    return max(1, min(int(position), count))
+
+
+def link(modules, batch_size=None):
+    """
+    Sets prev_module on freshly bulk-created modules, given course by course
+    in order (bulk_create can't, the ids don't exist before the insert).
+    """
+    for prev, module in zip(modules, modules[1:]):
+        if prev.course_id == module.course_id:
+            module.prev_module = prev
+    Module.objects.bulk_update([m for m in modules if m.prev_module_id], ["prev_module"], batch_size=batch_size)
+
+
+def insert_module(course_id, position=None, module=None, **fields):
+    """
+    Creates a module at `position` (1-based, clamped; default: last) and
+    moves the ones from there on down; `module` is an unsaved Module to use
+    instead of one built from `fields`. Returns None if the course is gone.
+    """
+    with transaction.atomic():
+        course = _lock_course(course_id)
+        if course is None:
+            return None
+        rows = list(Module.objects.filter(course_id=course_id).order_by("order", "id").values_list("id", "order"))
+        ids = [pk for pk, _ in rows]
+        module = module or Module(**fields)
+        module.course = course
+        module.order = rows[-1][1] + 1 if rows else 1
+        module.prev_module_id = ids[-1] if ids else None
+        module.save(force_insert=True)
+        position = len(ids) + 1 if position is None else _clamp(position, len(ids) + 1)
+        if position <= len(ids):
+            ids.insert(position - 1, module.pk)
+            _apply(course_id, ids)
+            module.refresh_from_db(fields=["order", "prev_module"])
+        return module
+
+
+def move_module(module_id, position):
+    """Moves a module to `position` (1-based, clamped) within its course. Returns it, or None if gone."""
+    course_id = Module.objects.filter(pk=module_id).values_list("course_id", flat=True).first()
+    with transaction.atomic():
+        if course_id is None or _lock_course(course_id) is None:
+            return None
+        ids = _module_ids(course_id)
+        if module_id not in ids:
+            return None
+        ids.remove(module_id)
+        ids.insert(_clamp(position, len(ids) + 1) - 1, module_id)
+        _apply(course_id, ids)
+        return Module.objects.get(pk=module_id)
+
+
+def delete_module(module_id):
+    """Deletes a module and closes the gap it leaves."""
+    course_id = Module.objects.filter(pk=module_id).values_list("course_id", flat=True).first()
+    with transaction.atomic():
+        if course_id is None or _lock_course(course_id) is None:
+            return
+        Module.objects.filter(pk=module_id).delete()
+        _apply(course_id, _module_ids(course_id))
+
+
+def reorder_modules(course_id, module_ids):
+    """
+    Puts the course's modules in the order of `module_ids`, which must list
+    each of them exactly once (ValueError otherwise). Returns the modules in
+    their new order, or None if the course is gone.
+    """
+    with transaction.atomic():
+        if _lock_course(course_id) is None:
+            return None
+        current = _module_ids(course_id)
+        if len(module_ids) != len(current) or set(module_ids) != set(current):
+            raise ValueError("module_ids must list every module of the course exactly once.")
+        _apply(course_id, list(module_ids))
+        return list(Module.objects.filter(course_id=course_id).order_by("order"))
@@ -1,8 +1,24 @@
 # core/permissions.py
 from rest_framework import permissions
 
-# core/permissions.py
-from rest_framework import permissions
+
+def get_user_role(user):
+    """
+    Returns the user's role without hitting the DB when possible.
+    ClaimsJWTAuthentication puts `role` directly on the user; anything else
+    (e.g. session auth in the Django admin) falls back to the profile.
+    """
+    if not user or not user.is_authenticated:
+        return None
+    role = getattr(user, 'role', None)
+    if role is None and hasattr(user, 'profile'):
+        role = user.profile.role
+    return role
+
+
+def is_admin(user):
+    return get_user_role(user) == 'ADMIN'
+
 
 class IsAdminOrReadOnly(permissions.BasePermission):
     """
@@ -21,16 +37,11 @@ class IsAdminOrReadOnly(permissions.BasePermission):
 
         # If the request is an "unsafe" method (POST, PUT, PATCH, DELETE),
         # only allow it if the user is an admin.
-        return hasattr(request.user, 'profile') and request.user.profile.role == 'ADMIN'
+        return is_admin(request.user)
 
 class IsAdminUser(permissions.BasePermission):
     """
     Allows access only to admin users (used for course generation).
     """
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            hasattr(request.user, 'profile') and
-            request.user.profile.role == 'ADMIN'
-        )
\ No newline at end of file
+        return is_admin(request.user)
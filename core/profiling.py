@@ -0,0 +1,150 @@
+# core/profiling.py
+"""
+Per-request profiling used by RequestProfilerMiddleware.
+
+While a request is profiled, every SQL query is recorded (through Django's
+execute_wrapper) together with its time, and code wrapped in span() adds a
+named timing. Outside a profiled request span() is a single ContextVar read.
+The phases always reported are db, view (the view call, set by the
+middleware), serialize (DRF serializer .data, see instrument_serializers(),
+and fast_serializers) and render.
+"""
+import contextlib
+import contextvars
+import functools
+import hashlib
+import re
+import time
+from collections import Counter, defaultdict
+
+from django.db import connections
+
+# Collapses "IN (%s, %s, %s)" so lookups over different id lists share a fingerprint
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+_current = contextvars.ContextVar("request_profile", default=None)
+
+
+def fingerprint(sql):
+    normalized = _LITERALS.sub("?", _IN_LIST.sub("IN (...)", sql))
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=6).hexdigest(), normalized
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []                                   # (sql, params, seconds)
+        self.spans = defaultdict(lambda: [0.0, 0, 0])       # name -> [seconds, calls, queries]
+        self.active = {}                                    # open span name -> (start, queries)
+
+    @property
+    def db_time(self):
+        return sum(q[2] for q in self.queries)
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, params, time.perf_counter() - start))
+
+    def repeated_queries(self, threshold=2):
+        """
+        Query shapes run at least `threshold` times in this request (the usual
+        N+1 signature), with how many of those were exact duplicates.
+        """
+        by_shape = defaultdict(list)
+        for sql, params, seconds in self.queries:
+            by_shape[fingerprint(sql)].append((sql, repr(params), seconds))
+        repeated = []
+        for (digest, normalized), runs in by_shape.items():
+            if len(runs) < threshold:
+                continue
+            exact = Counter((sql, params) for sql, params, _ in runs)
+            repeated.append({
+                "fingerprint": digest,
+                "count": len(runs),
+                "duplicates": sum(n - 1 for n in exact.values()),
+                "ms": round(sum(r[2] for r in runs) * 1000, 2),
+                "sql": normalized[:300],
+            })
+        return sorted(repeated, key=lambda r: r["count"], reverse=True)
+
+    def begin(self, name):
+        """Opens span `name` unless it is already open (nested calls count once)."""
+        if name in self.active:
+            return False
+        self.active[name] = (time.perf_counter(), len(self.queries))
+        return True
+
+    def end(self, name):
+        """Closes span `name` if open."""
+        if name not in self.active:
+            return
+        start, queries = self.active.pop(name)
+        entry = self.spans[name]
+        entry[0] += time.perf_counter() - start
+        entry[1] += 1
+        entry[2] += len(self.queries) - queries
+
+
+@contextlib.contextmanager
+def profile_request():
+    """Records queries on every configured connection for the duration of the block."""
+    profile = RequestProfile()
+    token = _current.set(profile)
+    try:
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile.execute_wrapper))
+            yield profile
+    finally:
+        _current.reset(token)
+
+
+def current_profile():
+    """The RequestProfile of the request being profiled, or None."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def _span(profile, name):
+    opened = profile.begin(name)
+    try:
+        yield
+    finally:
+        if opened:
+            profile.end(name)
+
+
+def span(name):
+    """
+    Decorator that times the wrapped function as `name` (e.g. "serialize")
+    in the current request profile. No-op when the request isn't profiled.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return fn(*args, **kwargs)
+            with _span(profile, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_serializers():
+    """
+    Times DRF's Serializer.data / ListSerializer.data as "serialize", so views
+    still on DRF serializers report it too. Called once from CoreConfig.ready().
+    """
+    from rest_framework import serializers
+
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        prop = cls.__dict__["data"]
+        if not getattr(prop.fget, "_profiled", False):
+            fget = span("serialize")(prop.fget)
+            fget._profiled = True
+            cls.data = property(fget)
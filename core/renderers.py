@@ -0,0 +1,36 @@
+# core/renderers.py
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+from .profiling import span
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, we fall back to the stdlib renderer
+    orjson = None
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer backed by orjson.
+
+    Produces the same bytes as DRF's JSONRenderer for compact, unicode output
+    (our settings). Types orjson doesn't know, and datetimes (DRF writes UTC
+    as "Z"), go through DRF's JSONEncoder. Pretty-printed output
+    (`; indent=N`, browsable API) and a missing orjson use the stdlib path.
+    """
+    options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    @span("render")
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=encoders.JSONEncoder().default, option=self.options)
+
+        # Same \u2028 / \u2029 escaping as JSONRenderer
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -6,8 +6,9 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 # Ensure these are imported from your models.py
 from .models import (
     Course, Module, Lesson, Profile, Quiz, Question, Review, 
-    ExplanationAttempt, UserProgress
+    ExplanationAttempt, UserProgress, VideoMeta, LessonDraft
 )
+from .permissions import is_admin
 
 # =====================================================================
 #  AUTHENTICATION & USER SERIALIZERS
@@ -65,10 +66,39 @@ class ExplanationAttemptSerializer(serializers.ModelSerializer):
 #  READ-ONLY NESTED SERIALIZERS (For Student Dashboard)
 # =====================================================================
 
+class VideoMetaSerializer(serializers.ModelSerializer):
+    """Stored YouTube metadata, shown inline so clients don't have to ask YouTube."""
+    class Meta:
+        model = VideoMeta
+        fields = ['title', 'channel_title', 'duration_seconds', 'embeddable', 'privacy_status']
+
 class LessonSerializer(serializers.ModelSerializer):
+    content = serializers.CharField(read_only=True)
+    video = VideoMetaSerializer(read_only=True) # None if we never fetched the metadata
+
     class Meta:
         model = Lesson
-        fields = ['id', 'title', 'content', 'video_id', 'order']
+        fields = ['id', 'title', 'content', 'video_id', 'video', 'order']
+
+class LessonSummarySerializer(serializers.ModelSerializer):
+    """Lesson without its body, for listings. The body is served by LessonContentAPIView."""
+    video = VideoMetaSerializer(read_only=True)
+
+    class Meta:
+        model = Lesson
+        fields = ['id', 'title', 'video_id', 'video', 'order']
+
+class LessonDraftSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LessonDraft
+        fields = ['id', 'module_title', 'title', 'html', 'video_id', 'status', 'updated_at']
+
+class LessonContentSerializer(serializers.ModelSerializer):
+    content = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Lesson
+        fields = ['id', 'content']
 
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -99,7 +129,7 @@ class ModuleSerializer(serializers.ModelSerializer):
         user = self.context.get('request').user
         if not user or not user.is_authenticated:
             return False
-        return UserProgress.objects.filter(user=user, module=obj, is_completed=True).exists()
+        return UserProgress.objects.filter(user_id=user.id, module=obj, is_completed=True).exists()
 
     def get_is_locked(self, obj):
         """
@@ -111,32 +141,25 @@ class ModuleSerializer(serializers.ModelSerializer):
             return True # Lock everything for guests
         
         # Admin bypass
-        if hasattr(user, 'profile') and user.profile.role == 'ADMIN':
+        if is_admin(user):
             return False
 
-        # 1. First module is always unlocked
-        if obj.order == 1:
-            return False
-
-        # 2. Find the immediately preceding module
-        prev_module = Module.objects.filter(
-            course=obj.course, 
-            order__lt=obj.order
-        ).order_by('-order').first()
-
-        # If no previous module exists (edge case), it's unlocked
-        if not prev_module:
+        # 1. The first module (no previous one) is always unlocked
+        if obj.prev_module_id is None:
             return False
 
-        # 3. Check if previous module is completed
+        # 2. Check if the previous module is completed
         is_prev_done = UserProgress.objects.filter(
-            user=user, 
-            module=prev_module, 
+            user_id=user.id, 
+            module_id=obj.prev_module_id, 
             is_completed=True
         ).exists()
 
         return not is_prev_done
 
+class ModuleSummarySerializer(ModuleSerializer):
+    lessons = LessonSummarySerializer(many=True, read_only=True)
+
 class CourseDetailSerializer(serializers.ModelSerializer):
     """
     The main serializer for the entire course structure.
@@ -162,16 +185,35 @@ class CourseDetailSerializer(serializers.ModelSerializer):
         avg = aggregate['rating__avg']
         return round(avg, 1) if avg else 0
 
+class CourseListSerializer(CourseDetailSerializer):
+    """Same shape as CourseDetailSerializer, minus lesson bodies."""
+    modules = ModuleSummarySerializer(many=True, read_only=True)
+
 # =====================================================================
 #  WRITEABLE SERIALIZERS (For Admin Editor)
 # =====================================================================
 
 class ModuleWriteSerializer(serializers.ModelSerializer):
+    # Orders are assigned by core/ordering.py: `order` is the position to
+    # insert or move the module to, and defaults to the end of the course.
+    order = serializers.IntegerField(min_value=1, required=False)
+
     class Meta:
         model = Module
         fields = ['id', 'course', 'title', 'order', 'module_type']
+        validators = [] # No unique (course, order) check: other modules make room
+
+    def validate_course(self, value):
+        if self.instance is not None and value.pk != self.instance.course_id:
+            raise serializers.ValidationError("A module can't be moved to another course.")
+        return value
 
 class LessonWriteSerializer(serializers.ModelSerializer):
+    # Lesson.content is a property backed by LessonContent; Lesson.save() persists it.
+    content = serializers.CharField()
+    # The raw id behind Lesson.video; any id is accepted, metadata or not.
+    video_id = serializers.CharField(max_length=100, allow_blank=True, allow_null=True, required=False)
+
     class Meta:
         model = Lesson
         fields = ['id', 'module', 'title', 'content', 'video_id', 'order']
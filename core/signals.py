@@ -0,0 +1,21 @@
+# core/signals.py
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_auth_state
+from .models import Profile
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Deactivation/deletion must not wait for the auth state TTL."""
+    invalidate_auth_state(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    """Role changes must not wait for the auth state TTL."""
+    invalidate_auth_state(instance.user_id)
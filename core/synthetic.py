@@ -0,0 +1,95 @@
+# core/synthetic.py
+"""
+Deterministic fake course data for benchmarks and load tests.
+Nothing here calls Gemini or YouTube.
+"""
+import random
+
+from . import ordering
+from .models import Course, Lesson, LessonContent, Module, Question, Quiz, VideoMeta
+
+SAMPLE_WORDS = (
+    "data model function request cache query index server client response "
+    "value system process memory thread network example pattern design error "
+    "variable loop class object method interface module package library test"
+).split()
+
+
+def synthetic_lesson_html(rng, words=650):
+    """Roughly the shape of a generated lesson: headings, paragraphs, a list, a code block."""
+    parts = ["<h2>Introduction</h2>\n"]
+    remaining = words
+    while remaining > 0:
+        n = rng.randint(40, 90)
+        parts.append("<p>" + " ".join(rng.choice(SAMPLE_WORDS) for _ in range(n)) + ".</p>\n")
+        if rng.random() < 0.3:
+            parts.append("<ul>\n" + "".join(
+                f"<li><strong>{rng.choice(SAMPLE_WORDS)}</strong>: {rng.choice(SAMPLE_WORDS)}</li>\n" for _ in range(4)
+            ) + "</ul>\n")
+        if rng.random() < 0.2:
+            parts.append("<pre><code>def example():\n    return 42\n</code></pre>\n")
+        if rng.random() < 0.3:
+            parts.append(f"<h2>{rng.choice(SAMPLE_WORDS).title()}</h2>\n")
+        remaining -= n
+    return "".join(parts)
+
+
+def synthetic_video_id(rng):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-") for _ in range(11))
+
+
+def synthetic_video_meta(rng):
+    return {
+        "title": " ".join(rng.choice(SAMPLE_WORDS) for _ in range(6)).title(),
+        "channel_title": rng.choice(SAMPLE_WORDS).title() + " Academy",
+        "description": " ".join(rng.choice(SAMPLE_WORDS) for _ in range(40)),
+        "duration_seconds": rng.randint(420, 3600),
+        "embeddable": True,
+        "privacy_status": "public",
+    }
+
+
+def synthetic_question(rng, order):
+    options = [" ".join(rng.choice(SAMPLE_WORDS) for _ in range(3)) for _ in range(4)]
+    return {
+        "question_text": "Which " + " ".join(rng.choice(SAMPLE_WORDS) for _ in range(8)) + "?",
+        "options": options,
+        "correct_answer": rng.choice(options),
+        "order": order,
+    }
+
+
+def create_synthetic_course(owner, num_modules=6, lessons_per_module=5, num_questions=15,
+                            seed=0, status=Course.Status.PUBLISHED, lesson_words=650):
+    """
+    Creates a course with `num_modules` content modules followed by one
+    assessment module holding a `num_questions` quiz. Uses bulk inserts.
+    """
+    rng = random.Random(seed)
+    course = Course.objects.create(title=f"Synthetic Course {seed}", created_by=owner, status=status)
+
+    modules = Module.objects.bulk_create([
+        Module(course=course, title=f"Module {i + 1}", order=i + 1, module_type=Module.ModuleType.CONTENT)
+        for i in range(num_modules)
+    ])
+    ordering.link(modules)
+    lessons = Lesson.objects.bulk_create([
+        Lesson(module=module, title=f"{module.title} - Lesson {j + 1}", order=j + 1, video_id=synthetic_video_id(rng))
+        for module in modules for j in range(lessons_per_module)
+    ])
+    VideoMeta.objects.bulk_create([
+        VideoMeta(video_id=lesson.video_id, **synthetic_video_meta(rng)) for lesson in lessons
+    ], ignore_conflicts=True)
+    LessonContent.objects.bulk_create([
+        LessonContent(lesson=lesson, html=synthetic_lesson_html(rng, lesson_words)) for lesson in lessons
+    ])
+
+    assessment = Module.objects.create(
+        course=course, title="Final Test", order=num_modules + 1, module_type=Module.ModuleType.ASSESSMENT,
+        prev_module=modules[-1] if modules else None,
+    )
+    quiz = Quiz.objects.create(module=assessment, title="Final Test")
+    Question.objects.bulk_create([
+        Question(quiz=quiz, **synthetic_question(rng, k + 1)) for k in range(num_questions)
+    ])
+    return course
@@ -1,3 +1,791 @@
-from django.test import TestCase
+import httplib2
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from google.api_core.exceptions import DeadlineExceeded
+from googleapiclient.errors import HttpError
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from . import course_archive, gemini, ordering, views, youtube_quota
+from .authentication import ClaimsJWTAuthentication, ClaimsUser
+from .fast_serializers import COURSE_FIELDS, serialize_course_trees
+from .fields import (
+    MIN_COMPRESS_LENGTH, RAW, ZLIB, ZLIB_HTML_V1, CompressedTextField, compress_text, decompress_text,
+)
+from .models import (
+    Course, ExplanationAttempt, ExplanationAttemptArchive, Lesson, LessonContent, Module, Profile, Question, Quiz,
+    Review, UserProgress, VideoMeta,
+)
+from .renderers import FastJSONRenderer
+from .serializers import CourseDetailSerializer, CourseListSerializer, MyTokenObtainPairSerializer
+from .views import hash_transcript
+
+LESSON_HTML = (
+    "<h2>Introduction</h2>\n<p>In this lesson, we will explore the fundamental concepts of caching. "
+    "Let's take a closer look at a practical example.</p>\n<ul>\n<li><strong>Hit</strong>: found</li>\n"
+    "<li><strong>Miss</strong>: fetched — ünïcode ✓</li>\n</ul>\n<h2>Conclusion</h2>\n<p>That's it.</p>\n"
+)
+
+
+class ModuleOrderingTests(TestCase):
+    """core/ordering.py keeps orders 1..n and prev_module pointing at the module before."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user("admin", password="pw")
+        Profile.objects.create(user=self.admin, role=Profile.Role.ADMIN)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.course = Course.objects.create(title="Course", created_by=self.admin)
+        self.modules = [ordering.insert_module(self.course.pk, title=f"M{i}") for i in range(1, 5)]
+
+    def assertOrder(self, expected):
+        """`expected` lists module ids in order; checks orders and prev_module follow it."""
+        rows = list(Module.objects.filter(course=self.course).order_by("order").values_list(
+            "id", "order", "prev_module_id"
+        ))
+        self.assertEqual([pk for pk, _, _ in rows], expected)
+        self.assertEqual([order for _, order, _ in rows], list(range(1, len(expected) + 1)))
+        self.assertEqual([prev for _, _, prev in rows], [None] + expected[:-1])
+
+    def ids(self, *indexes):
+        return [self.modules[i].pk for i in indexes]
+
+    def test_insert_appends_by_default(self):
+        self.assertOrder(self.ids(0, 1, 2, 3))
+
+    def test_insert_in_the_middle(self):
+        module = ordering.insert_module(self.course.pk, 2, title="New")
+        self.assertEqual((module.order, module.prev_module_id), (2, self.modules[0].pk))
+        self.assertOrder([self.modules[0].pk, module.pk] + self.ids(1, 2, 3))
+
+    def test_insert_position_is_clamped(self):
+        first = ordering.insert_module(self.course.pk, -5, title="First")
+        last = ordering.insert_module(self.course.pk, 99, title="Last")
+        self.assertOrder([first.pk] + self.ids(0, 1, 2, 3) + [last.pk])
+
+    def test_move_to_first(self):
+        ordering.move_module(self.modules[3].pk, 1)
+        self.assertOrder(self.ids(3, 0, 1, 2))
+
+    def test_move_to_last(self):
+        ordering.move_module(self.modules[0].pk, 4)
+        self.assertOrder(self.ids(1, 2, 3, 0))
+
+    def test_delete_closes_the_gap(self):
+        ordering.delete_module(self.modules[1].pk)
+        self.assertOrder(self.ids(0, 2, 3))
+
+    def test_reorder_moves_every_module(self):
+        # Every row changes order, so each is shifted past ORDER_SHIFT first
+        # and unique_module_order never sees two modules on one order
+        ordering.reorder_modules(self.course.pk, self.ids(3, 2, 1, 0))
+        self.assertOrder(self.ids(3, 2, 1, 0))
+        self.assertFalse(Module.objects.filter(order__gte=ordering.ORDER_SHIFT).exists())
+
+    def test_reorder_needs_every_module_once(self):
+        for module_ids in (self.ids(0, 1, 2), self.ids(0, 1, 2, 2), self.ids(0, 1, 2, 3) + [0]):
+            with self.assertRaises(ValueError):
+                ordering.reorder_modules(self.course.pk, module_ids)
+        self.assertOrder(self.ids(0, 1, 2, 3))
+
+    def test_other_courses_are_untouched(self):
+        other = Course.objects.create(title="Other", created_by=self.admin)
+        kept = ordering.insert_module(other.pk, title="Other M1")
+        ordering.reorder_modules(self.course.pk, self.ids(1, 0, 3, 2))
+        kept.refresh_from_db()
+        self.assertEqual((kept.order, kept.prev_module_id), (1, None))
+
+    def test_put_order_moves_the_module(self):
+        module = self.modules[2]
+        response = self.client.put(f"/api/modules/{module.pk}/", {
+            "course": self.course.pk, "title": "Renamed", "order": 1, "module_type": "CONTENT",
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["order"], 1)
+        self.assertOrder(self.ids(2, 0, 1, 3))
+
+    def test_put_order_out_of_range(self):
+        module = self.modules[0]
+        data = {"course": self.course.pk, "title": "M1", "module_type": "CONTENT"}
+        response = self.client.put(f"/api/modules/{module.pk}/", {**data, "order": 99}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["order"], 4)
+        self.assertOrder(self.ids(1, 2, 3, 0))
+
+        response = self.client.put(f"/api/modules/{module.pk}/", {**data, "order": 0}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertOrder(self.ids(1, 2, 3, 0))
+
+    def test_delete_endpoint_relinks(self):
+        response = self.client.delete(f"/api/modules/{self.modules[0].pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertOrder(self.ids(1, 2, 3))
+
+    def test_reorder_endpoint(self):
+        url = f"/api/courses/{self.course.pk}/reorder-modules/"
+        response = self.client.post(url, {"module_ids": self.ids(2, 3, 0, 1)}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m["id"] for m in response.data], self.ids(2, 3, 0, 1))
+        self.assertOrder(self.ids(2, 3, 0, 1))
+
+        self.assertEqual(self.client.post(url, {"module_ids": self.ids(0, 1)}, format="json").status_code, 400)
+        self.assertEqual(self.client.post(url, {"module_ids": [True] * 4}, format="json").status_code, 400)
+        self.assertOrder(self.ids(2, 3, 0, 1))
+
+
+class CompressedTextFieldTests(TestCase):
+    """core/fields.py: header byte + payload, readable with every dictionary ever shipped."""
+
+    def test_header_byte(self):
+        self.assertEqual(compress_text("short"), bytes([RAW]) + b"short")
+        self.assertEqual(compress_text(LESSON_HTML)[0], ZLIB)
+        self.assertEqual(compress_text(LESSON_HTML, ZLIB_HTML_V1)[0], ZLIB_HTML_V1)
+        self.assertEqual(compress_text("x" * (MIN_COMPRESS_LENGTH - 1))[0], RAW)
+        self.assertEqual(compress_text("x" * MIN_COMPRESS_LENGTH)[0], ZLIB)
+
+    def test_round_trip(self):
+        for zdict_version in (None, ZLIB_HTML_V1):
+            for text in ("", "short", LESSON_HTML, LESSON_HTML * 20):
+                self.assertEqual(decompress_text(compress_text(text, zdict_version)), text)
+        # psycopg2 hands bytea back as a memoryview
+        self.assertEqual(decompress_text(memoryview(compress_text(LESSON_HTML, ZLIB_HTML_V1))), LESSON_HTML)
+
+    def test_preset_dictionary_pays_off(self):
+        self.assertLess(len(compress_text(LESSON_HTML, ZLIB_HTML_V1)), len(compress_text(LESSON_HTML)))
+
+    def test_unknown_header(self):
+        with self.assertRaises(ValueError):
+            decompress_text(bytes([99]) + b"data")
+
+    def test_empty_and_none(self):
+        field = CompressedTextField(null=True)
+        self.assertEqual(decompress_text(b""), "")
+        self.assertEqual(compress_text(""), bytes([RAW]))
+        self.assertIsNone(field.get_db_prep_value(None, connection))
+        self.assertIsNone(field.from_db_value(None, None, connection))
+
+    def test_save_and_reload(self):
+        user = User.objects.create_user("student", password="pw")
+        course = Course.objects.create(title="Course", created_by=user)
+        module = Module.objects.create(course=course, title="M1", order=1)
+        lesson = Lesson.objects.create(module=module, title="L1", order=1)
+        LessonContent.objects.create(lesson=lesson, html=LESSON_HTML)
+        self.assertEqual(LessonContent.objects.get(pk=lesson.pk).html, LESSON_HTML)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT html FROM core_lessoncontent WHERE lesson_id = %s", [lesson.pk])
+            self.assertEqual(bytes(cursor.fetchone()[0])[0], ZLIB_HTML_V1)
+
+        LessonContent.objects.filter(pk=lesson.pk).update(html="")
+        self.assertEqual(LessonContent.objects.get(pk=lesson.pk).html, "")
+
+        payload = json.dumps({"transcript": LESSON_HTML, "feedback": "ok", "audio_file": None}, ensure_ascii=False)
+        ExplanationAttemptArchive.objects.create(
+            attempt_id=1, lesson=lesson, user=user, transcript_hash="h", created_at=timezone.now(), payload=payload,
+        )
+        self.assertEqual(ExplanationAttemptArchive.objects.get(pk=1).payload, payload)
+
+
+class CompressedTextMigrationTests(TransactionTestCase):
+    """0011_compressed_text swaps the text columns for compressed ones and back."""
+    before = [("core", "0010_lessoncontent")]
+    after = [("core", "0011_compressed_text")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_column_swap(self):
+        apps = self.migrate(self.before)
+        user = apps.get_model("auth", "User").objects.create(username="student")
+        module = apps.get_model("core", "Module").objects.create(
+            course=apps.get_model("core", "Course").objects.create(title="Course", created_by=user),
+            title="M1", order=1,
+        )
+        lesson = apps.get_model("core", "Lesson").objects.create(module=module, title="L1", order=1)
+        apps.get_model("core", "LessonContent").objects.create(lesson=lesson, html=LESSON_HTML)
+        attempt = apps.get_model("core", "ExplanationAttempt").objects.create(
+            lesson=lesson, user=user, transcript="My explanation", transcript_hash="h", feedback="",
+        )
+
+        apps = self.migrate(self.after)
+        self.assertEqual(apps.get_model("core", "LessonContent").objects.get(pk=lesson.pk).html, LESSON_HTML)
+        migrated = apps.get_model("core", "ExplanationAttempt").objects.get(pk=attempt.pk)
+        self.assertEqual((migrated.transcript, migrated.feedback), ("My explanation", ""))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT html FROM core_lessoncontent WHERE lesson_id = %s", [lesson.pk])
+            self.assertEqual(bytes(cursor.fetchone()[0])[0], ZLIB_HTML_V1)
+
+        apps = self.migrate(self.before)
+        self.assertEqual(apps.get_model("core", "LessonContent").objects.get(pk=lesson.pk).html, LESSON_HTML)
+        reverted = apps.get_model("core", "ExplanationAttempt").objects.get(pk=attempt.pk)
+        self.assertEqual((reverted.transcript, reverted.feedback), ("My explanation", ""))
+
+
+class HedgingTests(SimpleTestCase):
+    """gemini._hedged: a duplicate after hedge_after, first successful answer wins."""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def slow_then_fast(self):
+        with self.lock:
+            self.calls += 1
+            number = self.calls
+        if number == 1:
+            self.release.wait(5)  # the primary, stuck well past hedge_after
+            return "primary"
+        return "hedge"
+
+    def test_hedge_answers_before_the_primary(self):
+        started = time.monotonic()
+        self.assertEqual(gemini._hedged(self.slow_then_fast, 0.05, 5, "test-model"), "hedge")
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.calls, 2)
+        self.assertFalse(self.release.is_set())  # the primary is still running
+
+    def test_fast_primary_sends_no_hedge(self):
+        self.assertEqual(gemini._hedged(lambda: "primary", 1, 5, "test-model"), "primary")
+
+    def test_failed_primary_falls_back_to_the_hedge(self):
+        def call():
+            with self.lock:
+                self.calls += 1
+                number = self.calls
+            if number == 1:
+                time.sleep(0.1)
+                raise RuntimeError("primary failed")
+            time.sleep(0.2)
+            return "hedge"
+        self.assertEqual(gemini._hedged(call, 0.05, 5, "test-model"), "hedge")
+
+    def test_deadline(self):
+        with self.assertRaises(DeadlineExceeded):
+            gemini._hedged(lambda: self.release.wait(5), 0.05, 0.2, "test-model")
+
+
+class ExplanationArchiveTests(TestCase):
+    """Attempts moved out by archive_explanations still answer a resubmitted transcript."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("student", password="pw")
+        Profile.objects.create(user=self.user)
+        course = Course.objects.create(title="Course", created_by=self.user)
+        module = Module.objects.create(course=course, title="M1", order=1)
+        self.lesson = Lesson.objects.create(module=module, title="L1", order=1)
+        LessonContent.objects.create(lesson=self.lesson, html=LESSON_HTML)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def attempt(self, transcript, feedback, days_ago):
+        attempt = ExplanationAttempt.objects.create(
+            user=self.user, lesson=self.lesson, transcript=transcript,
+            transcript_hash=hash_transcript(transcript), feedback=feedback,
+        )
+        ExplanationAttempt.objects.filter(pk=attempt.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return attempt
+
+    def test_resubmitted_transcript_comes_from_the_archive(self):
+        old = self.attempt("Caching keeps copies close by", "Too vague.", days_ago=40)
+        self.attempt("Something newer", "Better.", days_ago=1)
+        call_command("archive_explanations", stdout=StringIO())
+        self.assertFalse(ExplanationAttempt.objects.filter(pk=old.pk).exists())
+        self.assertEqual(ExplanationAttemptArchive.objects.get(pk=old.pk).transcript_hash, old.transcript_hash)
+
+        with mock.patch("core.views.gemini_safe_generate") as grade:
+            response = self.client.post(
+                f"/api/lessons/{self.lesson.pk}/explain/", {"transcript": "Caching keeps copies close by"},
+                format="json",
+            )
+        grade.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"status": "cached", "data": {
+            "transcript": "Caching keeps copies close by", "feedback": "Too vague.",
+            "is_passed": False, "module_completed": False,
+        }})
+        self.assertEqual(ExplanationAttempt.objects.count(), 1)
+
+
+class FastSerializerTests(TestCase):
+    """serialize_course_trees must render the same JSON as CourseDetailSerializer / CourseListSerializer."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user("admin", password="pw")
+        Profile.objects.create(user=self.admin, role=Profile.Role.ADMIN)
+        self.student = User.objects.create_user("student", password="pw")
+        Profile.objects.create(user=self.student)
+        self.course = Course.objects.create(title="Course", status="PUBLISHED", created_by=self.admin)
+        Review.objects.create(course=self.course, user=self.student, rating=4, comment="Good")
+
+        first = ordering.insert_module(self.course.pk, title="Basics")
+        second = ordering.insert_module(self.course.pk, title="More")
+        ordering.insert_module(self.course.pk, title="Quiz", module_type=Module.ModuleType.ASSESSMENT)
+        quiz = Quiz.objects.create(module=Module.objects.get(course=self.course, order=3), title="Check")
+        Question.objects.create(quiz=quiz, question_text="Q2", options=["a", "b"], correct_answer="b", order=2)
+        Question.objects.create(quiz=quiz, question_text="Q1", options=["a", "b"], correct_answer="a", order=1)
+
+        VideoMeta.objects.create(video_id="known", title="Known video", channel_title="Channel",
+                                 duration_seconds=300, privacy_status="public")
+        Lesson.objects.create(module=first, title="With video", order=2, video_id="known", content=LESSON_HTML)
+        Lesson.objects.create(module=first, title="No metadata", order=1, video_id="unfetched", content="<p>x</p>")
+        Lesson.objects.create(module=second, title="No body", order=1)  # no LessonContent row
+
+        # The student finished the first module: second unlocked, third locked
+        UserProgress.objects.create(user=self.student, course=self.course, module=first, is_completed=True)
+
+    def render_both(self, user, detail):
+        request = SimpleNamespace(user=user)
+        serializer = CourseDetailSerializer if detail else CourseListSerializer
+        drf = serializer(Course.objects.get(pk=self.course.pk), context={"request": request}).data
+        fast = serialize_course_trees(
+            list(Course.objects.filter(pk=self.course.pk).values(*COURSE_FIELDS)), user, include_content=detail
+        )[0]
+        renderer = FastJSONRenderer()
+        return renderer.render(drf), renderer.render(fast), fast
+
+    def test_same_json(self):
+        for user in (self.admin, self.student, AnonymousUser()):
+            for detail in (True, False):
+                with self.subTest(user=str(user), detail=detail):
+                    drf, fast, _ = self.render_both(user, detail)
+                    self.assertEqual(fast, drf)
+
+    def test_fixture_covers_the_cases(self):
+        _, _, student = self.render_both(self.student, True)
+        self.assertEqual([m["is_locked"] for m in student["modules"]], [False, False, True])
+        self.assertEqual([m["is_completed"] for m in student["modules"]], [True, False, False])
+        lessons = {l["title"]: l for m in student["modules"] for l in m["lessons"]}
+        self.assertIsNone(lessons["No metadata"]["video"])
+        self.assertEqual(lessons["No body"]["content"], "")
+        self.assertEqual(lessons["With video"]["video"]["title"], "Known video")
+        self.assertEqual(student["average_rating"], 4)
+        _, _, guest = self.render_both(AnonymousUser(), True)
+        self.assertTrue(all(m["is_locked"] for m in guest["modules"]))
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    """Reads get a ClaimsUser, writes the real User; both check the cached auth state."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("student", password="pw")
+        self.profile = Profile.objects.create(user=self.user)
+        token = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        self.header = f"Bearer {token}"
+        self.auth = ClaimsJWTAuthentication()
+
+    def authenticate(self, method="get"):
+        request = getattr(APIRequestFactory(), method)("/api/courses/", HTTP_AUTHORIZATION=self.header)
+        return self.auth.authenticate(request)[0]
+
+    def test_safe_methods_get_a_claims_user(self):
+        self.authenticate()  # fills the cache
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual((user.id, user.username, user.role), (self.user.pk, "student", "STUDENT"))
+
+    def test_unsafe_methods_get_the_real_user(self):
+        for method in ("post", "put", "patch", "delete"):
+            user = self.authenticate(method)
+            self.assertIsInstance(user, User)
+            self.assertEqual((user.pk, user.role), (self.user.pk, "STUDENT"))
+
+    def test_deactivated_user_is_rejected_on_the_next_request(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deleted_user_is_rejected_on_the_next_request(self):
+        self.authenticate()
+        self.user.delete()
+        for method in ("get", "post"):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(method)
+
+    def test_role_change_applies_on_the_next_request(self):
+        self.assertEqual(self.authenticate().role, "STUDENT")
+        self.profile.role = Profile.Role.ADMIN
+        self.profile.save()
+        self.assertEqual(self.authenticate().role, "ADMIN")
+        self.assertEqual(self.authenticate("post").role, "ADMIN")
+
+
+class BulkWriteTests(TestCase):
+    """lessons/bulk/ and questions/bulk/: one transaction, all rows or none."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user("admin", password="pw")
+        Profile.objects.create(user=self.admin, role=Profile.Role.ADMIN)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        course = Course.objects.create(title="Course", created_by=self.admin)
+        self.module = ordering.insert_module(course.pk, title="M1")
+        self.lessons = [
+            Lesson.objects.create(module=self.module, title=f"L{i}", order=i, content=f"<p>{i}</p>") for i in (1, 2, 3)
+        ]
+        quiz = Quiz.objects.create(module=self.module, title="Quiz")
+        self.question_data = {"quiz": quiz.pk, "options": ["a", "b"], "correct_answer": "a"}
+        self.question = Question.objects.create(quiz=quiz, question_text="Q1", options=["a", "b"], correct_answer="a")
+
+    def post(self, url, body):
+        return self.client.post(url, body, format="json")
+
+    def test_lessons_create_update_delete(self):
+        first, second, third = self.lessons
+        response = self.post("/api/lessons/bulk/", {
+            "create": [{"module": self.module.pk, "title": "New", "content": "<p>new</p>", "order": 4}],
+            "update": [{"id": first.pk, "title": "Renamed"}, {"id": second.pk, "content": "<p>edited</p>"}],
+            "delete": [third.pk],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["deleted"], [third.pk])
+        new = Lesson.objects.get(pk=response.data["created"][0]["id"])
+        self.assertEqual((new.title, new.content), ("New", "<p>new</p>"))
+        first.refresh_from_db()
+        self.assertEqual((first.title, first.content), ("Renamed", "<p>1</p>"))
+        self.assertEqual(LessonContent.objects.get(pk=second.pk).html, "<p>edited</p>")
+        self.assertFalse(Lesson.objects.filter(pk=third.pk).exists())
+
+    def test_questions(self):
+        response = self.post("/api/questions/bulk/", {
+            "create": [{**self.question_data, "question_text": "Q2", "order": 2}],
+            "update": [{"id": self.question.pk, "question_text": "Q1 again"}],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(Question.objects.order_by("order").values_list("question_text", flat=True)), ["Q1 again", "Q2"]
+        )
+
+    def test_one_invalid_row_writes_nothing(self):
+        response = self.post("/api/lessons/bulk/", {
+            "create": [{"module": self.module.pk, "title": "Fine", "content": "x"}, {"title": "No module"}],
+            "update": [{"id": self.lessons[0].pk, "title": "Renamed"}],
+            "delete": [self.lessons[1].pk],
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["create"][0], {})
+        self.assertIn("module", response.data["create"][1])
+        self.assertEqual(response.data["update"], [{}])
+        self.assertEqual(Lesson.objects.count(), 3)
+        self.assertEqual(Lesson.objects.get(pk=self.lessons[0].pk).title, "L1")
+
+    def test_failure_while_writing_rolls_back(self):
+        with mock.patch.object(views.LessonBulkAPIView, "bulk_update", side_effect=RuntimeError("boom")):
+            client = APIClient(raise_request_exception=False)
+            client.force_authenticate(self.admin)
+            response = client.post("/api/lessons/bulk/", {
+                "create": [{"module": self.module.pk, "title": "New", "content": "x"}],
+                "update": [{"id": self.lessons[0].pk, "title": "Renamed"}],
+            }, format="json")
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(Lesson.objects.count(), 3)
+        self.assertEqual(LessonContent.objects.count(), 3)
+
+    def test_row_cap(self):
+        rows = [{**self.question_data, "question_text": f"Q{i}"} for i in range(views.BULK_WRITE_MAX_ROWS)]
+        self.assertEqual(self.post("/api/questions/bulk/", {"create": rows}).status_code, 200)
+        response = self.post("/api/questions/bulk/", {"create": rows, "delete": [self.question.pk]})
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Question.objects.filter(pk=self.question.pk).exists())
+
+    def test_ids_must_be_integers(self):
+        for body in (
+            {"update": [{"id": True, "title": "x"}]},
+            {"update": [{"id": "1", "title": "x"}]},
+            {"update": [{"title": "no id"}]},
+            {"delete": [True]},
+            {"delete": [1.0]},
+        ):
+            with self.subTest(body=body):
+                self.assertEqual(self.post("/api/lessons/bulk/", body).status_code, 400)
+        self.assertEqual(Lesson.objects.count(), 3)
+
+    def test_bad_shapes_and_ids(self):
+        pk = self.lessons[0].pk
+        self.assertEqual(self.post("/api/lessons/bulk/", {"create": {}}).status_code, 400)
+        self.assertEqual(self.post("/api/lessons/bulk/", {"update": [{"id": pk}, {"id": pk}]}).status_code, 400)
+        self.assertEqual(self.post("/api/lessons/bulk/", {"update": [{"id": pk}], "delete": [pk]}).status_code, 400)
+        self.assertEqual(self.post("/api/lessons/bulk/", {"update": [{"id": 999999}]}).status_code, 404)
+
+    def test_admins_only(self):
+        student = User.objects.create_user("student", password="pw")
+        Profile.objects.create(user=student)
+        body = {"delete": [self.lessons[0].pk]}
+        for user, expected in ((student, 403), (None, 401)):
+            client = APIClient()
+            if user:
+                client.force_authenticate(user)
+            for url in ("/api/lessons/bulk/", "/api/questions/bulk/"):
+                with self.subTest(user=str(user), url=url):
+                    self.assertEqual(client.post(url, body, format="json").status_code, expected)
+        self.assertEqual(Lesson.objects.count(), 3)
+
+
+class FlakyYouTube:
+    """videos().list(...).execute() raises `errors` in turn, then answers with every id public."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    def videos(self):
+        return SimpleNamespace(list=self._list)
+
+    def _list(self, id, part=""):
+        def execute():
+            self.calls.append(id.split(","))
+            if self.errors:
+                raise self.errors.pop(0)
+            return {"items": [
+                {"id": video_id, "status": {"embeddable": True, "privacyStatus": "public"},
+                 "contentDetails": {"duration": "PT5M"}, "snippet": {"title": video_id, "channelTitle": "c"}}
+                for video_id in id.split(",")
+            ]}
+        return SimpleNamespace(execute=execute)
+
+
+class RevalidateVideosTests(TestCase):
+    """revalidate_videos skips a batch YouTube fails to answer and carries on."""
+
+    def setUp(self):
+        user = User.objects.create_user("admin", password="pw")
+        module = ordering.insert_module(Course.objects.create(title="Course", created_by=user).pk, title="M1")
+        Lesson.objects.bulk_create([
+            Lesson(module=module, title=f"L{i}", order=i, video_id=f"video{i:03}") for i in range(120)
+        ])
+
+    def run_pass(self, youtube):
+        with mock.patch.object(views, "_build_youtube_client", lambda: youtube):
+            call_command("revalidate_videos", stdout=StringIO())
+
+    def test_failed_batch_is_skipped(self):
+        errors = (
+            HttpError(httplib2.Response({"status": 503}), b"backend error"),
+            TimeoutError("timed out"),
+            httplib2.ServerNotFoundError("no route"),
+        )
+        for error in errors:
+            with self.subTest(error=type(error).__name__):
+                VideoMeta.objects.all().delete()
+                youtube = FlakyYouTube(error)
+                before = youtube_quota.used_today()
+                with self.assertLogs("core.management.commands.revalidate_videos", "WARNING") as logs:
+                    self.run_pass(youtube)
+                self.assertIn("batch starting at video000", logs.output[0])
+                self.assertEqual(len(youtube.calls), 3)  # one failure, two good batches
+                unchecked = set(VideoMeta.objects.filter(checked_at__isnull=True).values_list("pk", flat=True))
+                self.assertEqual(unchecked, set(youtube.calls[0]))
+                self.assertEqual(youtube_quota.used_today() - before, 3)  # the failed call still costs its units
+
+                # The next pass picks the skipped batch up again
+                youtube = FlakyYouTube()
+                self.run_pass(youtube)
+                self.assertEqual(youtube.calls, [sorted(unchecked)])
+                self.assertFalse(VideoMeta.objects.filter(checked_at__isnull=True).exists())
+
+
+class RegenerateTests(TestCase):
+    """regenerate_lesson / regenerate_quiz: network calls outside transactions, validated input."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user("admin", password="pw")
+        Profile.objects.create(user=self.admin, role=Profile.Role.ADMIN)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        course = Course.objects.create(title="Course", created_by=self.admin)
+        module = ordering.insert_module(course.pk, title="M1")
+        self.lesson = Lesson.objects.create(module=module, title="L1", order=1, video_id="old", content="<p>old</p>")
+        self.quiz = Quiz.objects.create(module=module, title="Quiz")
+
+    def test_lesson_video_is_checked_before_the_transaction(self):
+        depth = len(connection.atomic_blocks)  # the test case's own transactions
+        seen = []
+
+        def validate(video_id):
+            seen.append((video_id, len(connection.atomic_blocks)))
+            return True
+
+        with mock.patch.object(views, "validate_video_id", validate), \
+                mock.patch.object(views, "_stored_video_candidates", lambda lesson: [{"video_id": "cand"}]), \
+                mock.patch.object(views, "generate_deep_lesson_content",
+                                  lambda *args: {"text_content": "<p>new</p>", "video_id": None}):
+            response = self.client.post(f"/api/lessons/{self.lesson.pk}/regenerate/", {}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(seen, [("old", depth)])
+        self.lesson.refresh_from_db()
+        self.assertEqual((self.lesson.content, self.lesson.video_id, self.lesson.video_candidates),
+                         ("<p>new</p>", "old", ["cand"]))
+
+    def test_quiz_num_questions(self):
+        url = f"/api/quizzes/{self.quiz.pk}/regenerate/"
+        generated = [{"question_text": "Q", "options": ["a", "b"], "correct_answer": "a"}]
+        with mock.patch.object(views, "_generate_quiz_questions", return_value=generated) as generate:
+            for value in (True, False, 0, -1, views.MAX_REGENERATED_QUESTIONS + 1, 2.5, "abc", "", [3]):
+                with self.subTest(num_questions=value):
+                    response = self.client.post(url, {"num_questions": value}, format="json")
+                    self.assertEqual(response.status_code, 400)
+            generate.assert_not_called()
+
+            # Default: the current count, one question after the runs above
+            for value, expected in ((3, 3), ("4", 4), (None, 1)):
+                with self.subTest(num_questions=value):
+                    body = {} if value is None else {"num_questions": value}
+                    self.assertEqual(self.client.post(url, body, format="json").status_code, 200)
+                    self.assertEqual(generate.call_args.args[2], expected)
+
+
+class RequestProfilerTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user("admin", password="pw")
+        Profile.objects.create(user=self.admin, role=Profile.Role.ADMIN)
+        course = Course.objects.create(title="Course", created_by=self.admin)
+        self.module = ordering.insert_module(course.pk, title="Basics")
+        Lesson.objects.create(module=self.module, title="Lesson", order=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def server_timing(self, url):
+        response = self.client.get(url, HTTP_X_PROFILE="1")
+        self.assertEqual(response.status_code, 200)
+        return {
+            name: (float(dur), desc)
+            for name, dur, desc in re.findall(r'(\w+);dur=([\d.]+)(?:;desc="([^"]*)")?', response["Server-Timing"])
+        }
+
+    def test_reports_every_phase(self):
+        # ModuleDetailAPIView goes through a DRF serializer, the course list through fast_serializers
+        for url in (f"/api/modules/{self.module.pk}/", "/api/courses/"):
+            with self.subTest(url=url):
+                timing = self.server_timing(url)
+                self.assertEqual(list(timing), ["db", "view", "serialize", "render", "total"])
+                for phase in ("view", "serialize", "render"):
+                    self.assertTrue(timing[phase][1].startswith("1x"), timing[phase])
+                self.assertGreater(timing["view"][0], 0)
+
+
+class SeedScaleTests(TestCase):
+    def seed(self, **counts):
+        options = {"users": 3, "courses": 2, "attempts": 5, "lesson_words": 50, "html_variants": 1, "days": 0}
+        call_command("seed_scale", stdout=StringIO(), **{**options, **counts})
+
+    def test_without_lessons(self):
+        for counts in ({"lessons": 0}, {"modules": 0}, {"courses": 0}):
+            with self.subTest(**counts):
+                self.seed(reset=True, **counts)
+                self.assertFalse(Lesson.objects.exists())
+                self.assertFalse(ExplanationAttempt.objects.exists())
+
+        self.seed(reset=True)
+        self.assertEqual(ExplanationAttempt.objects.count(), 5)
+
+    def test_rejects_bad_counts(self):
+        for counts in ({"users": 0}, {"lessons": -1}, {"attempts": -1}):
+            with self.subTest(**counts), self.assertRaises(CommandError):
+                self.seed(**counts)
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_rejects_empty_runs(self):
+        for counts in ({"iterations": 0}, {"generations": 0}, {"courses": 0}, {"lessons": -1}):
+            with self.subTest(**counts), self.assertRaises(CommandError):
+                call_command("benchmark_suite", stdout=StringIO(), stderr=StringIO(), **counts)
+
+    def test_single_iteration(self):
+        out = StringIO()
+        call_command("benchmark_suite", scenarios="course_list", iterations=1, courses=1, modules=1, lessons=1,
+                     questions=1, stdout=out, stderr=StringIO())
+        result = json.loads(out.getvalue())["scenarios"]["course_list"]
+        self.assertEqual((result["requests"], result["errors"]), (1, 0))
+
+
+class CourseArchiveTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user("admin", password="pw")
+        Profile.objects.create(user=self.admin, role=Profile.Role.ADMIN)
+        for title in ("First", "Second"):
+            course = Course.objects.create(title=title, status="PUBLISHED", created_by=self.admin)
+            module = ordering.insert_module(course.pk, title="Basics")
+            ordering.insert_module(course.pk, title="Quiz", module_type=Module.ModuleType.ASSESSMENT)
+            quiz = Quiz.objects.create(module=Module.objects.get(course=course, order=2), title="Check")
+            Question.objects.create(quiz=quiz, question_text="Q", options=["a", "b"], correct_answer="b", order=1)
+            Lesson.objects.create(module=module, title="With video", order=1, video_id="known",
+                                  video_candidates=[{"video_id": "other"}], content=LESSON_HTML)
+            Lesson.objects.create(module=module, title="No metadata", order=2, video_id="unfetched", content="<p>x</p>")
+            Lesson.objects.create(module=module, title="No video", order=3)
+        VideoMeta.objects.create(video_id="known", title="Known video", channel_title="Channel",
+                                 duration_seconds=300, privacy_status="public", checked_at=timezone.now())
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def export(self, name):
+        path = os.path.join(self.tmp.name, name)
+        call_command("export_courses", path, stdout=StringIO())
+        with open(path, encoding="utf-8") as f:
+            return path, f.read().splitlines()
+
+    def test_round_trip(self):
+        path, exported = self.export("before.ndjson")
+        Course.objects.all().delete()
+        VideoMeta.objects.all().delete()
+
+        call_command("import_courses", path, stdout=StringIO())
+        _, imported = self.export("after.ndjson")
+        self.assertEqual(len(exported), 3)
+        self.assertEqual(imported, exported)
+        # The video without metadata is listed, but no VideoMeta row is made up for it
+        self.assertEqual(list(VideoMeta.objects.values_list("video_id", flat=True)), ["known"])
+
+    def test_rejects_incomplete_trees(self):
+        header = json.dumps({"format": course_archive.FORMAT, "version": course_archive.VERSION})
+        good = {"title": "Ok", "modules": [{"title": "M", "module_type": "CONTENT",
+                                            "lessons": [{"title": "L", "video_id": "v"}]}],
+                "videos": [{"video_id": "v"}]}
+        bad = [
+            ([], "course is not an object"),
+            ({"modules": []}, "course has no title"),
+            ({"title": "T", "modules": {}}, "modules is not a list"),
+            ({"title": "T", "modules": [{"title": "M"}]}, "module 'M' has no module_type"),
+            ({**good, "videos": []}, "lesson 'L' uses video 'v', which isn't in videos"),
+            ({**good, "videos": [{"title": "no id"}]}, "video 'no id' has no video_id"),
+            ({"title": "T", "modules": [{"title": "M", "module_type": "ASSESSMENT",
+                                         "quiz": {"title": "Q", "questions": [{"question_text": "?"}]}}]},
+             "question has no options, correct_answer"),
+        ]
+        for tree, message in bad:
+            with self.subTest(message=message):
+                stream = StringIO("\n".join([header, json.dumps(good), "", json.dumps(tree)]) + "\n")
+                with self.assertRaisesMessage(course_archive.ArchiveError, f"Line 4: {message}"):
+                    list(course_archive.read_courses(stream))
+
+        path = os.path.join(self.tmp.name, "bad.ndjson")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join([header, json.dumps(good), json.dumps({"modules": []})]) + "\n")
+        with self.assertRaisesMessage(CommandError, "Line 3: course has no title"):
+            call_command("import_courses", path, "--owner", "admin", stdout=StringIO())
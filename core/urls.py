@@ -9,18 +9,26 @@ from .views import (
     CourseListAPIView,
     CourseDetailAPIView,
     generate_single_module,
+    reorder_modules,
+    regenerate_lesson,
+    regenerate_quiz,
     ModuleCreateAPIView,
     ModuleDetailAPIView,
     LessonCreateAPIView,
+    LessonBulkAPIView,
     LessonDetailAPIView,
+    LessonContentAPIView,
     QuizCreateAPIView,
     QuizDetailAPIView,
     QuestionCreateAPIView,
+    QuestionBulkAPIView,
     QuestionDetailAPIView,
     ReviewListCreateView,
     # --- NEW IMPORTS ---
     ExplainOrFailAPIView,
-    QuizSubmissionAPIView
+    QuizSubmissionAPIView,
+    MetricsAPIView,
+    GenerationDraftAPIView,
 )
 
 urlpatterns = [
@@ -36,6 +44,8 @@ urlpatterns = [
     
     # --- AI Generator URL ---
     path('courses/<int:course_pk>/generate-module/', generate_single_module, name='generate-single-module'),
+    path('courses/<int:course_pk>/reorder-modules/', reorder_modules, name='reorder-modules'),
+    path('generation-drafts/<str:draft_id>/', GenerationDraftAPIView.as_view(), name='generation-drafts'),
     
     # --- MODULE CRUD URLS ---
     path('modules/', ModuleCreateAPIView.as_view(), name='module-create'),
@@ -46,7 +56,10 @@ urlpatterns = [
 
     # --- LESSON CRUD URLS ---
     path('lessons/', LessonCreateAPIView.as_view(), name='lesson-create'),
+    path('lessons/bulk/', LessonBulkAPIView.as_view(), name='lesson-bulk'),
     path('lessons/<int:pk>/', LessonDetailAPIView.as_view(), name='lesson-detail'),
+    path('lessons/<int:pk>/content/', LessonContentAPIView.as_view(), name='lesson-content'),
+    path('lessons/<int:pk>/regenerate/', regenerate_lesson, name='lesson-regenerate'),
 
     # --- NEW: EXPLAIN OR FAIL (Feynman Technique Audio Upload) ---
     path('lessons/<int:lesson_id>/explain/', ExplainOrFailAPIView.as_view(), name='explain-lesson'),
@@ -54,11 +67,16 @@ urlpatterns = [
     # --- QUIZ CRUD URLS (Admin/Editor) ---
     path('quizzes/', QuizCreateAPIView.as_view(), name='quiz-create'),
     path('quizzes/<int:pk>/', QuizDetailAPIView.as_view(), name='quiz-detail'),
+    path('quizzes/<int:pk>/regenerate/', regenerate_quiz, name='quiz-regenerate'),
 
     # --- QUESTION CRUD URLS (Admin/Editor) ---
     path('questions/', QuestionCreateAPIView.as_view(), name='question-create'),
+    path('questions/bulk/', QuestionBulkAPIView.as_view(), name='question-bulk'),
     path('questions/<int:pk>/', QuestionDetailAPIView.as_view(), name='question-detail'),
     
     # --- REVIEWS URL ---
     path('reviews/', ReviewListCreateView.as_view(), name='review-list-create'),
+
+    # --- METRICS (Admin only, Prometheus text format) ---
+    path('metrics/', MetricsAPIView.as_view(), name='metrics'),
 ]
\ No newline at end of file
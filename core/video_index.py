@@ -0,0 +1,202 @@
+# core/video_index.py
+"""
+Local search over stored YouTube video metadata.
+
+Every video search_youtube, validate_video_id or revalidate_videos fetches
+is saved in VideoMeta. Courses on overlapping subjects keep needing the
+same videos, so before spending a search.list (100 quota units) on a
+lesson, make_video_finder asks this index first: BM25 over the title
+(weighted up), channel and the start of the description of playable videos
+long enough for a lesson. The lesson only goes to the API when the index
+has too few good matches.
+
+The index lives in process memory. It is built on first use from the most
+recently checked rows, then kept current from VideoMeta.checked_at, so
+videos stored or re-checked by other workers show up within
+REFRESH_SECONDS and dead ones drop out. Rows this process stores itself
+are added immediately.
+"""
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+from .models import VideoMeta
+
+logger = logging.getLogger(__name__)
+
+MIN_DURATION_SECONDS = 420      # same floor as search_youtube
+REFRESH_SECONDS = float(os.getenv("VIDEO_INDEX_REFRESH_SECONDS", "60"))
+MAX_DOCS = int(os.getenv("VIDEO_INDEX_MAX_DOCS", "50000"))
+# A lesson is answered locally only with at least MIN_HITS videos whose title
+# matches MIN_COVERAGE of the query (by IDF weight, so rare words count most).
+# Descriptions only add to the score: they mention too much to vouch for a match.
+MIN_HITS = int(os.getenv("VIDEO_INDEX_MIN_HITS", "3"))
+MIN_COVERAGE = float(os.getenv("VIDEO_INDEX_MIN_COVERAGE", "0.6"))
+
+TITLE_WEIGHT = 3                # title terms count as if repeated
+DESCRIPTION_CHARS = 300         # the rest of a description is mostly links
+K1, B = 1.2, 0.75               # usual BM25 constants
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in into is it of on or the to with your you what why "
+    "tutorial course lesson lecture video part full complete beginners introduction intro guide".split()
+)
+
+FIELDS = ("video_id", "title", "channel_title", "description", "duration_seconds",
+          "embeddable", "privacy_status", "checked_at")
+
+
+def tokenize(text):
+    return [w for w in re.findall(r"\w+", text.lower()) if len(w) > 1 and w not in STOPWORDS]
+
+
+def _indexable(meta):
+    return meta.is_playable and (meta.duration_seconds or 0) >= MIN_DURATION_SECONDS
+
+
+class VideoIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.postings = defaultdict(dict)   # term -> {video_id: weighted tf}
+        self.lengths = {}                   # video_id -> weighted document length
+        self.terms = {}                     # video_id -> its terms, for removal
+        self.title_terms = {}               # video_id -> terms in its title
+        self.total_length = 0
+        self.synced_through = None          # newest checked_at seen
+        self.refreshed_at = None            # time.monotonic() of the last sync
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def clear(self):
+        with self.lock:
+            self._reset()
+
+    def _add(self, meta):
+        self._remove(meta.video_id)
+        if not _indexable(meta):
+            return
+        counts = defaultdict(int)
+        title_terms = frozenset(tokenize(meta.title))
+        for term in title_terms:
+            counts[term] += TITLE_WEIGHT
+        for term in tokenize(f"{meta.channel_title} {meta.description[:DESCRIPTION_CHARS]}"):
+            counts[term] += 1
+        for term, tf in counts.items():
+            self.postings[term][meta.video_id] = tf
+        length = sum(counts.values())
+        self.lengths[meta.video_id] = length
+        self.terms[meta.video_id] = tuple(counts)
+        self.title_terms[meta.video_id] = title_terms
+        self.total_length += length
+
+    def _remove(self, video_id):
+        length = self.lengths.pop(video_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        del self.title_terms[video_id]
+        for term in self.terms.pop(video_id):
+            posting = self.postings[term]
+            posting.pop(video_id, None)
+            if not posting:
+                del self.postings[term]
+
+    def add(self, metas):
+        with self.lock:
+            for meta in metas:
+                self._add(meta)
+
+    def refresh(self, force=False):
+        """Loads rows checked since the last sync (everything on first use)."""
+        with self.lock:
+            if not force and self.refreshed_at is not None and time.monotonic() - self.refreshed_at < REFRESH_SECONDS:
+                return
+            if len(self.lengths) > MAX_DOCS:
+                self._reset()     # start over from the newest MAX_DOCS
+            rows = VideoMeta.objects.only(*FIELDS)
+            full = self.synced_through is None
+            if full:
+                rows = rows.filter(privacy_status="public", embeddable=True,
+                                   duration_seconds__gte=MIN_DURATION_SECONDS).order_by("-checked_at")
+            else:
+                # Includes videos that went dead, so they are dropped
+                rows = rows.filter(checked_at__gte=self.synced_through).order_by("-checked_at")
+            for meta in rows[:MAX_DOCS].iterator(chunk_size=2000):
+                self._add(meta)
+                if meta.checked_at and (self.synced_through is None or meta.checked_at > self.synced_through):
+                    self.synced_through = meta.checked_at
+            self.refreshed_at = time.monotonic()
+            if full and self.lengths:
+                logger.info("Video index built with %d videos", len(self.lengths))
+
+    def search(self, query, limit, exclude=(), context=""):
+        """
+        Returns [(video_id, score)] best first, keeping only videos whose
+        title covers MIN_COVERAGE of `query`. `context` terms (say, the
+        course title) add to the score but don't count towards coverage:
+        every video of the course shares them.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        weights = dict.fromkeys(set(tokenize(context)) - terms, False)
+        weights.update(dict.fromkeys(terms, True))
+        with self.lock:
+            n = len(self.lengths)
+            if not n:
+                return []
+            average = self.total_length / n
+            scores = defaultdict(float)
+            covered = defaultdict(float)
+            query_weight = 0.0
+            for term, required in weights.items():
+                posting = self.postings.get(term, {})
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                if required:
+                    query_weight += idf
+                for video_id, tf in posting.items():
+                    norm = K1 * (1 - B + B * self.lengths[video_id] / average)
+                    scores[video_id] += idf * tf * (K1 + 1) / (tf + norm)
+                    if required and term in self.title_terms[video_id]:
+                        covered[video_id] += idf
+        hits = [
+            (video_id, score) for video_id, score in scores.items()
+            if covered[video_id] >= MIN_COVERAGE * query_weight and video_id not in exclude
+        ]
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return hits[:limit]
+
+
+_index = VideoIndex()
+
+
+def search(query, limit, exclude=(), context=""):
+    """
+    Playable stored videos matching `query`, best first, as VideoMeta rows.
+    Empty when there are fewer than MIN_HITS good matches, meaning: ask the API.
+    """
+    _index.refresh()
+    hits = _index.search(query, limit, exclude, context)
+    if len(hits) < MIN_HITS:
+        return []
+    metas = VideoMeta.objects.in_bulk([video_id for video_id, _ in hits])
+    # Re-check against the rows just read; the index can be up to REFRESH_SECONDS old
+    results = [metas[video_id] for video_id, _ in hits if video_id in metas and _indexable(metas[video_id])]
+    return results if len(results) >= MIN_HITS else []
+
+
+def add(metas):
+    """Indexes freshly stored rows right away, ahead of the next refresh."""
+    _index.add(metas)
+
+
+def reset():
+    _index.clear()
@@ -3,6 +3,7 @@ import re
 import json
 import time
 import math
+import random
 import logging
 import traceback
 import gc
@@ -20,11 +21,14 @@ import googleapiclient.discovery
 from googleapiclient.errors import HttpError
 from google.api_core.exceptions import ResourceExhausted # <--- IMPORTANT IMPORT
 
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.html import escape, strip_tags
 
 from rest_framework import status, permissions, generics
 from rest_framework.views import APIView
@@ -32,13 +36,20 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 
 # Local imports
-from .permissions import IsAdminUser, IsAdminOrReadOnly
+from . import gemini, lesson_drafts, metrics, ordering, video_index, youtube_quota
+from .permissions import IsAdminUser, IsAdminOrReadOnly, is_admin
 from .models import (
-    Course, Module, Lesson, Profile, Quiz, Question, Review, 
-    ExplanationAttempt, UserProgress
+    Course, Module, Lesson, LessonContent, Profile, Quiz, Question, Review, 
+    ExplanationAttempt, ExplanationAttemptArchive, UserProgress, VideoMeta, LessonDraft
 )
+from .fast_serializers import COURSE_FIELDS, serialize_course_trees
 from .serializers import (
     CourseDetailSerializer,
+    CourseListSerializer,
+    LessonContentSerializer,
+    LessonDraftSerializer,
+    LessonSerializer,
+    QuizSerializer,
     UserSerializer,
     ModuleWriteSerializer,
     LessonWriteSerializer,
@@ -59,8 +70,13 @@ MIN_GEMINI_DELAY = 3.0  # seconds (safe for free tier)
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
-GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 MAX_YOUTUBE_RESULTS = int(os.getenv("MAX_YOUTUBE_RESULTS", "15"))
+# Stored VideoMeta younger than this answers validate_video_id without a YouTube call
+VIDEO_META_MAX_AGE = timedelta(hours=float(os.getenv("VIDEO_META_MAX_AGE_HOURS", "24")))
+# Overall Gemini time budget for one generation request, in seconds. When it
+# runs low, lessons fall back to the short prompt, then to a placeholder.
+GENERATION_TIME_BUDGET = float(os.getenv("GENERATION_TIME_BUDGET", "600"))
+MIN_BUDGET_FOR_DEEP_LESSON = float(os.getenv("MIN_BUDGET_FOR_DEEP_LESSON", "45"))
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -76,22 +92,40 @@ else:
     genai.configure(api_key=GEMINI_API_KEY)
 
 
+def warmup_gemini_clients():
+    """Called once per worker, after the fork (gunicorn.conf.py)."""
+    if GEMINI_API_KEY:
+        gemini.warmup(gemini.route_models())
+
+
 # ---------------------
 # Utility / Robust helpers (SAME AS BEFORE)
 # ---------------------
 
-def _retry_with_backoff(fn, max_attempts=3, base_delay=1, allowed_exceptions=(Exception,)):
+def _retry_with_backoff(fn, max_attempts=3, base_delay=1, max_delay=30, allowed_exceptions=(Exception,), name="call"):
     attempt = 0
     while True:
         try:
             return fn()
+        except gemini.BudgetExhausted:
+            raise
         except allowed_exceptions as e:
             attempt += 1
             if attempt >= max_attempts:
                 logger.exception("Retries exhausted: %s", e)
                 raise
-            sleep_for = base_delay * (2 ** (attempt - 1)) + (0.1 * attempt)
+            # Full jitter, unless the server told us how long to wait (429 RetryInfo)
+            hint = gemini.retry_delay_hint(e) if isinstance(e, ResourceExhausted) else None
+            if hint is not None:
+                sleep_for = hint * random.uniform(1.0, 1.2)
+            else:
+                sleep_for = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            remaining = gemini.remaining_budget()
+            if remaining is not None and sleep_for >= remaining:
+                logger.warning("No time budget left to retry after %.2fs: %s", sleep_for, e)
+                raise
             logger.warning("Transient error (attempt %d/%d). Retrying after %.2fs: %s", attempt, max_attempts, sleep_for, e)
+            metrics.inc("upstream_retries_total", function=name)
             time.sleep(sleep_for)
 
 
@@ -147,19 +181,19 @@ def parse_iso8601_duration(duration_str):
 # Gemini helpers (SAME AS BEFORE)
 # ---------------------
 
-def run_gemini_generation(model_name, prompt_text, max_attempts=2):
+def run_gemini_generation(task, prompt_text, max_attempts=2):
+    """`task` picks the model(s) to use, see gemini.ROUTES."""
     if not GEMINI_API_KEY:
         raise RuntimeError("GEMINI_API_KEY missing")
 
     def _call():
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content(prompt_text)
+        response = gemini.generate_for_task(task, prompt_text, caller="run_gemini_generation")
         raw_text = getattr(response, "text", None)
         if raw_text is None:
             raw_text = str(response)
         return raw_text
 
-    return _retry_with_backoff(_call, max_attempts=max_attempts, base_delay=1)
+    return _retry_with_backoff(_call, max_attempts=max_attempts, base_delay=1, name=f"run_gemini_generation[{task}]")
 
 
 # ---------------------
@@ -172,24 +206,30 @@ def _build_youtube_client():
     return googleapiclient.discovery.build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
 
 
+@metrics.timed("search_youtube", "youtube")
 def search_youtube(query, max_results=MAX_YOUTUBE_RESULTS):
     if not YOUTUBE_API_KEY:
         logger.error("YouTube API Key is not set.")
         return []
-    MIN_DURATION_SECONDS = 420 
+    MIN_DURATION_SECONDS = video_index.MIN_DURATION_SECONDS
+    if not youtube_quota.try_charge(youtube_quota.SEARCH_COST):
+        return []
     try:
         youtube = _build_youtube_client()
+        # Sized from how many results usually survive the filters below
         search_request = youtube.search().list(
             part="id", q=f"{query} tutorial course", type="video",
-            videoEmbeddable="true", safeSearch="moderate", maxResults=50, 
+            videoEmbeddable="true", safeSearch="moderate", maxResults=youtube_quota.search_size(max_results),
         )
         search_response = search_request.execute()
         video_ids = [item["id"]["videoId"] for item in search_response.get("items", [])]
         if not video_ids: return []
 
         ids_string = ",".join(video_ids)
+        youtube_quota.charge(youtube_quota.VIDEOS_LIST_COST)
         details_request = youtube.videos().list(part="snippet,contentDetails,status", id=ids_string)
         details_response = details_request.execute()
+        store_video_meta(details_response.get("items", []))
         valid_videos = []
         
         for item in details_response.get("items", []):
@@ -199,12 +239,6 @@ def search_youtube(query, max_results=MAX_YOUTUBE_RESULTS):
             duration_str = item["contentDetails"]["duration"]
             duration_seconds = parse_iso8601_duration(duration_str)
             if duration_seconds < MIN_DURATION_SECONDS: continue 
-                
-            mins, secs = divmod(duration_seconds, 60)
-            formatted_duration = f"{mins}m {secs}s"
-            if duration_seconds >= 3600:
-                hrs, mins = divmod(mins, 60)
-                formatted_duration = f"{hrs}h {mins}m {secs}s"
 
             snippet = item["snippet"]
             if snippet.get("liveBroadcastContent") != "none": continue
@@ -214,30 +248,137 @@ def search_youtube(query, max_results=MAX_YOUTUBE_RESULTS):
                 "title": snippet["title"],
                 "description": snippet["description"],
                 "channelTitle": snippet["channelTitle"],
-                "duration": formatted_duration, 
+                "duration": _format_duration(duration_seconds),
                 "duration_seconds": duration_seconds
             })
-            if len(valid_videos) >= max_results: break
-        
-        return valid_videos
+
+        # Count every survivor (not just the first max_results) so search_size() learns the real rate
+        youtube_quota.record_survival(len(video_ids), len(valid_videos))
+        return valid_videos[:max_results]
     except Exception as e:
         logger.exception("YouTube search/filtering error: %s", e)
+        metrics.inc("upstream_call_failures_total", function="search_youtube", model="youtube", error=type(e).__name__)
         return []
 
 
+def _format_duration(seconds):
+    mins, secs = divmod(seconds, 60)
+    if seconds >= 3600:
+        hrs, mins = divmod(mins, 60)
+        return f"{hrs}h {mins}m {secs}s"
+    return f"{mins}m {secs}s"
+
+
+def _meta_candidate(meta):
+    """A stored VideoMeta in the same shape as search_youtube results."""
+    return {
+        "video_id": meta.video_id,
+        "title": meta.title,
+        "description": meta.description,
+        "channelTitle": meta.channel_title,
+        "duration": _format_duration(meta.duration_seconds),
+        "duration_seconds": meta.duration_seconds,
+    }
+
+
+def store_video_meta(items):
+    """Upserts VideoMeta rows from videos.list items (parts snippet, contentDetails, status)."""
+    now = timezone.now()
+    rows = []
+    for item in items:
+        snippet = item.get("snippet", {})
+        status_part = item.get("status", {})
+        duration = item.get("contentDetails", {}).get("duration")
+        rows.append(VideoMeta(
+            video_id=item["id"],
+            title=snippet.get("title", "")[:255],
+            channel_title=snippet.get("channelTitle", "")[:255],
+            description=snippet.get("description", ""),
+            duration_seconds=parse_iso8601_duration(duration) if duration else None,
+            embeddable=status_part.get("embeddable", True),
+            privacy_status=status_part.get("privacyStatus", ""),
+            checked_at=now,
+        ))
+    if rows:
+        VideoMeta.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=["video_id"],
+            update_fields=["title", "channel_title", "description", "duration_seconds",
+                           "embeddable", "privacy_status", "checked_at"],
+        )
+        video_index.add(rows)
+
+
 def validate_video_id(video_id):
     if not video_id: return False
+    meta = VideoMeta.objects.filter(video_id=video_id).first()
+    if meta is not None and meta.checked_at and meta.checked_at >= timezone.now() - VIDEO_META_MAX_AGE:
+        metrics.inc("upstream_cache_hits_total", function="validate_video_id")
+        return meta.is_playable
+    if not youtube_quota.try_charge(youtube_quota.VIDEOS_LIST_COST):
+        # Out of quota: an old answer beats dropping the video
+        return bool(meta and meta.checked_at and meta.is_playable)
+    return _fetch_video_validity(video_id)
+
+
+def make_video_finder(module_title, course_title):
+    """
+    Returns find(lesson_title) -> video candidates for one module. Lessons are
+    answered from the local video index when it has enough good matches.
+    Otherwise one search per lesson; when the YouTube quota is running ahead
+    of its daily pace, the module's lessons share one search, ranked per
+    lesson title.
+    """
+    shared = None
+    leading = set()  # local top picks already given to earlier lessons
+
+    def find(lesson_title):
+        nonlocal shared
+        query = f"{lesson_title} {course_title}"
+        local = video_index.search(lesson_title, MAX_YOUTUBE_RESULTS, exclude=leading, context=course_title)
+        if local:
+            metrics.inc("upstream_cache_hits_total", function="search_youtube")
+            leading.add(local[0].video_id)
+            return [_meta_candidate(meta) for meta in local]
+        if shared is None and not youtube_quota.low_budget():
+            return search_youtube(query, max_results=MAX_YOUTUBE_RESULTS)
+        if shared is None:
+            logger.info("YouTube quota running low, sharing one search for module: %s", module_title)
+            shared = search_youtube(f"{module_title} {course_title}", max_results=MAX_YOUTUBE_RESULTS)
+        return _rank_for_lesson(shared, lesson_title)
+
+    return find
+
+
+def _rank_for_lesson(videos, lesson_title):
+    """Orders a shared candidate list by word overlap with the lesson title (stable)."""
+    words = set(re.findall(r"\w+", lesson_title.lower()))
+    def overlap(video):
+        text = f"{video['title']} {video['description']}".lower()
+        return len(words & set(re.findall(r"\w+", text)))
+    return sorted(videos, key=overlap, reverse=True)
+
+
+@metrics.timed("validate_video_id", "youtube")
+def _fetch_video_validity(video_id):
     try:
         youtube = _build_youtube_client()
-        request = youtube.videos().list(part="status", id=video_id)
+        # Same quota cost as part="status", and it refreshes the stored metadata
+        request = youtube.videos().list(part="snippet,contentDetails,status", id=video_id)
         response = request.execute()
         items = response.get("items", [])
-        if not items: return False
+        if not items:
+            VideoMeta.objects.update_or_create(
+                video_id=video_id,
+                defaults={"privacy_status": VideoMeta.MISSING, "embeddable": False, "checked_at": timezone.now()},
+            )
+            return False
+        store_video_meta(items)
         status_part = items[0].get("status", {})
         if status_part.get("privacyStatus") != "public": return False
         if not status_part.get("embeddable", True): return False
         return True
-    except Exception:
+    except Exception as e:
+        metrics.inc("upstream_call_failures_total", function="validate_video_id", model="youtube", error=type(e).__name__)
         return False
 
 
@@ -260,7 +401,7 @@ Return ONLY valid JSON:
   "modules": [{{"title": "Module 1"}}, {{"title": "Module 2"}}]
 }}
 """
-    raw = run_gemini_generation(GEMINI_MODEL, full_prompt)
+    raw = run_gemini_generation("outline", full_prompt)
     try:
         parsed = extract_json_from_text(raw)
         if "modules" not in parsed: parsed["modules"] = []
@@ -281,8 +422,8 @@ Generate exactly {num_lessons} specific lesson titles for module "{module_title}
 Return ONLY valid JSON:
 {{"lessons": [{{"title": "Lesson 1"}}, {{"title": "Lesson 2"}}]}}
 """
-    raw = run_gemini_generation(GEMINI_MODEL, full_prompt)
     try:
+        raw = run_gemini_generation("lesson_plan", full_prompt)
         parsed = extract_json_from_text(raw)
         lessons = parsed.get("lessons", [])
         if len(lessons) != num_lessons:
@@ -302,6 +443,9 @@ def _choose_valid_video(ai_video_id, video_candidates):
     return None
 
 
+GENERATION_FAILED_HTML = "<p>Content generation failed.</p>"
+
+
 def _generate_fallback_content(lesson_title, course_prompt, video_candidates):
     logger.warning(f"⚠️ Triggering Fallback Content Generation for: {lesson_title}")
     video_id = None
@@ -319,16 +463,51 @@ Content Requirements: Intro, Deep Dive, Examples. Approx 500 words.
 RETURN ONLY THE HTML STRING.
 """
     try:
-        text_content = run_gemini_generation(GEMINI_MODEL, fallback_prompt)
+        text_content = run_gemini_generation("lesson_fallback", fallback_prompt)
         text_content = re.sub(r"^```(?:html)?\s*", "", text_content.strip(), flags=re.IGNORECASE)
         text_content = re.sub(r"\s*```$", "", text_content, flags=re.IGNORECASE)
         return {"text_content": text_content, "video_id": video_id}
+    except gemini.BudgetExhausted:
+        logger.warning(f"Time budget exhausted, writing placeholder for: {lesson_title}")
+        return {"text_content": _placeholder_lesson_html(lesson_title, video_candidates, video_id), "video_id": video_id}
     except Exception as e:
         logger.error(f"Fallback generation also failed: {e}")
-        return {"text_content": "<p>Content generation failed.</p>", "video_id": video_id}
+        return {"text_content": GENERATION_FAILED_HTML, "video_id": video_id}
+
 
+def _placeholder_lesson_html(lesson_title, video_candidates, video_id):
+    """Lesson body used when there is no time left to ask Gemini for one."""
+    html = f"<h2>{escape(lesson_title)}</h2>\n<p>This lesson is being prepared. Start with the video below.</p>"
+    chosen = next((v for v in video_candidates or [] if v.get("video_id") == video_id), None)
+    if chosen and chosen.get("description"):
+        html += f"\n<p>{escape(chosen['description'][:500])}</p>"
+    return html
+
+
+LESSON_JSON_FORMAT = """Return ONLY valid JSON:
+{
+  "text_content": "<p>Detailed lesson content...</p>",
+  "video_id": "THE_ID_OF_THE_CHOSEN_VIDEO"
+}"""
+
+# Streamed lessons can't be JSON (nothing parses until the end), so the
+# video comes first on its own line and the HTML follows as-is
+LESSON_STREAM_FORMAT = """Return ONLY this, no JSON and no code fences:
+VIDEO_ID: THE_ID_OF_THE_CHOSEN_VIDEO (or NONE)
+<p>Detailed lesson content...</p>"""
+
+
+def generate_deep_lesson_content(lesson_title, module_title, course_prompt, video_candidates, draft=None, notes=""):
+    """
+    With a `draft` (lesson_drafts.DraftLesson) the lesson is streamed and
+    written into the draft as it arrives; the result is the same either way.
+    `notes` is extra context for the prompt (e.g. neighbouring lessons).
+    """
+    remaining = gemini.remaining_budget()
+    if remaining is not None and remaining < MIN_BUDGET_FOR_DEEP_LESSON:
+        logger.warning("AI: %.0fs of budget left, using short lesson prompt for: %s", remaining, lesson_title)
+        return _finish_draft(draft, _generate_fallback_content(lesson_title, course_prompt, video_candidates))
 
-def generate_deep_lesson_content(lesson_title, module_title, course_prompt, video_candidates):
     logger.info("AI: Writing deep content for lesson: %s", lesson_title)
 
     video_options_str = ""
@@ -352,27 +531,73 @@ TASK:
 2. Write a comprehensive HTML lesson (500-800 words).
 
 {video_options_str}
-
-Return ONLY valid JSON:
-{{
-  "text_content": "<p>Detailed lesson content...</p>",
-  "video_id": "THE_ID_OF_THE_CHOSEN_VIDEO"
-}}
+{notes}
+{LESSON_JSON_FORMAT if draft is None else LESSON_STREAM_FORMAT}
 """
     try:
-        raw = run_gemini_generation(GEMINI_MODEL, full_prompt)
-        parsed = extract_json_from_text(raw)
-        text_content = parsed.get("text_content") or parsed.get("content") or ""
-        video_id = parsed.get("video_id")
+        if draft is None:
+            raw = run_gemini_generation("lesson", full_prompt)
+            parsed = extract_json_from_text(raw)
+            text_content = parsed.get("text_content") or parsed.get("content") or ""
+            video_id = parsed.get("video_id")
+        else:
+            video_id, text_content = _stream_lesson_into_draft(full_prompt, draft)
         valid_vid = _choose_valid_video(video_id, video_candidates)
         if not valid_vid and video_candidates:
             fallback = video_candidates[0].get("video_id")
             if fallback and validate_video_id(fallback):
                 valid_vid = fallback
-        return {"text_content": text_content, "video_id": valid_vid}
+        return _finish_draft(draft, {"text_content": text_content, "video_id": valid_vid})
     except Exception as e:
         logger.error(f"Primary JSON generation failed for '{lesson_title}': {e}")
-        return _generate_fallback_content(lesson_title, course_prompt, video_candidates)
+        return _finish_draft(draft, _generate_fallback_content(lesson_title, course_prompt, video_candidates))
+
+
+def stream_gemini_generation(task, prompt_text):
+    """
+    Streaming run_gemini_generation(): yields text chunks as they arrive.
+    Not retried, since earlier chunks have already been used.
+    """
+    if not GEMINI_API_KEY:
+        raise RuntimeError("GEMINI_API_KEY missing")
+    yield from gemini.stream_for_task(task, prompt_text, caller="stream_gemini_generation")
+
+
+_FENCE_OPEN_RE = re.compile(r"^\s*```(?:html)?[ \t]*\n?", re.IGNORECASE)
+_VIDEO_LINE_RE = re.compile(r"^\s*VIDEO_ID:[ \t]*(\S*)[^\n]*\n", re.IGNORECASE)
+
+
+def _split_streamed_lesson(text):
+    """
+    (video_id, html) from a LESSON_STREAM_FORMAT answer, complete or not.
+    The HTML is empty until the VIDEO_ID line is complete.
+    """
+    text = _FENCE_OPEN_RE.sub("", text, count=1)
+    if "\n" not in text:
+        return None, ""
+    match = _VIDEO_LINE_RE.match(text)
+    video_id, html = (match.group(1), text[match.end():]) if match else (None, text)
+    if video_id and video_id.upper() in ("NONE", "NULL", "N/A"):
+        video_id = None
+    return video_id or None, re.sub(r"\s*```\s*$", "", html).strip()
+
+
+def _stream_lesson_into_draft(prompt, draft):
+    text = ""
+    for chunk in stream_gemini_generation("lesson", prompt):
+        text += chunk
+        video_id, html = _split_streamed_lesson(text)
+        draft.update(html, video_id)
+    video_id, html = _split_streamed_lesson(text + "\n")
+    if not html:
+        raise ValueError("Streamed lesson was empty")
+    return video_id, html
+
+
+def _finish_draft(draft, lesson_data):
+    if draft is not None:
+        draft.finish(lesson_data.get("text_content", ""), lesson_data.get("video_id"))
+    return lesson_data
 
 
 def generate_quiz_from_content(content_text, num_questions, suggested_title=""):
@@ -394,8 +619,8 @@ Return ONLY valid JSON:
 CONTENT:
 {safe_content}
 """
-    raw = run_gemini_generation(GEMINI_MODEL, full_prompt)
     try:
+        raw = run_gemini_generation("quiz", full_prompt)
         parsed = extract_json_from_text(raw)
         if "questions" not in parsed:
             if isinstance(parsed, list): return {"quiz_title": "Assessment", "questions": parsed}
@@ -423,10 +648,11 @@ def save_course_pipeline(course_title, user, generated_modules, intermediate_qui
             test_injection_points.append(injection_index)
     module_order = 1
     quiz_index = 0
+    prev_module = None  # kept on each module for lock checks (see core/ordering.py)
     for i, module_data in enumerate(generated_modules):
-        content_module = Module.objects.create(
+        content_module = prev_module = Module.objects.create(
             course=course, title=module_data.get("title", f"Module {i+1}"),
-            order=module_order, module_type=Module.ModuleType.CONTENT,
+            order=module_order, module_type=Module.ModuleType.CONTENT, prev_module=prev_module,
         )
         module_order += 1
         for j, lesson_data in enumerate(module_data.get("lessons", [])):
@@ -436,13 +662,14 @@ def save_course_pipeline(course_title, user, generated_modules, intermediate_qui
                 content=lesson_data.get("text_content", "No content provided."),
                 order=j + 1,
                 video_id=lesson_data.get("video_id"),
+                video_candidates=lesson_data.get("video_candidates", []),
             )
         if i in test_injection_points and quiz_index < len(intermediate_quizzes):
             quiz_data = intermediate_quizzes[quiz_index]
             quiz_index += 1
-            test_module = Module.objects.create(
+            test_module = prev_module = Module.objects.create(
                 course=course, title=quiz_data.get("quiz_title", "Assessment"),
-                order=module_order, module_type=Module.ModuleType.ASSESSMENT,
+                order=module_order, module_type=Module.ModuleType.ASSESSMENT, prev_module=prev_module,
             )
             module_order += 1
             quiz_obj = Quiz.objects.create(module=test_module, title=quiz_data.get("quiz_title", "Assessment"))
@@ -454,7 +681,7 @@ def save_course_pipeline(course_title, user, generated_modules, intermediate_qui
                 )
     ultimate_module = Module.objects.create(
         course=course, title=ultimate_quiz.get("quiz_title", "Final Test"),
-        order=module_order, module_type=Module.ModuleType.ASSESSMENT,
+        order=module_order, module_type=Module.ModuleType.ASSESSMENT, prev_module=prev_module,
     )
     ultimate_quiz_obj = Quiz.objects.create(module=ultimate_module, title=ultimate_quiz.get("quiz_title", "Final Test"))
     for k, q_data in enumerate(ultimate_quiz.get("questions", [])):
@@ -475,8 +702,20 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = (permissions.AllowAny,)
     serializer_class = UserSerializer
 
+def _request_drafts(request):
+    """(lesson_drafts.Drafts or None, error Response or None) for the optional `draft_id`."""
+    draft_id = request.data.get("draft_id")
+    if draft_id in (None, ""):
+        return None, None
+    if not lesson_drafts.valid_draft_id(draft_id):
+        return None, Response({"error": "draft_id must be 1-64 letters, digits, '-' or '_'"}, status=400)
+    return lesson_drafts.Drafts(draft_id, request.user), None
+
+
 class CourseGenerateAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    @metrics.generation_scope("course")
+    @gemini.time_budget(GENERATION_TIME_BUDGET)
     def post(self, request, *args, **kwargs):
         # ... (Same implementation as previous, using helpers above) ...
         # For brevity, assuming this is unchanged from previous working version
@@ -487,6 +726,8 @@ class CourseGenerateAPIView(APIView):
         num_test_modules = min(int(request.data.get("num_test_modules", 1)), 2)
 
         if not prompt: return Response({"error": "Prompt required"}, status=400)
+        drafts, error = _request_drafts(request)
+        if error: return error
         try:
             outline_data = generate_course_outline(prompt, num_content_modules)
             course_title = outline_data.get("course_title", prompt)
@@ -496,16 +737,18 @@ class CourseGenerateAPIView(APIView):
             for module_info in module_outline:
                 module_title = module_info.get("title")
                 lesson_titles = generate_lesson_plan_for_module(module_title, prompt, num_lessons_per_module)
+                find_videos = make_video_finder(module_title, course_title)
                 generated_lessons = []
                 module_content_blob = ""
                 for lesson_info in lesson_titles:
                     lesson_title = lesson_info.get("title")
-                    search_query = f"{lesson_title} {course_title}"
-                    video_candidates = search_youtube(search_query, max_results=MAX_YOUTUBE_RESULTS)
-                    lesson_data = generate_deep_lesson_content(lesson_title, module_title, prompt, video_candidates)
+                    video_candidates = find_videos(lesson_title)
+                    draft = drafts.lesson(module_title, lesson_title) if drafts else None
+                    lesson_data = generate_deep_lesson_content(lesson_title, module_title, prompt, video_candidates, draft)
                     if lesson_data.get("video_id") and not validate_video_id(lesson_data.get("video_id")):
                          lesson_data["video_id"] = _choose_valid_video(lesson_data.get("video_id"), video_candidates)
                     lesson_data["title"] = lesson_title
+                    lesson_data["video_candidates"] = [v["video_id"] for v in video_candidates]
                     generated_lessons.append(lesson_data)
                     module_content_blob += f"Topic: {lesson_title}\n{lesson_data.get('text_content', '')}\n"
                 generated_modules.append({"title": module_title, "lessons": generated_lessons, "content_blob": module_content_blob})
@@ -531,13 +774,60 @@ class CourseGenerateAPIView(APIView):
             return Response(serializer.data, status=201)
         except Exception as e:
             traceback.print_exc()
+            if drafts: drafts.fail()
             return Response({"error": str(e)}, status=500)
 
+
+APPEND_MODULE_ATTEMPTS = 3
+
+
+def _append_module(course_pk, module_fields, lessons=(), questions=None):
+    """
+    Writes a generated module after the course's current last module, in one
+    short transaction: bulk inserts only, no network calls while it is open.
+    ordering.insert_module locks the course row (on backends that support
+    it) while it picks the order, and a clash with a concurrent append is
+    retried. Returns None if the course was deleted meanwhile.
+    """
+    for attempt in range(APPEND_MODULE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                module = ordering.insert_module(course_pk, **module_fields)
+                if module is None:
+                    return None
+                course = module.course
+                if lessons:
+                    created = Lesson.objects.bulk_create([
+                        Lesson(module=module, title=ld["title"], order=i + 1,
+                               video_id=ld["video_id"], video_candidates=ld["video_candidates"])
+                        for i, ld in enumerate(lessons)
+                    ])
+                    LessonContent.objects.bulk_create([
+                        LessonContent(lesson=lesson, html=ld["text_content"]) for lesson, ld in zip(created, lessons)
+                    ])
+                if questions is not None:
+                    quiz = Quiz.objects.create(module=module, title=module.title)
+                    Question.objects.bulk_create([
+                        Question(quiz=quiz, question_text=q["question_text"], options=q["options"],
+                                 correct_answer=q["correct_answer"], order=k + 1)
+                        for k, q in enumerate(questions)
+                    ])
+                return course
+        except IntegrityError:
+            if attempt == APPEND_MODULE_ATTEMPTS - 1:
+                raise
+            logger.info("Module order for course %s taken by a concurrent append, retrying", course_pk)
+
+
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated, IsAdminUser])
-@transaction.atomic
+@metrics.generation_scope("module")
+@gemini.time_budget(GENERATION_TIME_BUDGET)
 def generate_single_module(request, course_pk):
-    # (Same implementation as previous)
+    """
+    Appends one AI-generated module. All Gemini/YouTube calls run first with
+    no transaction open; the rows are then written by _append_module.
+    """
     try:
         course = Course.objects.get(pk=course_pk)
     except Course.DoesNotExist:
@@ -545,41 +835,232 @@ def generate_single_module(request, course_pk):
     prompt = request.data.get("prompt")
     module_type = request.data.get("module_type", "CONTENT")
     if not prompt: return Response({"error": "Prompt required"}, status=400)
+    drafts, error = _request_drafts(request)
+    if error: return error
     try:
-        last_order = course.modules.count()
         if module_type == "CONTENT":
             num_lessons = min(int(request.data.get("num_lessons", 3)), 5)
             lesson_titles = generate_lesson_plan_for_module(prompt, course.title, num_lessons)
             generated_lessons = []
+            find_videos = make_video_finder(prompt, course.title)
             for info in lesson_titles:
                 ltitle = info.get("title")
-                vids = search_youtube(f"{ltitle} {course.title}", max_results=MAX_YOUTUBE_RESULTS)
-                ldata = generate_deep_lesson_content(ltitle, prompt, course.title, vids)
+                vids = find_videos(ltitle)
+                draft = drafts.lesson(prompt, ltitle) if drafts else None
+                ldata = generate_deep_lesson_content(ltitle, prompt, course.title, vids, draft)
                 if ldata.get("video_id") and not validate_video_id(ldata.get("video_id")):
                     ldata["video_id"] = _choose_valid_video(ldata.get("video_id"), vids)
                 ldata["title"] = ltitle
+                ldata["video_candidates"] = [v["video_id"] for v in vids]
                 generated_lessons.append(ldata)
-            mod = Module.objects.create(course=course, title=prompt, order=last_order+1, module_type="CONTENT")
-            for i, ld in enumerate(generated_lessons):
-                Lesson.objects.create(module=mod, title=ld["title"], content=ld["text_content"], order=i+1, video_id=ld["video_id"])
+            course = _append_module(course.pk, {"title": prompt, "module_type": "CONTENT"}, lessons=generated_lessons)
         elif module_type == "ASSESSMENT":
             qjson = generate_quiz_from_content(f"Topic: {prompt}", 5, prompt)
-            mod = Module.objects.create(course=course, title=qjson.get("quiz_title", prompt), order=last_order+1, module_type="ASSESSMENT")
-            quiz = Quiz.objects.create(module=mod, title=qjson.get("quiz_title"))
-            for k, q in enumerate(qjson.get("questions", [])):
-                Question.objects.create(quiz=quiz, question_text=q["question_text"], options=q["options"], correct_answer=q["correct_answer"], order=k+1)
-        return Response(CourseDetailSerializer(course).data, status=201)
+            course = _append_module(
+                course.pk, {"title": qjson.get("quiz_title", prompt), "module_type": "ASSESSMENT"},
+                questions=qjson.get("questions", []),
+            )
+        if course is None:
+            return Response({"error": "Course not found"}, status=404)
+        return Response(CourseDetailSerializer(course, context={"request": request}).data, status=201)
     except Exception as e:
         traceback.print_exc()
+        if drafts: drafts.fail()
         return Response({"error": str(e)}, status=500)
 
+
+# ---------------------
+# IN-PLACE REGENERATION
+# ---------------------
+# Fixing one weak lesson or quiz shouldn't cost a whole course of AI calls.
+# The outline (course/module/lesson titles) and video candidates are already
+# stored, so a lesson costs one Gemini call and no YouTube search, and only
+# its own rows (plus, on request, the tests drawn from its module) change.
+
+LESSON_DIGEST_CHARS = 300
+MAX_REGENERATED_QUESTIONS = 20
+
+
+def _lesson_digest(lesson):
+    """Title plus the start of the lesson text, to tell Gemini what a neighbour covers."""
+    text = " ".join(strip_tags(lesson.content).split())
+    return f"- {lesson.title}: {text[:LESSON_DIGEST_CHARS]}"
+
+
+def _stored_video_candidates(lesson):
+    """The lesson's saved search results, best first, in search_youtube's shape (playable ones only)."""
+    ids = list(lesson.video_candidates or [])
+    metas = VideoMeta.objects.in_bulk(ids)
+    return [
+        _meta_candidate(metas[i]) for i in ids
+        if i in metas and metas[i].is_playable and metas[i].duration_seconds
+    ]
+
+
+def _quiz_coverage(modules):
+    """
+    {assessment module id: content modules its questions were drawn from},
+    following save_course_pipeline's layout: a test covers the content
+    modules since the previous test, and a test closing the course is the
+    final exam over all of them.
+    """
+    coverage, since_last = {}, []
+    for module in modules:
+        if module.module_type == Module.ModuleType.CONTENT:
+            since_last.append(module)
+        else:
+            coverage[module.pk] = since_last
+            since_last = []
+    if modules and modules[-1].module_type == Module.ModuleType.ASSESSMENT:
+        coverage[modules[-1].pk] = [m for m in modules if m.module_type == Module.ModuleType.CONTENT]
+    return coverage
+
+
+def _generate_quiz_questions(quiz, covered_modules, num_questions, replaced=None):
+    """
+    A new question set for `quiz` from the lessons of `covered_modules`
+    ({lesson id: html} in `replaced` overrides stored bodies). [] on failure.
+    """
+    replaced = replaced or {}
+    lessons = Lesson.objects.filter(module__in=covered_modules).select_related("body").order_by("module__order", "order")
+    blob = "".join(f"Topic: {l.title}\n{replaced.get(l.pk, l.content)}\n" for l in lessons)
+    questions = generate_quiz_from_content(blob or f"Topic: {quiz.title}", num_questions, quiz.title).get("questions", [])
+    return [
+        q for q in questions
+        if isinstance(q, dict) and q.get("question_text") and isinstance(q.get("options"), list) and q.get("correct_answer")
+    ]
+
+
+def _replace_questions(quiz, questions):
+    """Rewrites the quiz's questions by position, keeping existing rows (and ids) where it can."""
+    existing = list(quiz.questions.order_by("order", "id"))
+    updated, created = [], []
+    for k, q in enumerate(questions):
+        fields = {"question_text": q["question_text"], "options": q["options"],
+                  "correct_answer": str(q["correct_answer"])[:255], "order": k + 1}
+        if k < len(existing):
+            for name, value in fields.items():
+                setattr(existing[k], name, value)
+            updated.append(existing[k])
+        else:
+            created.append(Question(quiz=quiz, **fields))
+    Question.objects.bulk_update(updated, ["question_text", "options", "correct_answer", "order"])
+    Question.objects.bulk_create(created)
+    Question.objects.filter(pk__in=[q.pk for q in existing[len(questions):]]).delete()
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated, IsAdminUser])
+@metrics.generation_scope("lesson")
+@gemini.time_budget(GENERATION_TIME_BUDGET)
+def regenerate_lesson(request, pk):
+    """
+    Rewrites one lesson in place (same title, module and order). The video is
+    picked again from the lesson's stored candidates, and the other lessons of
+    the module are passed as digests so the new text fits between them.
+    Optional body: "instructions" for Gemini, "refresh_quizzes": true to also
+    regenerate the tests drawn from this module, "draft_id" to stream it.
+    """
+    lesson = get_object_or_404(Lesson.objects.select_related("module__course", "body"), pk=pk)
+    drafts, error = _request_drafts(request)
+    if error: return error
+    module, course = lesson.module, lesson.module.course
+
+    notes = ""
+    neighbours = module.lessons.exclude(pk=lesson.pk).select_related("body")
+    if neighbours:
+        notes = "OTHER LESSONS IN THIS MODULE (build on them, don't repeat them):\n"
+        notes += "\n".join(_lesson_digest(l) for l in neighbours) + "\n"
+    instructions = str(request.data.get("instructions") or "").strip()[:2000]
+    if instructions:
+        notes += f"EDITOR INSTRUCTIONS: {instructions}\n"
+
+    # Network phase: nothing is written until every AI call has succeeded
+    candidates = _stored_video_candidates(lesson) or make_video_finder(module.title, course.title)(lesson.title)
+    draft = drafts.lesson(module.title, lesson.title) if drafts else None
+    lesson_data = generate_deep_lesson_content(lesson.title, module.title, course.title, candidates, draft, notes)
+    html = lesson_data.get("text_content")
+    if not html or html == GENERATION_FAILED_HTML:
+        return Response({"error": "Lesson generation failed; the lesson was left unchanged."}, status=502)
+
+    quiz_updates = []
+    if request.data.get("refresh_quizzes") in (True, "true", "1", 1):
+        modules = list(course.modules.select_related("quiz"))
+        coverage = _quiz_coverage(modules)
+        for quiz_module in modules:
+            covered = coverage.get(quiz_module.pk)
+            if not covered or module not in covered or not hasattr(quiz_module, "quiz"):
+                continue
+            quiz = quiz_module.quiz
+            questions = _generate_quiz_questions(quiz, covered, quiz.questions.count() or 5, {lesson.pk: html})
+            if questions:
+                quiz_updates.append((quiz, questions))
+            else:
+                logger.warning("Quiz regeneration failed for quiz %s; keeping its questions", quiz.pk)
+
+    # validate_video_id may call YouTube: settle the video before the transaction opens
+    video_id = lesson_data.get("video_id") or (lesson.video_id if validate_video_id(lesson.video_id) else None)
+    video_candidates = [v["video_id"] for v in candidates]
+
+    with transaction.atomic():
+        lesson.content = html
+        lesson.video_id = video_id
+        lesson.video_candidates = video_candidates
+        lesson.save(update_fields=["video", "video_candidates"])
+        for quiz, questions in quiz_updates:
+            _replace_questions(quiz, questions)
+    return Response({
+        "lesson": LessonSerializer(lesson).data,
+        "quizzes": [QuizSerializer(quiz).data for quiz, _ in quiz_updates],
+    })
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated, IsAdminUser])
+@metrics.generation_scope("quiz")
+@gemini.time_budget(GENERATION_TIME_BUDGET)
+def regenerate_quiz(request, pk):
+    """
+    Replaces a quiz's questions with a new set drawn from the lessons it
+    covers. Optional body: "num_questions", 1 to MAX_REGENERATED_QUESTIONS
+    (default: the current count).
+    """
+    quiz = get_object_or_404(Quiz.objects.select_related("module"), pk=pk)
+    num_questions = request.data.get("num_questions")
+    if num_questions is None:
+        num_questions = min(quiz.questions.count() or 5, MAX_REGENERATED_QUESTIONS)
+    else:
+        # Form posts send digits as text; JSON true/1.5 aren't counts
+        if isinstance(num_questions, str) and num_questions.strip().isdigit():
+            num_questions = int(num_questions)
+        if type(num_questions) is not int or not 1 <= num_questions <= MAX_REGENERATED_QUESTIONS:
+            return Response(
+                {"error": f"num_questions must be a whole number from 1 to {MAX_REGENERATED_QUESTIONS}"}, status=400
+            )
+
+    modules = list(Module.objects.filter(course_id=quiz.module.course_id))
+    covered = _quiz_coverage(modules).get(quiz.module_id, [])
+    questions = _generate_quiz_questions(quiz, covered, num_questions)
+    if not questions:
+        return Response({"error": "Quiz generation failed; the quiz was left unchanged."}, status=502)
+    with transaction.atomic():
+        _replace_questions(quiz, questions)
+    return Response(QuizSerializer(quiz).data)
+
+
 class CourseListAPIView(generics.ListAPIView):
-    serializer_class = CourseDetailSerializer
+    # Listings only need the structure; lesson bodies are never loaded here.
+    serializer_class = CourseListSerializer
     permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
         user = self.request.user
-        if hasattr(user, "profile") and user.profile.role == "ADMIN": return Course.objects.all().order_by("-created_at")
-        return Course.objects.filter(Q(status="PUBLISHED") | Q(created_by=user)).order_by("-created_at")
+        qs = Course.objects.order_by("-created_at")
+        if is_admin(user): return qs
+        return qs.filter(Q(status="PUBLISHED") | Q(created_by_id=user.id))
+    def list(self, request, *args, **kwargs):
+        # Same JSON as CourseListSerializer, built from .values() rows
+        rows = list(self.filter_queryset(self.get_queryset()).values(*COURSE_FIELDS))
+        return Response(serialize_course_trees(rows, request.user, include_content=False))
 
 class CourseDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Course.objects.all()
@@ -587,12 +1068,42 @@ class CourseDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
         user = self.request.user
-        if hasattr(user, "profile") and user.profile.role == "ADMIN": return Course.objects.all()
-        return Course.objects.filter(Q(status="PUBLISHED") | Q(created_by=user))
+        qs = Course.objects.all()
+        if is_admin(user): return qs
+        return qs.filter(Q(status="PUBLISHED") | Q(created_by_id=user.id))
+    def retrieve(self, request, *args, **kwargs):
+        # Same JSON as CourseDetailSerializer, built from .values() rows
+        row = get_object_or_404(self.get_queryset().values(*COURSE_FIELDS), pk=kwargs["pk"])
+        return Response(serialize_course_trees([row], request.user)[0])
 
 class ModuleCreateAPIView(generics.CreateAPIView):
+    """Inserts a module at `order` (default: after the last one); later modules move down."""
     queryset = Module.objects.all(); serializer_class = ModuleWriteSerializer; permission_classes = [permissions.IsAuthenticated, IsAdminUser]
-def gemini_safe_generate(model, prompt):
+    def perform_create(self, serializer):
+        fields = dict(serializer.validated_data)
+        course, position = fields.pop("course"), fields.pop("order", None)
+        serializer.instance = ordering.insert_module(course.pk, position, **fields)
+        if serializer.instance is None:
+            raise Http404("Course not found")
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated, IsAdminUser])
+def reorder_modules(request, course_pk):
+    """Body: {"module_ids": [...]}, every module of the course once, in the new order."""
+    module_ids = request.data.get("module_ids")
+    if not isinstance(module_ids, list) or not all(type(pk) is int for pk in module_ids):
+        return Response({"error": "module_ids must be a list of module ids"}, status=400)
+    try:
+        modules = ordering.reorder_modules(course_pk, module_ids)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    if modules is None:
+        return Response({"error": "Course not found"}, status=404)
+    return Response(ModuleWriteSerializer(modules, many=True).data)
+
+
+def gemini_safe_generate(task, prompt):
     global LAST_GEMINI_CALL
 
     with GEMINI_LOCK:
@@ -601,36 +1112,80 @@ def gemini_safe_generate(model, prompt):
         if wait > 0:
             time.sleep(wait)
 
-        response = model.generate_content(prompt)
+        response = gemini.generate_for_task(task, prompt, caller="gemini_safe_generate")
         LAST_GEMINI_CALL = time.time()
         return response
 
 
+class GenerationDraftAPIView(generics.ListAPIView):
+    """
+    Lessons of a generation started with this `draft_id`, including the one
+    Gemini is writing right now (partial HTML, status STREAMING). Poll it
+    while the generation request runs. Admins see every draft, others their own.
+    """
+    serializer_class = LessonDraftSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    def get_queryset(self):
+        drafts = LessonDraft.objects.filter(draft_id=self.kwargs["draft_id"])
+        if not is_admin(self.request.user):
+            drafts = drafts.filter(created_by_id=self.request.user.id)
+        return drafts
+
+
+class MetricsAPIView(APIView):
+    """Upstream call metrics for this worker, in the Prometheus text format."""
+    permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+    def get(self, request):
+        return HttpResponse(metrics.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 def hash_transcript(text: str) -> str:
     return hashlib.sha256(text.strip().lower().encode()).hexdigest()
 
+def _locked_response(user, module):
+    """Returns a 403 LOCKED response if the module before `module` isn't completed, else None."""
+    if is_admin(user) or module.prev_module_id is None:
+        return None
+    has_completed_prev = UserProgress.objects.filter(user_id=user.id, module_id=module.prev_module_id, is_completed=True).exists()
+    if not has_completed_prev:
+        # The title is only needed for the message, so it's read only when locked
+        title = Module.objects.filter(pk=module.prev_module_id).values_list("title", flat=True).first()
+        return Response({"error": "LOCKED", "message": f"Complete '{title}' first."}, status=status.HTTP_403_FORBIDDEN)
+    return None
+
 class ModuleDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Module.objects.all()
     serializer_class = ModuleWriteSerializer
     permission_classes = [permissions.IsAuthenticated]
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        user = request.user
-        if hasattr(user, 'profile') and user.profile.role == 'ADMIN':
-            return super().retrieve(request, *args, **kwargs)
-        if instance.order == 1:
-            return super().retrieve(request, *args, **kwargs)
-        previous_module = Module.objects.filter(course=instance.course, order__lt=instance.order).order_by('-order').first()
-        if previous_module:
-            has_completed_prev = UserProgress.objects.filter(user=user, module=previous_module, is_completed=True).exists()
-            if not has_completed_prev:
-                return Response({"error": "LOCKED", "message": f"Complete '{previous_module.title}' first."}, status=status.HTTP_403_FORBIDDEN)
-        return super().retrieve(request, *args, **kwargs)
+        locked = _locked_response(request.user, instance)
+        if locked: return locked
+        return Response(self.get_serializer(instance).data)
+    def perform_update(self, serializer):
+        # A new `order` moves the module; the rest of the course shifts to keep 1..n
+        position = serializer.validated_data.pop("order", None)
+        with transaction.atomic():
+            serializer.save()
+            if position is not None and position != serializer.instance.order:
+                serializer.instance = ordering.move_module(serializer.instance.pk, position) or serializer.instance
+    def perform_destroy(self, instance):
+        ordering.delete_module(instance.pk)
 
 class LessonCreateAPIView(generics.CreateAPIView):
     queryset = Lesson.objects.all(); serializer_class = LessonWriteSerializer; permission_classes = [permissions.IsAuthenticated, IsAdminUser]
 class LessonDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Lesson.objects.all(); serializer_class = LessonWriteSerializer; permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+class LessonContentAPIView(generics.RetrieveAPIView):
+    """The lesson body on its own, for clients that load course structure without it."""
+    queryset = Lesson.objects.select_related("body", "module")
+    serializer_class = LessonContentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        locked = _locked_response(request.user, instance.module)
+        if locked: return locked
+        return Response(self.get_serializer(instance).data)
 class QuizCreateAPIView(generics.CreateAPIView):
     queryset = Quiz.objects.all(); serializer_class = QuizWriteSerializer; permission_classes = [permissions.IsAuthenticated, IsAdminUser]
 class QuizDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
@@ -639,6 +1194,121 @@ class QuestionCreateAPIView(generics.CreateAPIView):
     queryset = Question.objects.all(); serializer_class = QuestionWriteSerializer; permission_classes = [permissions.IsAuthenticated, IsAdminUser]
 class QuestionDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Question.objects.all(); serializer_class = QuestionWriteSerializer; permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+
+
+# ---------------------
+# BULK WRITES (ADMIN EDITOR)
+# ---------------------
+BULK_WRITE_MAX_ROWS = 500
+
+
+class BulkWriteAPIView(APIView):
+    """
+    Saves an editor's changes to many rows in one request and one transaction.
+    Body (every key optional):
+        {"create": [{...}], "update": [{"id": 1, ...}], "delete": [2, 3]}
+    Rows are validated with the write serializer (updates are partial) and
+    written with bulk_create / bulk_update. If any row is invalid nothing is
+    written, and the 400 lists errors by position like a many=True serializer.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+    serializer_class = None
+
+    def get_queryset(self):
+        return self.serializer_class.Meta.model.objects.all()
+
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        create, update, delete = (data.get(key, []) for key in ("create", "update", "delete"))
+        if not all(isinstance(rows, list) for rows in (create, update, delete)):
+            return Response({"error": "Expected lists under create, update and delete"}, status=400)
+        if len(create) + len(update) + len(delete) > BULK_WRITE_MAX_ROWS:
+            return Response({"error": f"At most {BULK_WRITE_MAX_ROWS} rows per request"}, status=400)
+        update_ids = [row.get("id") if isinstance(row, dict) else None for row in update]
+        if not all(type(pk) is int for pk in update_ids + delete):
+            return Response({"error": "Updates need an integer id; delete takes a list of ids"}, status=400)
+        if len(set(update_ids)) != len(update_ids) or set(update_ids) & set(delete):
+            return Response({"error": "Each id may be updated or deleted once"}, status=400)
+
+        instances = self.get_queryset().in_bulk(update_ids)
+        missing = [pk for pk in update_ids if pk not in instances]
+        if missing:
+            return Response({"error": f"Not found: {missing}"}, status=404)
+
+        creating = self.serializer_class(data=create, many=True)
+        updating = [self.serializer_class(instances[pk], data=row, partial=True) for pk, row in zip(update_ids, update)]
+        valid = creating.is_valid() & all([serializer.is_valid() for serializer in updating])
+        if not valid:
+            return Response({
+                "create": creating.errors if create else [],
+                "update": [serializer.errors for serializer in updating],
+            }, status=400)
+
+        with transaction.atomic():
+            created = self.bulk_create(creating.validated_data)
+            updated = self.bulk_update([(s.instance, s.validated_data) for s in updating])
+            deleted = list(self.get_queryset().filter(pk__in=delete).values_list("pk", flat=True))
+            self.get_queryset().filter(pk__in=deleted).delete()
+        return Response({
+            "created": self.serializer_class(created, many=True).data,
+            "updated": self.serializer_class(updated, many=True).data,
+            "deleted": deleted,
+        })
+
+    def bulk_create(self, rows):
+        model = self.serializer_class.Meta.model
+        return model.objects.bulk_create([model(**row) for row in rows])
+
+    def bulk_update(self, changes):
+        fields = set()
+        for instance, row in changes:
+            for field, value in row.items():
+                setattr(instance, field, value)
+            fields.update(row)
+        instances = [instance for instance, _ in changes]
+        if fields:
+            self.serializer_class.Meta.model.objects.bulk_update(instances, sorted(fields))
+        return instances
+
+
+class LessonBulkAPIView(BulkWriteAPIView):
+    """Bulk lesson writes; bodies go to LessonContent in the same transaction."""
+    serializer_class = LessonWriteSerializer
+
+    def get_queryset(self):
+        return Lesson.objects.select_related("body")
+
+    def bulk_create(self, rows):
+        contents = [row.pop("content") for row in rows]
+        lessons = Lesson.objects.bulk_create([Lesson(**row) for row in rows])
+        LessonContent.objects.bulk_create([
+            LessonContent(lesson=lesson, html=html) for lesson, html in zip(lessons, contents)
+        ])
+        for lesson, html in zip(lessons, contents):
+            lesson.content = html  # Read back by the response serializer
+        return lessons
+
+    def bulk_update(self, changes):
+        contents = {instance.pk: row.pop("content") for instance, row in changes if "content" in row}
+        lessons = super().bulk_update(changes)
+        if contents:
+            bodies = LessonContent.objects.in_bulk(list(contents))
+            for pk, body in bodies.items():
+                body.html = contents[pk]
+            LessonContent.objects.bulk_update(bodies.values(), ["html"])
+            LessonContent.objects.bulk_create([
+                LessonContent(lesson_id=pk, html=html) for pk, html in contents.items() if pk not in bodies
+            ])
+            for lesson in lessons:
+                if lesson.pk in contents:
+                    lesson.content = contents[lesson.pk]
+        return lessons
+
+
+class QuestionBulkAPIView(BulkWriteAPIView):
+    serializer_class = QuestionWriteSerializer
+
+
 class ReviewListCreateView(generics.ListCreateAPIView):
     serializer_class = ReviewSerializer; permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
@@ -664,7 +1334,7 @@ class ExplainOrFailAPIView(APIView):
     def post(self, request, lesson_id):
         # 1. Validate lesson
         try:
-            lesson = Lesson.objects.get(pk=lesson_id)
+            lesson = Lesson.objects.select_related("body").get(pk=lesson_id)
         except Lesson.DoesNotExist:
             return Response({"error": "Lesson not found"}, status=404)
 
@@ -681,26 +1351,39 @@ class ExplainOrFailAPIView(APIView):
             lesson=lesson,
             transcript_hash=transcript_hash
         ).first()
+        if existing_attempt:
+            cached = {"transcript": existing_attempt.transcript, "feedback": existing_attempt.feedback}
+        else:
+            # archive_explanations may have moved it out of the hot table
+            existing_attempt = ExplanationAttemptArchive.objects.filter(
+                user=user,
+                lesson=lesson,
+                transcript_hash=transcript_hash
+            ).first()
+            if existing_attempt:
+                payload = json.loads(existing_attempt.payload)
+                cached = {"transcript": payload["transcript"], "feedback": payload["feedback"]}
 
         if existing_attempt:
+            metrics.inc("upstream_cache_hits_total", function="gemini_safe_generate[grading]")
             return Response({
                 "status": "cached",
                 "data": {
-                    "transcript": existing_attempt.transcript,
-                    "feedback": existing_attempt.feedback,
+                    **cached,
                     "is_passed": existing_attempt.is_passed,
                     "module_completed": existing_attempt.is_passed
                 }
             })
 
         # 3. COOLDOWN: prevent rapid retries
-        last_attempt = ExplanationAttempt.objects.filter(
+        # Only created_at is read, so explanation_latest_idx answers it alone
+        last_attempt_at = ExplanationAttempt.objects.filter(
             user=user,
             lesson=lesson
-        ).order_by("-created_at").first()
+        ).order_by("-created_at").values_list("created_at", flat=True).first()
 
-        if last_attempt:
-            delta = timezone.now() - last_attempt.created_at
+        if last_attempt_at:
+            delta = timezone.now() - last_attempt_at
             if delta < timedelta(seconds=30):
                 return Response(
                     {"error": "Please wait 30 seconds before retrying."},
@@ -731,11 +1414,9 @@ RETURN JSON ONLY:
 }}
 """
 
-        model = genai.GenerativeModel(GEMINI_MODEL)
-
         # 5. Gemini call (RATE SAFE)
         try:
-            response = gemini_safe_generate(model, prompt)
+            response = gemini_safe_generate("grading", prompt)
         except ResourceExhausted:
             return Response(
                 {"error": "AI busy. Try again in 30 seconds."},
@@ -821,7 +1502,7 @@ class QuizSubmissionAPIView(APIView):
         if passed:
             UserProgress.objects.update_or_create(
                 user=request.user, module=module,
-                defaults={'is_completed': True, 'completed_at': timezone.now()}
+                defaults={'course_id': module.course_id, 'is_completed': True, 'completed_at': timezone.now()}
             )
 
         return Response({
@@ -0,0 +1,107 @@
+# core/youtube_quota.py
+"""
+YouTube Data API quota ledger.
+
+Every call is charged to YouTubeQuotaUsage for the current quota day (YouTube
+resets at midnight Pacific), so all workers draw from one daily budget.
+Spending is paced over the day: once usage gets ahead of the pace,
+low_budget() turns true and generation shares one search per module instead
+of searching per lesson, so there is quota left for the afternoon.
+"""
+import logging
+import math
+import os
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.db.models import F, Q, Sum
+
+from .models import YouTubeQuotaUsage
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COST = 100        # search.list
+VIDEOS_LIST_COST = 1     # videos.list, up to 50 ids
+DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+# Share of the daily quota usable right away; the rest unlocks linearly over the day
+QUOTA_BURST = float(os.getenv("YOUTUBE_QUOTA_BURST", "0.1"))
+QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+
+# search.list returns at most 50; ask for enough that `wanted` survive the filters
+MIN_SEARCH_RESULTS = 10
+MAX_SEARCH_RESULTS = 50
+DEFAULT_SURVIVAL = 0.5   # until we have numbers of our own
+SURVIVAL_WINDOW_DAYS = 7
+
+
+def _now():
+    return datetime.now(QUOTA_TZ)
+
+
+def _today():
+    return _now().date()
+
+
+def _add(condition=None, **increments):
+    """
+    Adds `increments` to today's row in one UPDATE (creating the row on the
+    first call of the day). With `condition`, only if the row matches it.
+    Returns whether the row was updated.
+    """
+    day = _today()
+    rows = YouTubeQuotaUsage.objects.filter(day=day)
+    if condition is not None:
+        rows = rows.filter(condition)
+    update = {field: F(field) + value for field, value in increments.items()}
+    if rows.update(**update):
+        return True
+    # No row yet (or the condition failed): make sure the row exists, then try
+    # once more, since a concurrent first call may have just created it
+    YouTubeQuotaUsage.objects.get_or_create(day=day)
+    return bool(rows.update(**update))
+
+
+def used_today():
+    return YouTubeQuotaUsage.objects.filter(day=_today()).values_list("units", flat=True).first() or 0
+
+
+def try_charge(units):
+    """
+    Atomically books `units` if they fit in today's quota. Returns False
+    (and books nothing) otherwise. Safe across workers: one conditional UPDATE.
+    """
+    if _add(Q(units__lte=DAILY_QUOTA - units), units=units):
+        return True
+    logger.warning("YouTube daily quota (%d units) exhausted", DAILY_QUOTA)
+    return False
+
+
+def charge(units):
+    """Books `units` unconditionally (for calls already made)."""
+    _add(units=units)
+
+
+def low_budget():
+    """True when today's spending is ahead of the burst + linear pace."""
+    now = _now()
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = (now - midnight) / timedelta(days=1)
+    allowance = DAILY_QUOTA * min(1.0, QUOTA_BURST + elapsed)
+    return used_today() >= allowance
+
+
+def record_survival(returned, kept):
+    _add(search_results=returned, kept_results=kept)
+
+
+def search_size(wanted):
+    """maxResults for a search that should leave `wanted` videos after filtering."""
+    since = _today() - timedelta(days=SURVIVAL_WINDOW_DAYS)
+    totals = YouTubeQuotaUsage.objects.filter(day__gte=since).aggregate(
+        returned=Sum("search_results"), kept=Sum("kept_results")
+    )
+    survival = DEFAULT_SURVIVAL
+    if totals["returned"] and totals["returned"] >= 200:
+        survival = max(totals["kept"] / totals["returned"], 0.05)
+    # 25% headroom so an unlucky search still fills the list
+    return max(MIN_SEARCH_RESULTS, min(MAX_SEARCH_RESULTS, math.ceil(wanted / survival * 1.25)))
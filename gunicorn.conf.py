@@ -0,0 +1,9 @@
+# gunicorn.conf.py -- read automatically when gunicorn starts from the project root
+
+
+def post_worker_init(worker):
+    # Runs in each worker once the app is loaded, so the Gemini gRPC channel
+    # is opened per process (also with --preload, where the app loads in the
+    # master before the fork).
+    from core.views import warmup_gemini_clients
+    warmup_gemini_clients()